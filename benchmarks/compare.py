@@ -0,0 +1,47 @@
+# coding=utf-8
+"""
+Compares two JSON files written by benchmarks.
+
+Usage:
+    python -m benchmarks.compare base.json new.json
+"""
+from __future__ import print_function
+
+import argparse
+import json
+
+
+KEY_FIELDS = ('reader', 'variant', 'supplies', 'getter')
+
+
+def load(path):
+    with open(path) as f:
+        return dict((tuple(result.get(field) for field in KEY_FIELDS), result) for result in json.load(f)['results'])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compares two JSON files written by benchmarks.")
+    parser.add_argument('base')
+    parser.add_argument('new')
+    parser.add_argument('--threshold', type=float, default=1.1, help="Ratio of latency reported as regression")
+    args = parser.parse_args(argv)
+
+    base = load(args.base)
+    new = load(args.new)
+    regressions = 0
+    for key in sorted(set(base) & set(new), key=str):
+        base_result, new_result = base[key], new[key]
+        ratio = new_result['best_us'] / base_result['best_us'] if base_result['best_us'] else float('inf')
+        marker = ''
+        if ratio > args.threshold or new_result['syscalls'] > base_result['syscalls']:
+            marker = ' REGRESSION'
+            regressions += 1
+        print("{0:>60} {1:10.1f}us -> {2:10.1f}us ({3:5.2f}x) {4:5d} -> {5:5d} syscalls{6}".format(
+            ' '.join(str(i) for i in key), base_result['best_us'], new_result['best_us'], ratio,
+            base_result['syscalls'], new_result['syscalls'], marker))
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,68 @@
+# coding=utf-8
+"""
+Measures wall time of importing power in a fresh interpreter with and without loading the platform implementation.
+
+Usage:
+    python -m benchmarks.import_time --repeat 20 --output import_time.json
+"""
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+
+STATEMENTS = (
+    ('import', "import power"),
+    ('import+preload', "import power; power.preload()"),
+    ('import+instantiate', "import power; power.PowerManagement()"),
+)
+
+
+TIMER = """
+import time
+start = time.time()
+{statement}
+print(time.time() - start)
+"""
+
+
+def measure(statement, repeat):
+    """
+    @return: List of seconds of each run, each in a new interpreter
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    timings = []
+    for _ in range(repeat):
+        output = subprocess.check_output([sys.executable, '-c', TIMER.format(statement=statement)], cwd=root, stderr=subprocess.STDOUT)
+        timings.append(float(output.decode('ascii').strip().splitlines()[-1]))
+    return sorted(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=10, help="Number of interpreters per statement")
+    parser.add_argument('--output', help="Path to write results as JSON")
+    args = parser.parse_args(argv)
+
+    results = []
+    for name, statement in STATEMENTS:
+        timings = measure(statement, args.repeat)
+        result = {
+            'name': name,
+            'statement': statement,
+            'best_ms': timings[0] * 1e3,
+            'median_ms': timings[len(timings) // 2] * 1e3,
+        }
+        results.append(result)
+        print("{name:>20} {best_ms:8.2f}ms best {median_ms:8.2f}ms median".format(**result))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'python': sys.version, 'results': results}, f, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
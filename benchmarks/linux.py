@@ -0,0 +1,221 @@
+# coding=utf-8
+"""
+Benchmarks getters of power.linux.PowerManagement against synthetic power_supply trees.
+
+For every combination of reader, battery variant and number of supplies measures latency and throughput
+of each getter and counts file system calls made by a single query.
+
+Usage:
+    python -m benchmarks.linux --supplies 1,10,100 --output results.json
+    python -m benchmarks.compare base.json results.json
+"""
+from __future__ import print_function
+
+import argparse
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import timeit
+import warnings
+
+try:
+    import builtins
+except ImportError:
+    import __builtin__ as builtins
+
+from benchmarks import sysfs
+
+
+GETTERS = (
+    'get_status',
+    'get_providing_power_source_type',
+    'get_low_battery_warning_level',
+    'get_time_remaining_estimate',
+)
+
+
+COUNTED_CALLS = (
+    (os, 'open'),
+    (os, 'close'),
+    (os, 'read'),
+    (os, 'pread'),
+    (os, 'preadv'),
+    (os, 'lseek'),
+    (os, 'stat'),
+    (os, 'listdir'),
+)
+
+
+class CountingFileIO(io.FileIO):
+    """
+    FileIO that counts calls of its raw methods, each of which is a single syscall.
+    Buffered files opened by the built-in open call them through the buffer, so reads and closes of file objects are counted too.
+    """
+    def __init__(self, counter, *args, **kwargs):
+        super(CountingFileIO, self).__init__(*args, **kwargs)
+        self.counter = counter
+        counter.count('open')
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            return self.readall()
+        self.counter.count('read')
+        return super(CountingFileIO, self).read(size)
+
+    def readall(self):
+        chunks = []
+        while True:
+            chunk = self.read(io.DEFAULT_BUFFER_SIZE)
+            if not chunk:
+                return b''.join(chunks)
+            chunks.append(chunk)
+
+    def readinto(self, buffer):
+        self.counter.count('read')
+        return super(CountingFileIO, self).readinto(buffer)
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        self.counter.count('lseek')
+        return super(CountingFileIO, self).seek(offset, whence)
+
+    def close(self):
+        if not self.closed:
+            self.counter.count('close')
+        super(CountingFileIO, self).close()
+
+
+class CallCounter(object):
+    """
+    Counts calls of functions that result in file system syscalls while active.
+    os.path.exists and friends are counted as os.stat.
+    Files opened for binary reading by the built-in open are backed by CountingFileIO,
+    other files count as a single open.
+    """
+    def __init__(self):
+        self.counts = {}
+        self._originals = []
+
+    def __enter__(self):
+        for module, name in COUNTED_CALLS:
+            original = getattr(module, name, None)
+            if original is None:
+                continue
+            self._originals.append((module, name, original))
+            setattr(module, name, self._wrap(name, original))
+        for module in (builtins, io):
+            self._originals.append((module, 'open', module.open))
+            setattr(module, 'open', self._wrap_open(module.open))
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        for module, name, original in reversed(self._originals):
+            setattr(module, name, original)
+        del self._originals[:]
+
+    def count(self, name):
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+    def _wrap(self, name, original):
+        def counted(*args, **kwargs):
+            self.count(name)
+            return original(*args, **kwargs)
+        return counted
+
+    def _wrap_open(self, original):
+        def counted_open(file, mode='r', buffering=-1, *args, **kwargs):
+            if isinstance(file, int) or mode not in ('rb', 'br') or args or kwargs:
+                self.count('open')
+                return original(file, mode, buffering, *args, **kwargs)
+            raw = CountingFileIO(self, file, 'r')
+            return raw if buffering == 0 else io.BufferedReader(raw)
+        return counted_open
+
+    @property
+    def total(self):
+        return sum(self.counts.values())
+
+
+def measure(power_management, getter, iterations, repeat):
+    """
+    @return: Dict with latency in microseconds, throughput and counted calls of a single query
+    """
+    func = getattr(power_management, getter)
+    func()  # Warm up caches of the reader and topology
+
+    with CallCounter() as counter:
+        func()
+
+    timings = [t / iterations * 1e6 for t in timeit.repeat(func, number=iterations, repeat=repeat)]
+    timings.sort()
+    best = timings[0]
+    return {
+        'getter': getter,
+        'iterations': iterations,
+        'repeat': repeat,
+        'best_us': best,
+        'median_us': timings[len(timings) // 2],
+        'calls_per_second': 1e6 / best if best else None,
+        'syscalls': counter.total,
+        'syscalls_by_name': counter.counts,
+    }
+
+
+def run(supplies, variants, readers, iterations, repeat):
+    from power import linux
+
+    results = []
+    for variant in variants:
+        for supply_count in supplies:
+            root = tempfile.mkdtemp(prefix='sysfs-')
+            try:
+                sysfs.create_tree(supply_count, variant, linux.get_power_supply_path(root))
+                for reader in readers:
+                    power_management = linux.PowerManagement(reader=reader, root=root)
+                    for getter in GETTERS:
+                        result = measure(power_management, getter, iterations, repeat)
+                        result.update(reader=reader, variant=variant, supplies=supply_count)
+                        results.append(result)
+                        print("{reader:>16} {variant:>15} {supplies:>4} {getter:>31} {best_us:10.1f}us {syscalls:5d} syscalls".format(**result))
+                    power_management._reader.close()
+            finally:
+                sysfs.remove_tree(root)
+    return results
+
+
+def main(argv=None):
+    from power import linux
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--supplies', default='1,2,10,100', help="Comma separated numbers of supplies in generated trees")
+    parser.add_argument('--variants', default=','.join(sysfs.VARIANTS), help="Comma separated variants of batteries")
+    parser.add_argument('--readers', default=','.join(sorted(linux.READERS)), help="Comma separated names of readers")
+    parser.add_argument('--iterations', type=int, default=200, help="Number of queries per timing")
+    parser.add_argument('--repeat', type=int, default=5, help="Number of timings")
+    parser.add_argument('--output', help="Path to write results as JSON")
+    args = parser.parse_args(argv)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        results = run(
+            [int(i) for i in args.supplies.split(',')],
+            args.variants.split(','),
+            args.readers.split(','),
+            args.iterations,
+            args.repeat
+        )
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'python': sys.version,
+                'implementation': platform.python_implementation(),
+                'platform': platform.platform(),
+                'results': results,
+            }, f, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+# coding=utf-8
+"""
+Generates synthetic /sys/class/power_supply trees.
+
+Variants of batteries:
+    - energy: energy_now, energy_full and power_now
+    - charge: charge_now, charge_full, current_now and voltage_now
+    - current_voltage: energy_now, energy_full, current_now and voltage_now
+"""
+import os
+import shutil
+import tempfile
+
+
+VARIANTS = ('energy', 'charge', 'current_voltage')
+
+
+BATTERY_ATTRIBUTES = {
+    'energy': [
+        ('energy_full', 50000000),
+        ('energy_now', 25000000),
+        ('power_now', 10000000),
+    ],
+    'charge': [
+        ('charge_full', 4000000),
+        ('charge_now', 2000000),
+        ('current_now', 1000000),
+        ('voltage_now', 12000000),
+    ],
+    'current_voltage': [
+        ('energy_full', 50000000),
+        ('energy_now', 25000000),
+        ('current_now', 1000000),
+        ('voltage_now', 12000000),
+    ],
+}
+
+
+def write_supply(root, name, attributes):
+    """
+    Writes supply directory with an attribute file per attribute and the uevent file with all of them.
+
+    @param root: Path to the tree
+    @param name: Name of the supply
+    @param attributes: List of tuples (name, value)
+    @return: Path to the supply
+    """
+    supply_path = os.path.join(root, name)
+    os.makedirs(supply_path)
+    uevent = ['POWER_SUPPLY_NAME={0}'.format(name)]
+    for attribute, value in attributes:
+        with open(os.path.join(supply_path, attribute), 'w') as f:
+            f.write('{0}\n'.format(value))
+        uevent.append('POWER_SUPPLY_{0}={1}'.format(attribute.upper(), value))
+    with open(os.path.join(supply_path, 'uevent'), 'w') as f:
+        f.write('\n'.join(uevent) + '\n')
+    return supply_path
+
+
+def create_tree(supplies, variant='energy', root=None):
+    """
+    Creates a tree with an offline AC adapter and supplies - 1 discharging batteries.
+
+    @param supplies: Total number of supplies, at least 1
+    @param variant: One of VARIANTS
+    @param root: Directory to create the tree in. By default a temporary directory is created
+    @return: Path to the tree
+    """
+    if root is None:
+        root = tempfile.mkdtemp(prefix='power_supply-')
+    elif not os.path.isdir(root):
+        os.makedirs(root)
+
+    write_supply(root, 'AC', [('type', 'Mains'), ('online', 0)])
+    for i in range(supplies - 1):
+        attributes = [('type', 'Battery'), ('present', 1), ('status', 'Discharging')] + BATTERY_ATTRIBUTES[variant]
+        write_supply(root, 'BAT{0}'.format(i), attributes)
+    return root
+
+
+def remove_tree(root):
+    shutil.rmtree(root)
@@ -16,12 +16,36 @@ Usage:
     # class Observer(object):
     #     ...
     # PowerManagementObserver.register(Observer)
+
+    # Platform implementation is loaded on first use, daemons may load it upfront
+    import power
+    power.preload()
+
+    # Query all values at once
+    status = PowerManagement().get_status()
+    print(status.power_source_type, status.low_battery_warning_level, status.time_remaining_estimate)
+
+    # Reuse status for up to 2 seconds, observer notifications refresh it immediately
+    pm = PowerManagement(cache_max_age=2.0)
+    pm.get_time_remaining_estimate()
+    pm.get_time_remaining_estimate(max_age=0.5)
+    print(pm.cache_info())
+
+    # Deliver notifications from a thread pool, bursts within 0.5 seconds are coalesced into one
+    from concurrent.futures import ThreadPoolExecutor
+    pm = PowerManagement(dispatcher=ObserverDispatcher(ThreadPoolExecutor(2), debounce=0.5))
+    pm.add_observer(observer)
+
+    # Concurrent reads of all instances of the process are coalesced into one, unless disabled
+    pm = PowerManagement(hub=None)
 """
+import os
 import sys
-import traceback
+import threading
 import warnings
 
 from power.common import *
+from power.common import CacheInfo, CircuitBreaker, DEFAULT_HUB, DiagnosticsInfo, SharedReadError, monotonic
 from power.version import VERSION
 
 __version__ = VERSION
@@ -35,7 +59,9 @@ def get_platform_power_management_class():
     elif sys.platform.startswith('win32'):
         from power.win32 import PowerManagement as PowerManagementPlatform
     elif sys.platform.startswith('linux'):
-        from power.linux import PowerManagement as PowerManagementPlatform
+        from power.linux import PowerManagement as PowerManagementPlatform, POWER_SUPPLY_PATH
+        if not os.access(POWER_SUPPLY_PATH, os.R_OK):
+            raise RuntimeError("Unable to read {path}.".format(path=POWER_SUPPLY_PATH))
     else:
         raise RuntimeError("{0} is not supported.".format(sys.platform))
 
@@ -47,46 +73,250 @@ def get_power_management_class():
         PowerManagementPlatform = get_platform_power_management_class()
 
         class PowerManagement(PowerManagementPlatform):
+            """
+            Falls back to the last known or no-op values when the platform implementation raises.
+            Each method has its own CircuitBreaker: a failing method is not called again for failure_cooldown seconds
+            once it fails failure_threshold times in a row. Failures are reported as rate limited RuntimeWarning.
+            Concurrent reads of instances with the same source are coalesced by hub; only the caller that did the read
+            accounts for it in its breaker, others use the fallback if the read fails.
+            Instances created with raise_errors=True raise instead of falling back, for callers that account failures.
+            """
+            GUARDED_METHODS = (
+                'get_status',
+                'get_providing_power_source_type',
+                'get_low_battery_warning_level',
+                'get_time_remaining_estimate',
+                'get_power_sources',
+                'get_status_and_power_sources',
+            )
+
+            hub = DEFAULT_HUB
+
             def __init__(self, *args, **kwargs):
+                """
+                @param cache_max_age: If set, status not older than that many seconds is reused by getters.
+                    Observer notifications invalidate cached status immediately.
+                @param failure_threshold: Number of consecutive failures of a method that stops calling it
+                @param failure_cooldown: Number of seconds before a stopped method is probed again
+                @param dispatcher: ObserverDispatcher that delivers notifications. By default they are delivered inline
+                @param hub: ReadingHub that coalesces concurrent reads of instances with the same source.
+                    By default the one shared by the process is used. None to read independently
+                @param raise_errors: Whether getters raise instead of falling back.
+                    RuntimeError is raised while the breaker of a method is open
+                @see: PowerManagementPlatform.__init__ for other parameters
+                """
+                self._cache_max_age = kwargs.pop('cache_max_age', None)
+                self._cache_lock = threading.Lock()
+                self._cached_status = None
+                self._cached_status_time = None
+                self._cache_hits = 0
+                self._cache_misses = 0
+                self._last_status = None
+                self._raise_errors = kwargs.pop('raise_errors', False)
+
+                failure_threshold = kwargs.pop('failure_threshold', 3)
+                failure_cooldown = kwargs.pop('failure_cooldown', 30.0)
+                self._breakers = dict((name, CircuitBreaker(failure_threshold, failure_cooldown)) for name in self.GUARDED_METHODS)
+                dispatcher = kwargs.pop('dispatcher', None)
+                if 'hub' in kwargs:
+                    self.hub = kwargs.pop('hub')
+
                 super(PowerManagement, self).__init__(*args, **kwargs)
 
+                if dispatcher is not None:
+                    self.dispatcher = dispatcher
+
                 from power.common import PowerManagementNoop
                 self._noop = PowerManagementNoop()
 
+            def cache_info(self):
+                """
+                @return: Statistics of the cache of status
+                @rtype: CacheInfo
+                """
+                with self._cache_lock:
+                    return CacheInfo(self._cache_hits, self._cache_misses, self._cache_max_age)
+
+            def diagnostics_info(self):
+                """
+                @return: Numbers of failures and names of methods that are not called until their cool-down ends
+                @rtype: DiagnosticsInfo
+                """
+                return DiagnosticsInfo(
+                    self._diagnostics.counts(),
+                    tuple(name for name in self.GUARDED_METHODS if self._breakers[name].state != CircuitBreaker.CLOSED)
+                )
+
+            def _call_platform(self, name, fallback, *args):
+                """
+                Calls method of the platform implementation unless its breaker is open.
+
+                @param fallback: Callable that returns value when method cannot be called or raises
+                """
+                breaker = self._breakers[name]
+                if not breaker.allow():
+                    return self._fall_back(name, fallback)
+
+                try:
+                    result, is_shared = self._read_platform(name, *args)
+                except SharedReadError:
+                    if self._raise_errors:
+                        raise
+                    return fallback()
+                except:
+                    breaker.record_failure()
+                    if self._raise_errors:
+                        raise
+                    self._diagnostics.warn(name, "{0}.{1} raised".format(PowerManagementPlatform.__name__, name), exc_info=True, stacklevel=4)
+                    return fallback()
+
+                if not is_shared:
+                    breaker.record_success()
+                return result
+
+            def _fall_back(self, name, fallback):
+                """
+                Called instead of the method which breaker is open.
+                """
+                if self._raise_errors:
+                    raise RuntimeError("{0}.{1} is not called until its cool-down ends".format(PowerManagementPlatform.__name__, name))
+                return fallback()
+
+            def _read_platform(self, name, *args):
+                """
+                Calls method of the platform implementation through the hub.
+                Only the caller that did the read accounts for it: a shared failure raises SharedReadError.
+
+                @return: Tuple (result, whether read of another caller was shared)
+                """
+                method = getattr(super(PowerManagement, self), name)
+                if self.hub is None:
+                    return method(*args), False
+                return self.hub.join((self._get_reading_key(), name) + args, method, *args)
+
+            def _get_last_status(self):
+                status = self._last_status
+                return status if status is not None else self._noop.get_status()
+
+            def _invalidate_status(self):
+                with self._cache_lock:
+                    self._cached_status = None
+                if self.hub is not None:
+                    self.hub.forget(self._get_reading_key())
+                super(PowerManagement, self)._invalidate_status()
+
+            def _notify_observers(self, previous_status, status, power_sources_changed=False):
+                with self._cache_lock:
+                    self._cached_status = self._last_status = status
+                    self._cached_status_time = monotonic()
+                super(PowerManagement, self)._notify_observers(previous_status, status, power_sources_changed)
+
             def add_observer(self, observer):
+                """
+                Warns and observes nothing if the platform implementation fails to observe.
+                Not guarded by circuit breakers: TypeError of an invalid observer is re-raised.
+                """
                 try:
                     return super(PowerManagement, self).add_observer(observer)
-                except:
-                    warnings.warn("{0}.add_observer raised:\n{1}".format(PowerManagementPlatform.__name__, traceback.format_exc()), category=RuntimeWarning)
+                except TypeError:
+                    raise
+                except Exception:
+                    self._diagnostics.warn('add_observer', "{0}.add_observer raised".format(PowerManagementPlatform.__name__), exc_info=True)
                     return self._noop.add_observer(observer)
 
             def remove_observer(self, observer):
-                try:
-                    return super(PowerManagement, self).remove_observer(observer)
-                except:
-                    warnings.warn("{0}.remove_observer raised:\n{1}".format(PowerManagementPlatform.__name__, traceback.format_exc()), category=RuntimeWarning)
-                    return self._noop.remove_observer(observer)
+                """
+                Removal is never skipped, so the observer does not keep notification sources running.
+                """
+                return super(PowerManagement, self).remove_observer(observer)
 
-            def get_providing_power_source_type(self):
-                try:
-                    return super(PowerManagement, self).get_providing_power_source_type()
-                except:
-                    warnings.warn("{0}.get_providing_power_source_type raised:\n{1}".format(PowerManagementPlatform.__name__, traceback.format_exc()), category=RuntimeWarning)
-                    return self._noop.get_providing_power_source_type()
+            def get_status(self, max_age=None):
+                """
+                @param max_age: Maximum age in seconds of cached status that can be returned. Overrides cache_max_age
+                """
+                if max_age is None:
+                    max_age = self._cache_max_age
 
-            def get_time_remaining_estimate(self):
-                try:
-                    return super(PowerManagement, self).get_time_remaining_estimate()
-                except:
-                    warnings.warn("{0}.get_time_remaining_estimate raised:\n{1}".format(PowerManagementPlatform.__name__, traceback.format_exc()), category=RuntimeWarning)
-                    return self._noop.get_time_remaining_estimate()
+                if max_age is not None:
+                    with self._cache_lock:
+                        if self._cached_status is not None and monotonic() - self._cached_status_time <= max_age:
+                            self._cache_hits += 1
+                            return self._cached_status
+                        self._cache_misses += 1
+
+                breaker = self._breakers['get_status']
+                if not breaker.allow():
+                    return self._fall_back('get_status', self._get_last_status)
 
-            def get_low_battery_warning_level(self):
                 try:
-                    return super(PowerManagement, self).get_low_battery_warning_level()
+                    status, is_shared = self._read_platform('get_status')
+                except SharedReadError:
+                    if self._raise_errors:
+                        raise
+                    return self._get_last_status()
                 except:
-                    warnings.warn("{0}.get_low_battery_warning_level raised:\n{1}".format(PowerManagementPlatform.__name__, traceback.format_exc()), category=RuntimeWarning)
-                    return self._noop.get_low_battery_warning_level()
+                    breaker.record_failure()
+                    if self._raise_errors:
+                        raise
+                    self._diagnostics.warn('get_status', "{0}.get_status raised".format(PowerManagementPlatform.__name__), exc_info=True)
+                    return self._get_last_status()
+
+                if not is_shared:
+                    breaker.record_success()
+                with self._cache_lock:
+                    self._cached_status = self._last_status = status
+                    self._cached_status_time = monotonic()
+                return status
+
+            def get_power_sources(self):
+                return self._call_platform('get_power_sources', tuple)
+
+            def get_status_and_power_sources(self):
+                """
+                Falls back to the last known status and no power sources, unless raise_errors is set.
+                """
+                result = self._call_platform('get_status_and_power_sources', lambda: None)
+                if result is None:
+                    return self._get_last_status(), ()
+
+                with self._cache_lock:
+                    self._cached_status = self._last_status = result[0]
+                    self._cached_status_time = monotonic()
+                return result
+
+            def _is_cached(self, max_age):
+                return max_age is not None or self._cache_max_age is not None
+
+            def get_providing_power_source_type(self, max_age=None):
+                """
+                @param max_age: Maximum age in seconds of cached status that can be used. Overrides cache_max_age
+                """
+                if self._is_cached(max_age):
+                    return self.get_status(max_age).power_source_type
+
+                return self._call_platform('get_providing_power_source_type', lambda: self._get_last_status().power_source_type)
+
+            def get_time_remaining_estimate(self, max_age=None, smoothed=False):
+                """
+                @param max_age: Maximum age in seconds of cached status that can be used. Overrides cache_max_age
+                @param smoothed: Whether estimate is based on history of readings rather than the current one.
+                    Ignored if platform implementation does not support it
+                """
+                if smoothed and self.SUPPORTS_SMOOTHING:
+                    return self._call_platform('get_time_remaining_estimate', lambda: self._get_last_status().time_remaining_estimate, True)
+                elif self._is_cached(max_age):
+                    return self.get_status(max_age).time_remaining_estimate
+
+                return self._call_platform('get_time_remaining_estimate', lambda: self._get_last_status().time_remaining_estimate)
+
+            def get_low_battery_warning_level(self, max_age=None):
+                """
+                @param max_age: Maximum age in seconds of cached status that can be used. Overrides cache_max_age
+                """
+                if self._is_cached(max_age):
+                    return self.get_status(max_age).low_battery_warning_level
+
+                return self._call_platform('get_low_battery_warning_level', lambda: self._get_last_status().low_battery_warning_level)
     except (RuntimeError, ImportError) as e:
         warnings.warn("Unable to load PowerManagement, no-op PowerManagement class is used instead: {0}".format(e), category=RuntimeWarning)
         from power.common import PowerManagementNoop as PowerManagement
@@ -94,4 +324,57 @@ def get_power_management_class():
     return PowerManagement
 
 
-PowerManagement = get_power_management_class()
+_power_management_class = None
+
+_power_management_class_lock = threading.Lock()
+
+
+def preload():
+    """
+    Loads platform implementation of PowerManagement.
+    It's loaded automatically when PowerManagement is first used, call preload to pay the cost upfront.
+
+    @return: Class that PowerManagement stands for
+    """
+    global _power_management_class
+    if _power_management_class is None:
+        with _power_management_class_lock:
+            if _power_management_class is None:
+                _power_management_class = get_power_management_class()
+    return _power_management_class
+
+
+class LazyPowerManagementType(type):
+    """
+    Metaclass of PowerManagement that defers loading of the platform implementation until the class is used:
+    instantiated, subclassed, checked against or any of its attributes is accessed.
+    """
+    def __new__(mcs, name, bases, namespace):
+        if any(isinstance(base, LazyPowerManagementType) for base in bases):
+            bases = tuple(preload() if isinstance(base, LazyPowerManagementType) else base for base in bases)
+            metaclass = type(bases[0])
+            return metaclass(name, bases, namespace)
+        return super(LazyPowerManagementType, mcs).__new__(mcs, name, bases, namespace)
+
+    def __call__(cls, *args, **kwargs):
+        return preload()(*args, **kwargs)
+
+    def __getattr__(cls, name):
+        return getattr(preload(), name)
+
+    def __instancecheck__(cls, instance):
+        return isinstance(instance, preload())
+
+    def __subclasscheck__(cls, subclass):
+        return issubclass(subclass, preload())
+
+    def __repr__(cls):
+        if _power_management_class is None:
+            return "<lazy class 'power.PowerManagement'>"
+        return repr(_power_management_class)
+
+
+PowerManagement = LazyPowerManagementType('PowerManagement', (object,), {
+    '__doc__': "Platform implementation of PowerManagement or PowerManagementNoop. It's loaded on first use.",
+    '__module__': __name__,
+})
@@ -0,0 +1,153 @@
+# coding=utf-8
+"""
+Prints power status as JSON.
+
+Usage:
+    python -m power
+    python -m power --watch
+    python -m power --watch --interval 60 --fields time,time_remaining_estimate --buffered
+
+Each record is a JSON object on its own line (NDJSON). Enumerations are printed as names,
+time remaining estimate is in minutes or null if it's unknown or unlimited.
+With --watch records are printed whenever observers of the platform are notified,
+or every --interval seconds if it's given.
+"""
+from __future__ import print_function
+
+import argparse
+from collections import OrderedDict
+import json
+import sys
+import threading
+import time
+
+import power
+from power import common
+from power.common import POWER_SOURCE_TYPE_NAMES
+
+LOW_BATTERY_WARNING_LEVEL_NAMES = {
+    common.LOW_BATTERY_WARNING_NONE: 'none',
+    common.LOW_BATTERY_WARNING_EARLY: 'early',
+    common.LOW_BATTERY_WARNING_FINAL: 'final',
+}
+
+FIELDS = ('time', 'power_source_type', 'low_battery_warning_level', 'time_remaining_estimate', 'power_sources')
+
+DEFAULT_FIELDS = FIELDS[:4]
+
+
+def get_record(power_management, fields):
+    """
+    @param power_management: Instance of PowerManagement
+    @param fields: Names of FIELDS to include
+    @return: OrderedDict of the record
+    """
+    record = OrderedDict()
+    if 'power_sources' in fields:
+        status, power_sources = power_management.get_status_and_power_sources()
+    else:
+        status, power_sources = power_management.get_status(), ()
+    for field in fields:
+        if field == 'time':
+            record[field] = round(time.time(), 3)
+        elif field == 'power_source_type':
+            record[field] = POWER_SOURCE_TYPE_NAMES.get(status.power_source_type)
+        elif field == 'low_battery_warning_level':
+            record[field] = LOW_BATTERY_WARNING_LEVEL_NAMES.get(status.low_battery_warning_level)
+        elif field == 'time_remaining_estimate':
+            time_remaining = status.time_remaining_estimate
+            record[field] = time_remaining if time_remaining >= 0 else None
+        elif field == 'power_sources':
+            record[field] = [OrderedDict((name, getattr(source, name)) for name in source.__slots__)
+                             for source in power_sources]
+            for source in record[field]:
+                source['type'] = POWER_SOURCE_TYPE_NAMES.get(source['type'])
+    return record
+
+
+class ChangeObserver(common.PowerManagementObserver):
+    """
+    Wakes up the watch loop when power status changes.
+    """
+    def __init__(self):
+        self.event = threading.Event()
+
+    def on_power_sources_change(self, power_management):
+        self.event.set()
+
+    def on_time_remaining_change(self, power_management):
+        self.event.set()
+
+
+def parse_fields(value):
+    fields = [field.strip() for field in value.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in FIELDS]
+    if unknown or not fields:
+        raise argparse.ArgumentTypeError("unknown fields: {0}, expected some of {1}".format(', '.join(unknown), ', '.join(FIELDS)))
+    return fields
+
+
+def main(argv=None, power_management=None, output=None):
+    """
+    @param argv: Command line arguments. By default sys.argv[1:]
+    @param power_management: Instance of PowerManagement. By default new power.PowerManagement is created
+    @param output: File-like object records are written to. By default sys.stdout
+    @return: Exit status
+    """
+    parser = argparse.ArgumentParser(prog='power', description="Prints power status as JSON.")
+    parser.add_argument('--watch', action='store_true', help="Print a record on every change until interrupted")
+    parser.add_argument('--interval', type=float, help="With --watch, print a record every that many seconds instead of on change")
+    parser.add_argument('--count', type=int, help="With --watch, exit after that many records")
+    parser.add_argument('--fields', type=parse_fields, default=list(DEFAULT_FIELDS),
+                        help="Comma separated fields to print: {0}. Default: {1}".format(', '.join(FIELDS), ','.join(DEFAULT_FIELDS)))
+    parser.add_argument('--buffered', action='store_true', help="Do not flush output after each record")
+    args = parser.parse_args(argv)
+    if not args.watch and (args.interval is not None or args.count is not None):
+        parser.error("--interval and --count require --watch")
+
+    if power_management is None:
+        power_management = power.PowerManagement()
+    if output is None:
+        output = sys.stdout
+
+    def write_record():
+        output.write(json.dumps(get_record(power_management, args.fields), separators=(',', ':')))
+        output.write('\n')
+        if not args.buffered:
+            output.flush()
+
+    if not args.watch:
+        write_record()
+        return 0
+
+    observer = None
+    if args.interval is None:
+        observer = ChangeObserver()
+        power_management.add_observer(observer)
+
+    try:
+        written = 0
+        while True:
+            write_record()
+            written += 1
+            if args.count is not None and written >= args.count:
+                break
+
+            if observer is None:
+                time.sleep(args.interval)
+            else:
+                # Wait with timeout, so KeyboardInterrupt is delivered on Python 2
+                while not observer.event.wait(1.0):
+                    pass
+                observer.event.clear()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if observer is not None:
+            power_management.remove_observer(observer)
+        output.flush()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
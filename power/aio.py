@@ -0,0 +1,254 @@
+# coding=utf-8
+"""
+Provides asyncio interface to PowerManagement.
+Requires Python 3.5+
+
+Getters are run in the executor of the event loop, so slow reads of the platform backend never block the loop.
+Notifications are posted to the loop through a single observer of the wrapped PowerManagement
+that is shared by all streams returned by AsyncPowerManagement.watch().
+
+Usage:
+    from power.aio import AsyncPowerManagement
+
+    async def monitor():
+        pm = AsyncPowerManagement()
+        print(await pm.get_status())
+
+        async with pm.watch() as events:
+            async for event in events:
+                print(event.kind, await pm.get_time_remaining_estimate())
+
+@group Event Kinds: POWER_SOURCES_CHANGE, TIME_REMAINING_CHANGE
+@var POWER_SOURCES_CHANGE: Corresponds to PowerManagementObserver.on_power_sources_change
+@var TIME_REMAINING_CHANGE: Corresponds to PowerManagementObserver.on_time_remaining_change
+"""
+import asyncio
+from collections import namedtuple
+import functools
+
+import power
+from power import common
+
+
+__all__ = [
+    'POWER_SOURCES_CHANGE',
+    'TIME_REMAINING_CHANGE',
+    'PowerEvent',
+    'PowerEventStream',
+    'AsyncPowerManagement'
+    ]
+
+
+POWER_SOURCES_CHANGE = 'power_sources_change'
+
+TIME_REMAINING_CHANGE = 'time_remaining_change'
+
+
+PowerEvent = namedtuple('PowerEvent', ['kind', 'power_management'])
+
+
+get_running_loop = getattr(asyncio, 'get_running_loop', asyncio.get_event_loop)
+
+
+class PowerEventStream(object):
+    """
+    Asynchronous iterator over PowerEvent.
+    Keeps no more than maxsize events: the oldest event is dropped when a new one does not fit.
+    """
+    def __init__(self, async_power_management, maxsize):
+        super(PowerEventStream, self).__init__()
+        self._async_power_management = async_power_management
+        self._queue = None
+        self._maxsize = maxsize
+        self._closed = False
+        self._error = None
+        self._dropped_count = 0
+
+    @property
+    def dropped_count(self):
+        """Number of events dropped because buffer was full."""
+        return self._dropped_count
+
+    def put(self, event):
+        """
+        Buffers event. Must be called within the event loop.
+
+        @param event: PowerEvent
+        """
+        if self._queue.full():
+            self._queue.get_nowait()
+            self._dropped_count += 1
+        self._queue.put_nowait(event)
+
+    async def start(self):
+        """
+        Starts receiving events. Called automatically by the first iteration.
+        """
+        if self._queue is None and not self._closed:
+            self._queue = asyncio.Queue(maxsize=self._maxsize)
+            await self._async_power_management._add_stream(self)
+
+    def close(self):
+        """
+        Stops receiving events. Buffered events are discarded.
+        If it's the last stream, observer is removed in the executor, since that may join a thread of the platform.
+
+        @return: Future of removing the observer or None
+        """
+        if self._closed:
+            return None
+        self._closed = True
+        removal = None
+        if self._queue is not None:
+            removal = self._async_power_management._remove_stream(self)
+            self._wake_up()
+        return removal
+
+    def _fail(self, error):
+        """
+        Closes stream, so pending and next iterations raise error. Must be called within the event loop.
+        """
+        self._closed = True
+        self._error = error
+        self._wake_up()
+
+    def _wake_up(self):
+        if self._queue.full():
+            self._queue.get_nowait()
+        self._queue.put_nowait(None)  # Wakes up pending __anext__
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        await self.start()
+        if not self._closed:
+            event = await self._queue.get()
+            if event is not None and not self._closed:
+                return event
+        if self._error is not None:
+            raise self._error
+        raise StopAsyncIteration
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        removal = self.close()
+        if removal is not None:
+            await removal
+
+
+class _LoopObserver(common.PowerManagementObserver):
+    """
+    Posts notifications of PowerManagement to all streams of AsyncPowerManagement within its event loop.
+    """
+    def __init__(self, loop, streams):
+        self._loop = loop
+        self._streams = streams
+
+    def _dispatch(self, event):
+        for stream in list(self._streams):
+            stream.put(event)
+
+    def _post(self, kind, power_management):
+        try:
+            self._loop.call_soon_threadsafe(self._dispatch, PowerEvent(kind, power_management))
+        except RuntimeError:
+            pass  # Loop is closed
+
+    def on_power_sources_change(self, power_management):
+        self._post(POWER_SOURCES_CHANGE, power_management)
+
+    def on_time_remaining_change(self, power_management):
+        self._post(TIME_REMAINING_CHANGE, power_management)
+
+
+class AsyncPowerManagement(object):
+    """
+    Wraps PowerManagement to provide awaitable getters and streams of notifications.
+    Streams must be used within a single event loop.
+    """
+    def __init__(self, power_management=None, executor=None):
+        """
+        @param power_management: Instance of PowerManagement. By default new power.PowerManagement is created
+        @param executor: concurrent.futures.Executor to run getters in. By default loop's default executor is used
+        """
+        super(AsyncPowerManagement, self).__init__()
+        self.power_management = power_management if power_management is not None else power.PowerManagement()
+        self._executor = executor
+        self._streams = []
+        self._observer = None
+
+    async def _run(self, func, *args):
+        return await get_running_loop().run_in_executor(self._executor, functools.partial(func, *args))
+
+    async def get_status(self):
+        """
+        @see: PowerManagementBase.get_status
+        """
+        return await self._run(self.power_management.get_status)
+
+    async def get_providing_power_source_type(self):
+        """
+        @see: PowerManagementBase.get_providing_power_source_type
+        """
+        return await self._run(self.power_management.get_providing_power_source_type)
+
+    async def get_low_battery_warning_level(self):
+        """
+        @see: PowerManagementBase.get_low_battery_warning_level
+        """
+        return await self._run(self.power_management.get_low_battery_warning_level)
+
+    async def get_time_remaining_estimate(self):
+        """
+        @see: PowerManagementBase.get_time_remaining_estimate
+        """
+        return await self._run(self.power_management.get_time_remaining_estimate)
+
+    def watch(self, maxsize=16):
+        """
+        Returns stream of notifications.
+
+        @param maxsize: Maximum number of buffered events of the stream
+        @rtype: PowerEventStream
+        """
+        return PowerEventStream(self, maxsize)
+
+    async def _add_stream(self, stream):
+        self._streams.append(stream)
+        if self._observer is None:
+            loop = get_running_loop()
+            observer = _LoopObserver(loop, self._streams)
+            self._observer = observer
+            adding = loop.run_in_executor(self._executor, self.power_management.add_observer, observer)
+            try:
+                # Cancellation does not stop the executor, the observer is removed once it's added
+                await asyncio.shield(adding)
+            except BaseException as e:
+                if isinstance(e, asyncio.CancelledError):
+                    adding.add_done_callback(functools.partial(self._undo_add_observer, observer))
+                # Streams added while waiting rely on the same observer
+                self._observer = None
+                streams = list(self._streams)
+                del self._streams[:]
+                for other_stream in streams:
+                    other_stream._fail(e)
+                raise
+
+    def _undo_add_observer(self, observer, adding):
+        if not adding.cancelled() and adding.exception() is None:
+            observer._loop.run_in_executor(self._executor, self.power_management.remove_observer, observer)
+
+    def _remove_stream(self, stream):
+        """
+        @return: Future of removing the observer in the executor if stream was the last one, otherwise None
+        """
+        if stream in self._streams:
+            self._streams.remove(stream)
+        if not self._streams and self._observer is not None:
+            observer, self._observer = self._observer, None
+            return observer._loop.run_in_executor(self._executor, self.power_management.remove_observer, observer)
+        return None
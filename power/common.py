@@ -26,6 +26,16 @@ Represents common constants and classes for all platforms.
 @type TIME_REMAINING_UNLIMITED: float
 """
 from abc import ABCMeta, abstractmethod
+from collections import namedtuple, OrderedDict
+import errno
+import heapq
+import itertools
+import os
+import select
+import threading
+import time
+import traceback
+import warnings
 import weakref
 
 __all__ = [
@@ -37,6 +47,8 @@ __all__ = [
     'LOW_BATTERY_WARNING_FINAL',
     'TIME_REMAINING_UNKNOWN',
     'TIME_REMAINING_UNLIMITED',
+    'PowerStatus',
+    'ObserverDispatcher',
     'PowerManagementObserver'
     ]
 
@@ -47,6 +59,13 @@ POWER_TYPE_BATTERY = 1
 
 POWER_TYPE_UPS = 2
 
+# Names of power source types in output of the command line and in labels of metrics
+POWER_SOURCE_TYPE_NAMES = {
+    POWER_TYPE_AC: 'ac',
+    POWER_TYPE_BATTERY: 'battery',
+    POWER_TYPE_UPS: 'ups',
+}
+
 
 LOW_BATTERY_WARNING_NONE = 1
 
@@ -60,18 +79,657 @@ TIME_REMAINING_UNKNOWN = -1.0
 TIME_REMAINING_UNLIMITED = -2.0
 
 
+class PowerStatus(namedtuple('PowerStatus', ['power_source_type', 'low_battery_warning_level', 'time_remaining_estimate'])):
+    """
+    Immutable snapshot of the system power status.
+
+    @ivar power_source_type: One of POWER_TYPE_*
+    @ivar low_battery_warning_level: One of LOW_BATTERY_WARNING_*
+    @ivar time_remaining_estimate: Minutes remaining or one of TIME_REMAINING_*
+    """
+    __slots__ = ()
+
+
+class PowerSourceInfo(object):
+    """
+    Reading of a single power supply.
+
+    @ivar name: Name of the supply, e.g. 'BAT0'
+    @ivar type: One of POWER_TYPE_*
+    @ivar is_online: Whether AC adapter is online or battery is present
+    @ivar is_discharging: Whether battery is discharging
+    @ivar energy_now: Current energy of battery or None
+    @ivar energy_full: Full energy of battery or None
+    @ivar power_now: Current power of battery or None. Same units as energy per hour, e.g. uW for uWh or uA for uAh
+    @ivar scope: Scope of the supply reported by the platform, e.g. 'System', or None
+    @ivar status: Charging status of battery reported by the platform, e.g. 'Discharging', or None
+    @ivar voltage_now: Current voltage of battery or None, e.g. in uV
+    @ivar capacity: Percentage of charge of battery reported by the platform or None
+    @ivar energy_unit: Unit of energy_now and energy_full, e.g. 'uWh', or 'uAh' if battery reports charge. None if unknown
+    """
+    __slots__ = ('name', 'type', 'is_online', 'is_discharging', 'energy_now', 'energy_full', 'power_now',
+                 'scope', 'status', 'voltage_now', 'capacity', 'energy_unit')
+
+    def __init__(self, name, type, is_online, is_discharging=False, energy_now=None, energy_full=None, power_now=None,
+                 scope=None, status=None, voltage_now=None, capacity=None, energy_unit=None):
+        self.name = name
+        self.type = type
+        self.is_online = is_online
+        self.is_discharging = is_discharging
+        self.energy_now = energy_now
+        self.energy_full = energy_full
+        self.power_now = power_now
+        self.scope = scope
+        self.status = status
+        self.voltage_now = voltage_now
+        self.capacity = capacity
+        self.energy_unit = energy_unit
+
+    def __repr__(self):
+        return "{0}({1})".format(type(self).__name__, ', '.join('{0}={1!r}'.format(name, getattr(self, name)) for name in self.__slots__))
+
+    def __eq__(self, other):
+        return type(self) is type(other) and all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'max_age'])
+
+
+DiagnosticsInfo = namedtuple('DiagnosticsInfo', ['failures', 'open_methods'])
+
+
+ObserverStats = namedtuple('ObserverStats', ['notifications', 'deliveries', 'pending', 'last_latency', 'max_latency'])
+
+
+HubInfo = namedtuple('HubInfo', ['reads', 'shared', 'in_flight'])
+
+
+AC_POWER_STATUS = PowerStatus(POWER_TYPE_AC, LOW_BATTERY_WARNING_NONE, TIME_REMAINING_UNLIMITED)
+
+
+LOW_BATTERY_WARNING_EARLY_PERCENTAGE = 22.0
+
+LOW_BATTERY_WARNING_FINAL_TIME_REMAINING = 10.0
+
+
+def get_low_battery_warning_level(percentage, time_remaining):
+    """
+    Applies thresholds of LOW_BATTERY_WARNING_EARLY and LOW_BATTERY_WARNING_FINAL.
+
+    @param percentage: Remaining energy in percents of full energy
+    @param time_remaining: Minutes remaining or TIME_REMAINING_UNKNOWN
+    @return: One of LOW_BATTERY_WARNING_*
+    """
+    if time_remaining != TIME_REMAINING_UNKNOWN and time_remaining <= LOW_BATTERY_WARNING_FINAL_TIME_REMAINING:
+        return LOW_BATTERY_WARNING_FINAL
+    elif percentage <= LOW_BATTERY_WARNING_EARLY_PERCENTAGE:
+        return LOW_BATTERY_WARNING_EARLY
+    else:
+        return LOW_BATTERY_WARNING_NONE
+
+
+def get_batteries_status(batteries):
+    """
+    Calculates power status of the system that is not connected to AC.
+
+    Time remaining of each discharging battery is its energy divided by its power.
+    Energy of batteries that are present but do not discharge is spent at the average power of discharging ones.
+
+    @param batteries: Iterable of tuples (energy_full, energy_now, power_now, is_discharging).
+        Energy and power must be in the same units, e.g. uWh and uW.
+    @rtype: PowerStatus
+    """
+    all_energy_full = 0.0
+    all_energy_now = 0.0
+    all_energy_not_discharging = 0.0
+    discharging = []
+    for energy_full, energy_now, power_now, is_discharging in batteries:
+        all_energy_full += energy_full
+        all_energy_now += energy_now
+        if is_discharging:
+            discharging.append((energy_now, power_now))
+        else:
+            all_energy_not_discharging += energy_now
+
+    if not discharging:
+        return PowerStatus(POWER_TYPE_AC, LOW_BATTERY_WARNING_NONE, TIME_REMAINING_UNKNOWN)
+
+    try:
+        average_power_now = sum(power_now for energy_now, power_now in discharging) / len(discharging)
+        time_remaining = sum(energy_now / power_now * 60.0 for energy_now, power_now in discharging)\
+            + all_energy_not_discharging / average_power_now * 60.0
+    except ZeroDivisionError as e:
+        warnings.warn("Unable to calculate time remaining estimate: {0}".format(e), category=RuntimeWarning)
+        time_remaining = TIME_REMAINING_UNKNOWN
+
+    try:
+        percentage = all_energy_now / all_energy_full * 100.0
+    except ZeroDivisionError as e:
+        warnings.warn("Unable to calculate low battery level: {0}".format(e), category=RuntimeWarning)
+        percentage = 100.0
+
+    return PowerStatus(POWER_TYPE_BATTERY, get_low_battery_warning_level(percentage, time_remaining), time_remaining)
+
+
+monotonic = getattr(time, 'monotonic', time.time)
+
+
+class RateLimitedWarnings(object):
+    """
+    Aggregates repeated diagnostics by key and emits no more than one warning per key every interval seconds.
+    Number of occurrences since the last emitted warning is appended to the message.
+    Messages and tracebacks are formatted only when warning is emitted.
+
+    @ivar _records: Dict of key to list [total count, count since the last warning, time of the last warning]
+    """
+    def __init__(self, interval=60.0):
+        """
+        @param interval: Minimum number of seconds between two warnings of the same key
+        """
+        super(RateLimitedWarnings, self).__init__()
+        self.interval = interval
+        self._records = {}
+        self._lock = threading.Lock()
+
+    def warn(self, key, message, category=RuntimeWarning, exc_info=False, stacklevel=3):
+        """
+        Counts the occurrence and emits warning if there was none for the key within interval.
+
+        @param key: Hashable identifier of the diagnostic, e.g. tuple of method and path
+        @param message: Message or callable returning message
+        @param exc_info: Whether traceback of the exception being handled is appended to the message
+        @return: True if warning was emitted
+        """
+        now = monotonic()
+        with self._lock:
+            record = self._records.get(key)
+            if record is None:
+                record = self._records[key] = [0, 0, None]
+            record[0] += 1
+            record[1] += 1
+            if record[2] is not None and now - record[2] < self.interval:
+                return False
+            count, record[1], record[2] = record[1], 0, now
+
+        if callable(message):
+            message = message()
+        if count > 1:
+            message = "{0} (occurred {1} times in the last {2:g} seconds)".format(message, count, self.interval)
+        if exc_info:
+            message = "{0}:\n{1}".format(message, traceback.format_exc())
+        warnings.warn(message, category=category, stacklevel=stacklevel)
+        return True
+
+    def counts(self):
+        """
+        @return: Dict of key to total number of occurrences
+        """
+        with self._lock:
+            return dict((key, record[0]) for key, record in self._records.items())
+
+    def reset(self):
+        """
+        Forgets all occurrences.
+        """
+        with self._lock:
+            self._records.clear()
+
+
+class CircuitBreaker(object):
+    """
+    Stops calling a failing function for a cool-down period.
+
+    Breaker is closed while calls succeed. After failure_threshold consecutive failures it opens:
+    allow() returns False for reset_timeout seconds. Then a single probe call is allowed (half-open state):
+    breaker is closed if it succeeds and opened again otherwise.
+
+    Usage:
+        if breaker.allow():
+            try:
+                value = func()
+            except Exception:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+
+    @group States: CLOSED, OPEN, HALF_OPEN
+    """
+    CLOSED = 'closed'
+
+    OPEN = 'open'
+
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, failure_threshold=3, reset_timeout=30.0):
+        """
+        @param failure_threshold: Number of consecutive failures that opens breaker
+        @param reset_timeout: Number of seconds before open breaker allows a probe call
+        """
+        super(CircuitBreaker, self).__init__()
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_time = None
+        self._is_probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_time is None:
+                return self.CLOSED
+            elif self._is_probing or monotonic() - self._opened_time >= self.reset_timeout:
+                return self.HALF_OPEN
+            else:
+                return self.OPEN
+
+    def allow(self):
+        """
+        @return: Whether function should be called
+        """
+        with self._lock:
+            if self._opened_time is None:
+                return True
+            elif not self._is_probing and monotonic() - self._opened_time >= self.reset_timeout:
+                self._is_probing = True
+                return True
+            else:
+                return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_time = None
+            self._is_probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._is_probing or self._failures >= self.failure_threshold:
+                self._opened_time = monotonic()
+                self._is_probing = False
+
+
+class WeakObserverRegistry(object):
+    """
+    Insertion ordered set of weak references to observers with O(1) add, remove and membership test.
+    Reference is discarded automatically when its observer is garbage collected.
+    Iteration yields weak references over a snapshot, so observers may be added or removed meanwhile.
+    """
+    def __init__(self):
+        super(WeakObserverRegistry, self).__init__()
+        self._refs = OrderedDict()
+
+    def __len__(self):
+        return len(self._refs)
+
+    def __iter__(self):
+        return iter(list(self._refs.values()))
+
+    def __contains__(self, observer):
+        ref = self._refs.get(id(observer))
+        return ref is not None and ref() is observer
+
+    def add(self, observer):
+        """
+        Adds weak reference to observer unless it's already added.
+
+        @return: True if observer was added
+        """
+        key = id(observer)
+        ref = self._refs.get(key)
+        if ref is not None and ref() is observer:
+            return False
+
+        weak_self = weakref.ref(self)
+
+        def discard(ref):
+            registry = weak_self()
+            if registry is not None and registry._refs.get(key) is ref:
+                del registry._refs[key]
+
+        self._refs[key] = weakref.ref(observer, discard)
+        return True
+
+    def remove(self, observer):
+        """
+        @raise ValueError: If observer was not added
+        """
+        if observer not in self:
+            raise ValueError("{0!r} is not added".format(observer))
+        del self._refs[id(observer)]
+
+    def observers(self):
+        """
+        @return: List of observers that are alive
+        """
+        return [observer for observer in (ref() for ref in self) if observer is not None]
+
+
+class ObserverDispatcher(object):
+    """
+    Delivers notifications of PowerManagement instances to their observers.
+
+    Callbacks are run by executor, so a slow observer does not delay the notification thread.
+    Notifications for the same observer and instance are coalesced while a delivery is pending:
+    the delivery is postponed by debounce seconds after the first notification and carries all changes seen until then.
+
+    @ivar _pending: Dict of (id of PowerManagement, id of observer) to list
+        [weak ref to PowerManagement, weak ref to observer, power sources changed, time remaining changed, time of the first notification]
+    @ivar _stats: Dict of id of observer to list [weak ref to observer, notifications, deliveries, last latency, max latency],
+        so observers do not have to be hashable
+    """
+    def __init__(self, executor=None, debounce=0.0):
+        """
+        @param executor: Runs callbacks. One of:
+            - None to run them inline, in the thread that posts notification (or the debounce thread)
+            - concurrent.futures.Executor or anything with submit(func, *args)
+            - asyncio event loop or anything with call_soon_threadsafe(func, *args)
+        @param debounce: Seconds to wait for more notifications before delivering the first one
+        """
+        super(ObserverDispatcher, self).__init__()
+        self.executor = executor
+        self.debounce = debounce
+        self._pending = {}
+        self._stats = {}
+        self._schedule = []
+        self._thread = None
+        self._condition = threading.Condition()
+        self._diagnostics = RateLimitedWarnings()
+
+    @property
+    def queue_depth(self):
+        """Number of pending deliveries."""
+        with self._condition:
+            return len(self._pending)
+
+    def get_stats(self, observer):
+        """
+        @param observer: Observer notifications were dispatched to
+        @return: Number of notifications and deliveries, whether delivery is pending
+            and the last and the maximum number of seconds between the first notification and the delivery
+        @rtype: ObserverStats
+        """
+        with self._condition:
+            stats = self._get_stats(observer)
+            if stats is None:
+                return ObserverStats(0, 0, False, None, None)
+            _, notifications, deliveries, last_latency, max_latency = stats
+            is_pending = any(entry[1]() is observer for entry in self._pending.values())
+            return ObserverStats(notifications, deliveries, is_pending, last_latency, max_latency)
+
+    def _get_stats(self, observer, create=False):
+        """
+        Must be called with _condition acquired.
+        Stats are discarded automatically when observer is garbage collected.
+
+        @param create: Whether stats are created if observer has none
+        @return: List of stats or None
+        """
+        key = id(observer)
+        stats = self._stats.get(key)
+        if stats is not None and stats[0]() is observer:
+            return stats
+        elif not create:
+            return None
+
+        weak_self = weakref.ref(self)
+
+        def discard(ref):
+            dispatcher = weak_self()
+            if dispatcher is not None and dispatcher._stats.get(key, (None,))[0] is ref:
+                dispatcher._stats.pop(key, None)
+
+        stats = self._stats[key] = [weakref.ref(observer, discard), 0, 0, None, None]
+        return stats
+
+    def dispatch(self, power_management, observer, power_sources_changed, time_remaining_changed):
+        """
+        Schedules delivery of the notification or merges it into the pending one.
+
+        @param power_management: Instance of PowerManagement that posts notification
+        @param observer: Instance of PowerManagementObserver
+        @param power_sources_changed: Whether on_power_sources_change must be called
+        @param time_remaining_changed: Whether on_time_remaining_change must be called
+        """
+        key = (id(power_management), id(observer))
+        with self._condition:
+            self._get_stats(observer, create=True)[1] += 1
+
+            entry = self._pending.get(key)
+            if entry is not None:
+                entry[2] = entry[2] or power_sources_changed
+                entry[3] = entry[3] or time_remaining_changed
+                return
+
+            now = monotonic()
+            self._pending[key] = [weakref.ref(power_management), weakref.ref(observer), power_sources_changed, time_remaining_changed, now]
+            if self.debounce > 0:
+                heapq.heappush(self._schedule, (now + self.debounce, key))
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self.run_debounce_thread, name='power.common.ObserverDispatcher')
+                    self._thread.daemon = True
+                    self._thread.start()
+                else:
+                    self._condition.notify_all()
+                return
+
+        self._submit(key)
+
+    def _submit(self, key):
+        executor = self.executor
+        try:
+            if executor is None:
+                self._deliver(key)
+            elif hasattr(executor, 'call_soon_threadsafe'):
+                executor.call_soon_threadsafe(self._deliver, key)
+            else:
+                executor.submit(self._deliver, key)
+        except RuntimeError as e:
+            # Executor is shut down or event loop is closed
+            with self._condition:
+                self._pending.pop(key, None)
+            self._diagnostics.warn('submit', "Unable to deliver notification: {0}".format(e))
+
+    def _deliver(self, key):
+        with self._condition:
+            entry = self._pending.pop(key, None)
+            if entry is None:
+                return
+            weak_power_management, weak_observer, power_sources_changed, time_remaining_changed, first_time = entry
+            power_management, observer = weak_power_management(), weak_observer()
+            if power_management is None or observer is None:
+                return
+
+            latency = monotonic() - first_time
+            stats = self._get_stats(observer)
+            if stats is not None:
+                stats[2] += 1
+                stats[3] = latency
+                stats[4] = latency if stats[4] is None else max(stats[4], latency)
+
+        try:
+            if power_sources_changed:
+                observer.on_power_sources_change(power_management)
+            if time_remaining_changed:
+                observer.on_time_remaining_change(power_management)
+        except Exception:
+            self._diagnostics.warn(type(observer).__name__, "Observer {0!r} raised".format(observer), exc_info=True)
+
+    def run_debounce_thread(self):
+        """Main method of the spawned thread. Submits deliveries when their debounce ends, exits when there are none."""
+        while True:
+            with self._condition:
+                if not self._schedule:
+                    self._thread = None
+                    return
+
+                due_time, key = self._schedule[0]
+                timeout = due_time - monotonic()
+                if timeout > 0:
+                    self._condition.wait(timeout)
+                    continue
+                heapq.heappop(self._schedule)
+
+            self._submit(key)
+
+
+DEFAULT_DISPATCHER = ObserverDispatcher()
+
+
+class SharedReadError(RuntimeError):
+    """
+    Raised by ReadingHub to callers that joined a read which raised.
+
+    @ivar error: Exception raised by the read
+    """
+    def __init__(self, error):
+        super(SharedReadError, self).__init__("Shared read failed: {0!r}".format(error))
+        self.error = error
+
+
+class ReadingHub(object):
+    """
+    Coalesces concurrent reads of the same source: callers that arrive while a read with an equal key is in flight
+    wait for it and share its result or exception instead of reading the system again.
+    Nothing is kept once a read completes.
+
+    @ivar _flights: Dict of key to [threading.Event, result, exception] of the read in flight
+    """
+    def __init__(self):
+        super(ReadingHub, self).__init__()
+        self._lock = threading.Lock()
+        self._flights = {}
+        self._reads = 0
+        self._shared = 0
+
+    def read(self, key, function, *args):
+        """
+        @param key: Hashable tuple whose first element identifies the source, e.g. (source, method name)
+        @param function: Callable that reads the source
+        @return: Result of function or of the read with equal key already in flight
+        @raise SharedReadError: If the read in flight that was joined raised
+        """
+        return self.join(key, function, *args)[0]
+
+    def join(self, key, function, *args):
+        """
+        Same as read, but tells whether the read was shared: only the caller that did the read
+        should account for its success or failure.
+
+        @return: Tuple (result, whether it's the result of the read of another caller)
+        @raise SharedReadError: If the read in flight that was joined raised
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = [threading.Event(), None, None]
+                self._reads += 1
+                is_shared = False
+            else:
+                self._shared += 1
+                is_shared = True
+
+        if is_shared:
+            flight[0].wait()
+            if flight[2] is not None:
+                raise SharedReadError(flight[2])
+            return flight[1], True
+
+        try:
+            flight[1] = function(*args)
+        except BaseException as e:
+            flight[2] = e
+            raise
+        finally:
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            flight[0].set()
+        return flight[1], False
+
+    def forget(self, source):
+        """
+        Makes subsequent reads of source start anew instead of joining the reads in flight,
+        e.g. when the source is known to have changed.
+
+        @param source: First element of keys
+        """
+        with self._lock:
+            for key in [key for key in self._flights if key[0] == source]:
+                del self._flights[key]
+
+    def get_info(self):
+        """
+        @return: Number of reads of sources, number of reads that were shared and number of reads in flight
+        @rtype: HubInfo
+        """
+        with self._lock:
+            return HubInfo(self._reads, self._shared, len(self._flights))
+
+
+DEFAULT_HUB = ReadingHub()
+
+
 class PowerManagementBase(object):
     """
     Base class for platform dependent PowerManagement functions.
 
-    @ivar _weak_observers: List of weak reference to added observers
+    @ivar _weak_observers: WeakObserverRegistry of added observers
+    @ivar _subscriptions: SubscriptionManager of subscriptions, created by the first subscribe
+    @ivar _diagnostics: RateLimitedWarnings of recurring failures to query the system
     @note: Platform's implementation may provide additional parameters for initialization
+    @cvar SUPPORTS_SMOOTHING: Whether get_time_remaining_estimate accepts the smoothed parameter
+    @ivar dispatcher: ObserverDispatcher that delivers notifications to observers. Shared DEFAULT_DISPATCHER runs them inline
     """
     __metaclass__ = ABCMeta
 
+    SUPPORTS_SMOOTHING = False
+
+    dispatcher = DEFAULT_DISPATCHER
+
     def __init__(self):
         super(PowerManagementBase, self).__init__()
-        self._weak_observers = []
+        self._weak_observers = WeakObserverRegistry()
+        self._subscriptions = None
+        self._diagnostics = RateLimitedWarnings()
+        self._event_pipe = None
+
+    def get_status(self):
+        """
+        Returns the power source type, battery warning level and time remaining estimate at once.
+        Platform implementations override it to gather all values within a single query of the system.
+
+        @rtype: PowerStatus
+        """
+        return PowerStatus(
+            self.get_providing_power_source_type(),
+            self.get_low_battery_warning_level(),
+            self.get_time_remaining_estimate()
+        )
+
+    def get_power_sources(self):
+        """
+        Returns readings of individual power supplies.
+        Platform implementations that can tell supplies apart override it.
+
+        @return: Tuple of PowerSourceInfo, empty if not supported
+        """
+        return ()
+
+    def get_status_and_power_sources(self):
+        """
+        Returns status and readings of individual power supplies at once.
+        Platform implementations override it to read supplies within a single query of the system.
+
+        @return: Tuple (PowerStatus, tuple of PowerSourceInfo)
+        """
+        return self.get_status(), tuple(self.get_power_sources())
 
     @abstractmethod
     def get_providing_power_source_type(self):
@@ -121,7 +779,7 @@ class PowerManagementBase(object):
         """
         if not isinstance(observer, PowerManagementObserver):
             raise TypeError("observer MUST conform to power.PowerManagementObserver")
-        self._weak_observers.append(weakref.ref(observer))
+        self._weak_observers.add(observer)
 
     @abstractmethod
     def remove_observer(self, observer):
@@ -130,17 +788,165 @@ class PowerManagementBase(object):
 
         @param observer: Previously added observer
         """
-        self._weak_observers.remove(weakref.ref(observer))
+        self._weak_observers.remove(observer)
+
+    def subscribe(self, callback, on_time_remaining_below=None, hysteresis=0.0, on_power_type_change=False, on_warning_level_change=False):
+        """
+        Subscribes callback to a specific change of power status. Exactly one kind of change must be specified.
+
+        Threshold subscription fires once when time remaining drops below the threshold
+        and once when it rises back to at least threshold plus hysteresis or AC is attached.
+        Unknown time remaining changes nothing.
+
+        Usage:
+            def on_low(subscription, status):
+                print("below" if subscription.is_below else "recovered", status.time_remaining_estimate)
+
+            subscription = pm.subscribe(on_low, on_time_remaining_below=15, hysteresis=2)
+
+        @param callback: Callable that accepts Subscription and current PowerStatus. Called by the dispatcher
+        @param on_time_remaining_below: Threshold in minutes
+        @param hysteresis: Minutes above threshold that re-arm the threshold subscription
+        @param on_power_type_change: Whether callback is called when power source type changes
+        @param on_warning_level_change: Whether callback is called when low battery warning level changes
+        @return: Subscription that is active until cancelled or garbage collected
+        @rtype: Subscription
+        @raise ValueError: If not exactly one kind of change is specified
+        """
+        kinds = []
+        if on_time_remaining_below is not None:
+            kinds.append(Subscription.TIME_REMAINING_BELOW)
+        if on_power_type_change:
+            kinds.append(Subscription.POWER_TYPE_CHANGE)
+        if on_warning_level_change:
+            kinds.append(Subscription.WARNING_LEVEL_CHANGE)
+        if len(kinds) != 1:
+            raise ValueError("Exactly one of on_time_remaining_below, on_power_type_change and on_warning_level_change must be specified")
+        if hysteresis < 0:
+            raise ValueError("hysteresis must not be negative")
+
+        manager = self._subscriptions
+        if manager is None:
+            manager = SubscriptionManager(self, self.get_status())
+            self.add_observer(manager)
+            self._subscriptions = manager
+
+        subscription = Subscription(manager, callback, kinds[0], on_time_remaining_below, hysteresis)
+        manager.add(subscription)
+        return subscription
+
+    def _remove_subscription_manager(self, manager):
+        """
+        Stops observing on behalf of manager that has no subscriptions left.
+        """
+        if self._subscriptions is manager and not len(manager):
+            self._subscriptions = None
+            self.remove_observer(manager)
+
+    def fileno(self):
+        """
+        Returns file descriptor that becomes readable whenever observers are notified of a change,
+        so notifications can be multiplexed with other descriptors by select, selectors or epoll.
+        Observing starts on the first call. Call drain_events once it's readable and close_events to stop.
+        Platform implementations may return descriptor of their own event source instead,
+        which also becomes readable on events that do not change status: then drain_events returns 0.
+
+        @return: File descriptor
+        @see: EventPipe
+        """
+        if self._event_pipe is None:
+            event_pipe = EventPipe()
+            try:
+                self.add_observer(event_pipe)
+            except:
+                event_pipe.close()
+                raise
+            self._event_pipe = event_pipe
+        return self._event_pipe.fileno()
+
+    def drain_events(self):
+        """
+        Makes fileno not readable until the next change.
+
+        @return: Number of notifications observers received since the last call:
+            one per on_power_sources_change and one per on_time_remaining_change
+        """
+        if self._event_pipe is None:
+            return 0
+        return self._event_pipe.drain()
+
+    def close_events(self):
+        """
+        Stops observing on behalf of fileno and closes its descriptor.
+        """
+        event_pipe, self._event_pipe = self._event_pipe, None
+        if event_pipe is not None:
+            self.remove_observer(event_pipe)
+            event_pipe.close()
 
     def remove_all_observers(self):
         """
         Removes all registered observers.
+        Observers of fileno and subscribe are kept: use close_events and cancel subscriptions to stop them.
         """
-        for weak_observer in self._weak_observers:
+        for weak_observer in list(self._weak_observers):
             observer = weak_observer()
-            if observer:
+            if observer and observer is not self._event_pipe and observer is not self._subscriptions:
                 self.remove_observer(observer)
 
+    def _invalidate_status(self):
+        """
+        Called by notification sources before status is read again in response to a possible change.
+        Subclasses that cache status must drop it.
+        """
+        pass
+
+    def _get_reading_key(self):
+        """
+        Identifies the source of readings for ReadingHub: instances with equal keys read the same values.
+        Implementations whose readings depend on the state of the instance return the instance itself.
+
+        @return: Hashable key
+        """
+        return type(self)
+
+    def _notify_observers(self, previous_status, status, power_sources_changed=False):
+        """
+        Notifies observers about what did change between two statuses.
+        Nothing is posted if statuses are equal, unless power_sources_changed is True.
+
+        @param previous_status: PowerStatus that observers saw last time
+        @param status: Current PowerStatus
+        @param power_sources_changed: Whether power sources are known to be changed, e.g. a supply is plugged in
+        """
+        power_sources_changed, time_remaining_changed = self._get_changes(previous_status, status, power_sources_changed)
+        if not power_sources_changed and not time_remaining_changed:
+            return
+
+        self._dispatch_to_observers(power_sources_changed, time_remaining_changed)
+
+    @staticmethod
+    def _get_changes(previous_status, status, power_sources_changed=False):
+        """
+        @return: Tuple of whether on_power_sources_change and on_time_remaining_change must be called
+        @see: _notify_observers
+        """
+        if previous_status.power_source_type != status.power_source_type or previous_status.low_battery_warning_level != status.low_battery_warning_level:
+            power_sources_changed = True
+        time_remaining_changed = previous_status.time_remaining_estimate != status.time_remaining_estimate
+        return power_sources_changed, time_remaining_changed
+
+    def _dispatch_to_observers(self, power_sources_changed, time_remaining_changed):
+        """
+        Passes notification of every added observer to the dispatcher.
+        @see: ObserverDispatcher.dispatch
+        """
+        dispatcher = self.dispatcher
+        for weak_observer in list(self._weak_observers):
+            observer = weak_observer()
+            if observer:
+                dispatcher.dispatch(self, observer, power_sources_changed, time_remaining_changed)
+
 
 class PowerManagementObserver:
     """
@@ -164,29 +970,322 @@ class PowerManagementObserver:
         pass
 
 
+class Subscription(object):
+    """
+    Subscription to a change of power status returned by PowerManagementBase.subscribe.
+    It's active until cancelled or garbage collected: keep a reference to it.
+
+    @ivar callback: Callable that accepts Subscription and current PowerStatus
+    @ivar kind: One of TIME_REMAINING_BELOW, POWER_TYPE_CHANGE, WARNING_LEVEL_CHANGE
+    @ivar threshold: Minutes of time remaining, for TIME_REMAINING_BELOW
+    @ivar hysteresis: Minutes above threshold time remaining must rise to for TIME_REMAINING_BELOW to be armed again
+    @ivar is_below: Whether time remaining is below threshold, for TIME_REMAINING_BELOW
+
+    @group Kinds: TIME_REMAINING_BELOW, POWER_TYPE_CHANGE, WARNING_LEVEL_CHANGE
+    """
+    __slots__ = ('callback', 'kind', 'threshold', 'hysteresis', 'is_below', '_manager', '_generation', '__weakref__')
+
+    TIME_REMAINING_BELOW = 'time_remaining_below'
+
+    POWER_TYPE_CHANGE = 'power_type_change'
+
+    WARNING_LEVEL_CHANGE = 'warning_level_change'
+
+    def __init__(self, manager, callback, kind, threshold=None, hysteresis=0.0):
+        self.callback = callback
+        self.kind = kind
+        self.threshold = threshold
+        self.hysteresis = hysteresis
+        self.is_below = False
+        self._manager = manager
+        self._generation = 0
+
+    @property
+    def is_active(self):
+        return self._manager is not None
+
+    def cancel(self):
+        """
+        Stops delivering notifications to the callback. Does nothing if already cancelled.
+        """
+        manager, self._manager = self._manager, None
+        if manager is not None:
+            manager.remove(self)
+
+
+class SubscriptionManager(PowerManagementObserver):
+    """
+    Observes PowerManagement on behalf of its subscriptions and evaluates only those affected by a change of status.
+
+    Subscriptions to changes of the power source type and the warning level are kept in WeakObserverRegistry.
+    Threshold subscriptions are kept in two heaps: armed ones by threshold (max-heap)
+    and triggered ones by threshold plus hysteresis (min-heap). A new time remaining pops exactly
+    the subscriptions whose threshold it crossed. Entries of cancelled or collected subscriptions are skipped
+    and heaps are compacted when such entries outnumber live ones.
+
+    @ivar _armed: Heap of tuples (-threshold, sequence number, generation, weak ref to Subscription)
+    @ivar _triggered: Heap of tuples (threshold + hysteresis, sequence number, generation, weak ref to Subscription)
+    """
+    def __init__(self, power_management, status):
+        """
+        @param power_management: PowerManagement that is observed
+        @param status: PowerStatus that subscriptions are initially evaluated against
+        """
+        super(SubscriptionManager, self).__init__()
+        self._weak_power_management = weakref.ref(power_management)
+        self._status = status
+        self._subscriptions = WeakObserverRegistry()
+        self._power_type_subscriptions = WeakObserverRegistry()
+        self._warning_level_subscriptions = WeakObserverRegistry()
+        self._armed = []
+        self._triggered = []
+        self._sequence = itertools.count()
+        self._lock = threading.RLock()
+        self._diagnostics = RateLimitedWarnings()
+
+    def __len__(self):
+        return len(self._subscriptions)
+
+    @staticmethod
+    def _get_time_remaining(status):
+        """
+        @return: Minutes remaining, inf if unlimited or None if unknown
+        """
+        if status.power_source_type == POWER_TYPE_AC or status.time_remaining_estimate == TIME_REMAINING_UNLIMITED:
+            return float('inf')
+        elif status.time_remaining_estimate == TIME_REMAINING_UNKNOWN:
+            return None
+        else:
+            return status.time_remaining_estimate
+
+    def _push(self, subscription):
+        subscription._generation += 1
+        if subscription.is_below:
+            entry = (subscription.threshold + subscription.hysteresis, next(self._sequence), subscription._generation, weakref.ref(subscription))
+            heapq.heappush(self._triggered, entry)
+        else:
+            entry = (-subscription.threshold, next(self._sequence), subscription._generation, weakref.ref(subscription))
+            heapq.heappush(self._armed, entry)
+
+    @staticmethod
+    def _get_valid(entry):
+        subscription = entry[3]()
+        if subscription is not None and subscription.is_active and subscription._generation == entry[2]:
+            return subscription
+        return None
+
+    def _compact(self):
+        live = len(self._subscriptions) - len(self._power_type_subscriptions) - len(self._warning_level_subscriptions)
+        if len(self._armed) + len(self._triggered) > 2 * live + 64:
+            self._armed = [entry for entry in self._armed if self._get_valid(entry) is not None]
+            self._triggered = [entry for entry in self._triggered if self._get_valid(entry) is not None]
+            heapq.heapify(self._armed)
+            heapq.heapify(self._triggered)
+
+    def add(self, subscription):
+        with self._lock:
+            self._subscriptions.add(subscription)
+            if subscription.kind == Subscription.POWER_TYPE_CHANGE:
+                self._power_type_subscriptions.add(subscription)
+            elif subscription.kind == Subscription.WARNING_LEVEL_CHANGE:
+                self._warning_level_subscriptions.add(subscription)
+            else:
+                time_remaining = self._get_time_remaining(self._status)
+                subscription.is_below = time_remaining is not None and time_remaining < subscription.threshold
+                self._compact()
+                self._push(subscription)
+
+    def remove(self, subscription):
+        """
+        Removes subscription and stops observing if it was the last one.
+        """
+        with self._lock:
+            self._subscriptions.remove(subscription)
+            if subscription.kind == Subscription.POWER_TYPE_CHANGE:
+                self._power_type_subscriptions.remove(subscription)
+            elif subscription.kind == Subscription.WARNING_LEVEL_CHANGE:
+                self._warning_level_subscriptions.remove(subscription)
+            is_empty = not len(self._subscriptions)
+
+        power_management = self._weak_power_management()
+        if is_empty and power_management is not None:
+            power_management._remove_subscription_manager(self)
+
+    def update(self, status):
+        """
+        Evaluates subscriptions affected by the change from the previous status and calls their callbacks.
+
+        @param status: Current PowerStatus
+        """
+        with self._lock:
+            previous_status, self._status = self._status, status
+            fired = []
+            if previous_status.power_source_type != status.power_source_type:
+                fired.extend(self._power_type_subscriptions.observers())
+            if previous_status.low_battery_warning_level != status.low_battery_warning_level:
+                fired.extend(self._warning_level_subscriptions.observers())
+
+            time_remaining = self._get_time_remaining(status)
+            if time_remaining is not None:
+                while self._armed and -self._armed[0][0] > time_remaining:
+                    subscription = self._get_valid(heapq.heappop(self._armed))
+                    if subscription is not None:
+                        subscription.is_below = True
+                        self._push(subscription)
+                        fired.append(subscription)
+
+                while self._triggered and self._triggered[0][0] <= time_remaining:
+                    subscription = self._get_valid(heapq.heappop(self._triggered))
+                    if subscription is not None:
+                        subscription.is_below = False
+                        self._push(subscription)
+                        fired.append(subscription)
+
+        for subscription in fired:
+            try:
+                subscription.callback(subscription, status)
+            except Exception:
+                self._diagnostics.warn(subscription.kind, "Callback of {0} subscription raised".format(subscription.kind), exc_info=True)
+
+    def _on_change(self, power_management):
+        try:
+            status = power_management.get_status()
+        except Exception as e:
+            self._diagnostics.warn('get_status', "Unable to get power status: {0}".format(e))
+            return
+
+        self.update(status)
+        if not len(self._subscriptions):
+            power_management._remove_subscription_manager(self)
+
+    def on_power_sources_change(self, power_management):
+        self._on_change(power_management)
+
+    def on_time_remaining_change(self, power_management):
+        self._on_change(power_management)
+
+
+def set_non_blocking(fd):
+    """
+    @param fd: File descriptor to put into the non-blocking mode
+    """
+    if hasattr(os, 'set_blocking'):
+        os.set_blocking(fd, False)
+    else:
+        import fcntl
+        fcntl.fcntl(fd, fcntl.F_SETFL, fcntl.fcntl(fd, fcntl.F_GETFL) | os.O_NONBLOCK)
+
+
+class EventPipe(PowerManagementObserver):
+    """
+    Self-pipe that becomes readable when the PowerManagement it observes notifies observers.
+    Writes never block: if the pipe is full, it's readable anyway and the count of notifications saturates.
+    Notifications after close are ignored, so a late observer callback cannot write into a reused descriptor.
+    """
+    def __init__(self):
+        self._read_fd, self._write_fd = os.pipe()
+        set_non_blocking(self._read_fd)
+        set_non_blocking(self._write_fd)
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def fileno(self):
+        return self._read_fd
+
+    def notify(self):
+        """
+        Makes the pipe readable.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            try:
+                os.write(self._write_fd, b'\0')
+            except (IOError, OSError) as e:
+                if e.errno not in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    raise
+
+    def drain(self):
+        """
+        Reads everything written to the pipe.
+
+        @return: Number of notifications
+        """
+        count = 0
+        with self._lock:
+            if self._closed:
+                return count
+            while True:
+                try:
+                    data = os.read(self._read_fd, 4096)
+                except (IOError, OSError) as e:
+                    if e.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+                        return count
+                    raise
+                if not data:
+                    return count
+                count += len(data)
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            os.close(self._read_fd)
+            os.close(self._write_fd)
+
+    def on_power_sources_change(self, power_management):
+        self.notify()
+
+    def on_time_remaining_change(self, power_management):
+        self.notify()
+
+
 class PowerManagementNoop(PowerManagementBase):
     """
     No-op subclass of PowerManagement.
     It operates like AC is always attached and power sources are never changed.
+    Accepts and ignores parameters of platform implementations and of the fallback wrapper, so it can replace them.
     """
-    def get_providing_power_source_type(self):
+    def __init__(self, *args, **kwargs):
+        super(PowerManagementNoop, self).__init__()
+
+    def get_status(self, max_age=None):
+        """
+        @return: Always AC_POWER_STATUS
+        """
+        return AC_POWER_STATUS
+
+    def get_providing_power_source_type(self, max_age=None):
         """
         @return: Always POWER_TYPE_AC
         """
         return POWER_TYPE_AC
 
-    def get_low_battery_warning_level(self):
+    def get_low_battery_warning_level(self, max_age=None):
         """
         @return: Always LOW_BATTERY_WARNING_NONE
         """
         return LOW_BATTERY_WARNING_NONE
 
-    def get_time_remaining_estimate(self):
+    def get_time_remaining_estimate(self, max_age=None, smoothed=False):
         """
         @return: Always TIME_REMAINING_UNLIMITED
         """
         return TIME_REMAINING_UNLIMITED
 
+    def cache_info(self):
+        """
+        @return: Always CacheInfo with zero hits and misses
+        """
+        return CacheInfo(0, 0, None)
+
+    def diagnostics_info(self):
+        """
+        @return: Always DiagnosticsInfo without failures
+        """
+        return DiagnosticsInfo({}, ())
+
     def add_observer(self, observer):
         """
         Does nothing.
@@ -204,3 +1303,366 @@ class PowerManagementNoop(PowerManagementBase):
         Does nothing.
         """
         pass
+
+
+class EventSocketListener(object):
+    """
+    Manages thread that receives messages from a socket and forwards events of interest to added observers.
+    Thread is automatically spawned when first observer is added and stopped when last observer is removed.
+    Does not keep strong references to observers.
+
+    Subclasses implement get_event and notify_observer.
+    Errors of observers are reported through RateLimitedWarnings and do not stop the thread.
+
+    @ivar _socket_factory: Callable that returns socket-like object (fileno, recv, close)
+    """
+    MESSAGE_SIZE = 65536
+
+    THREAD_NAME = None
+
+    RECONNECT_INTERVAL = 1.0
+
+    MAX_RECONNECT_INTERVAL = 60.0
+
+    def __init__(self, socket_factory):
+        super(EventSocketListener, self).__init__()
+        self._socket_factory = socket_factory
+        self._weak_observers = WeakObserverRegistry()
+        self._thread = None
+        self._wakeup_fds = None
+        self._lock = threading.RLock()
+        self._diagnostics = RateLimitedWarnings()
+
+    def get_event(self, message):
+        """
+        @param message: Message received from the socket
+        @return: Event passed to observers or None if message must be ignored
+        """
+        raise NotImplementedError()
+
+    def notify_observer(self, observer, event):
+        """
+        Forwards event to observer.
+        """
+        raise NotImplementedError()
+
+    def get_lost_event(self):
+        """
+        @return: Event passed to observers when messages were lost, e.g. the socket overflowed or was created again
+        """
+        return {}
+
+    def create_socket(self):
+        """
+        @return: New socket-like object of the listener, e.g. to receive messages without the thread
+        """
+        return self._socket_factory()
+
+    def receive_events(self, event_socket):
+        """
+        Receives all messages pending on the non-blocking socket without the thread.
+        If the socket dropped messages due to overflow of its buffer, the event of get_lost_event is reported instead.
+
+        @param event_socket: Socket returned by create_socket
+        @return: List of events of interest
+        """
+        events = []
+        while True:
+            try:
+                message = event_socket.recv(self.MESSAGE_SIZE)
+            except (IOError, OSError) as e:
+                if e.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    return events
+                elif e.errno == getattr(errno, 'ENOBUFS', None):
+                    events.append(self.get_lost_event())
+                    continue
+                raise
+            if not message:
+                return events
+
+            event = self.get_event(message)
+            if event is not None:
+                events.append(event)
+
+    def start_thread(self):
+        """Creates socket and spawns thread to receive messages."""
+        if self._thread is not None:
+            return
+        event_socket = self._socket_factory()
+        self._wakeup_fds = os.pipe()
+        self._thread = threading.Thread(target=self.run_events_thread, args=(event_socket, self._wakeup_fds[0]), name=self.THREAD_NAME)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop_thread(self):
+        """
+        Wakes spawned thread up.
+
+        @return: Stopped thread or None
+        """
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            wakeup_read_fd, wakeup_write_fd = self._wakeup_fds
+            self._wakeup_fds = None
+            os.write(wakeup_write_fd, b'\0')
+            os.close(wakeup_write_fd)
+        return thread
+
+    def run_events_thread(self, event_socket, wakeup_fd):
+        """
+        Main method of the spawned thread. Receives messages until woken up through wakeup_fd.
+
+        If the socket overflows, fails or is closed by the peer, observers receive the event of get_lost_event.
+        Failed or closed socket is created again, waiting twice as long after each unsuccessful attempt
+        starting from RECONNECT_INTERVAL up to MAX_RECONNECT_INTERVAL.
+        """
+        reconnect_interval = self.RECONNECT_INTERVAL
+        try:
+            while True:
+                if event_socket is None:
+                    if select.select([wakeup_fd], [], [], reconnect_interval)[0]:
+                        break
+                    try:
+                        event_socket = self._socket_factory()
+                    except Exception:
+                        self._diagnostics.warn('reconnect', "Unable to create socket of events", exc_info=True)
+                        reconnect_interval = min(reconnect_interval * 2, self.MAX_RECONNECT_INTERVAL)
+                        continue
+                    reconnect_interval = self.RECONNECT_INTERVAL
+                    self._notify_observers(self.get_lost_event())
+                    continue
+
+                try:
+                    readable = select.select([event_socket, wakeup_fd], [], [])[0]
+                    if wakeup_fd in readable:
+                        break
+                    message = event_socket.recv(self.MESSAGE_SIZE)
+                except (IOError, OSError, select.error, ValueError) as e:
+                    error = getattr(e, 'errno', None) or (e.args[0] if e.args else None)
+                    if error in (errno.EAGAIN, errno.EWOULDBLOCK, errno.EINTR):
+                        continue
+                    elif error == getattr(errno, 'ENOBUFS', None):
+                        self._notify_observers(self.get_lost_event())
+                        continue
+                    self._diagnostics.warn('receive', "Unable to receive events, creating socket again", exc_info=True)
+                    message = None
+
+                if not message:
+                    event_socket.close()
+                    event_socket = None
+                    self._notify_observers(self.get_lost_event())
+                    continue
+
+                event = self.get_event(message)
+                if event is not None:
+                    self._notify_observers(event)
+        finally:
+            if event_socket is not None:
+                event_socket.close()
+            os.close(wakeup_fd)
+
+    def _notify_observers(self, event):
+        with self._lock:
+            weak_observers = list(self._weak_observers)
+
+        for weak_observer in weak_observers:
+            observer = weak_observer()
+            if observer:
+                try:
+                    self.notify_observer(observer, event)
+                except Exception:
+                    self._diagnostics.warn(('notify', type(observer)), "Unable to notify {0!r}".format(observer), exc_info=True)
+
+    def add_observer(self, observer):
+        """
+        Adds weak ref to an observer.
+
+        @param observer: Instance of class that accepts events of the listener
+        """
+        with self._lock:
+            if len(self._weak_observers) == 0:
+                self.start_thread()
+            self._weak_observers.add(observer)
+
+    def remove_observer(self, observer):
+        """
+        Removes an observer.
+
+        @param observer: Previously added observer
+        """
+        with self._lock:
+            self._weak_observers.remove(observer)
+            thread = self.stop_thread() if len(self._weak_observers) == 0 else None
+
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+
+class PowerManagementPoller(object):
+    """
+    Manages thread that periodically polls status of added PowerManagement instances
+    and notifies their observers only when status did change.
+    Thread is automatically spawned when first instance is added and stopped when last instance is removed.
+    Does not keep strong references to added instances.
+
+    Failures to poll or to notify are reported through RateLimitedWarnings and do not stop the thread.
+
+    Polling interval of each instance adapts to its last status:
+        - ac_interval if AC is online
+        - battery_interval if battery is discharging
+        - early_interval if time remaining is no more than early_time_remaining minutes or warning level is EARLY
+        - final_interval if warning level is FINAL or status did change on the last poll
+
+    @ivar _entries: Dict of id of PowerManagement to list [weak ref to PowerManagement, last status, next poll time]
+    """
+    def __init__(self, ac_interval=10.0, battery_interval=5.0, early_interval=2.0, final_interval=1.0, early_time_remaining=30.0):
+        super(PowerManagementPoller, self).__init__()
+        self.ac_interval = ac_interval
+        self.battery_interval = battery_interval
+        self.early_interval = early_interval
+        self.final_interval = final_interval
+        self.early_time_remaining = early_time_remaining
+        self._entries = {}
+        self._thread = None
+        self._condition = threading.Condition()
+        self._diagnostics = RateLimitedWarnings()
+
+    def get_interval(self, status, did_change=False):
+        """
+        @param status: Last polled PowerStatus
+        @param did_change: Whether status did change since previous poll
+        @return: Seconds until the next poll
+        """
+        if did_change or status.low_battery_warning_level == LOW_BATTERY_WARNING_FINAL:
+            return self.final_interval
+        elif status.low_battery_warning_level == LOW_BATTERY_WARNING_EARLY:
+            return self.early_interval
+        elif status.power_source_type == POWER_TYPE_AC:
+            return self.ac_interval
+        elif 0.0 <= status.time_remaining_estimate <= self.early_time_remaining:
+            return self.early_interval
+        else:
+            return self.battery_interval
+
+    def start_thread(self):
+        """Spawns thread to poll added instances."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self.run_polling_thread, name='power.common.PowerManagementPoller')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop_thread(self):
+        """
+        Wakes spawned thread up so it exits as there is nothing to poll.
+
+        @return: Stopped thread or None
+        """
+        thread, self._thread = self._thread, None
+        self._condition.notify_all()
+        return thread
+
+    def run_polling_thread(self):
+        """Main method of the spawned thread. Polls instances when they're due until there is nothing to poll."""
+        thread = threading.current_thread()
+        while True:
+            with self._condition:
+                if self._thread is not thread:
+                    break
+
+                now = monotonic()
+                due = [(key, entry[0]) for key, entry in self._entries.items() if entry[2] <= now]
+                if not due:
+                    self._condition.wait(min(entry[2] for entry in self._entries.values()) - now)
+                    continue
+
+            for key, weak_power_management in due:
+                power_management = weak_power_management()
+                if power_management is None:
+                    with self._condition:
+                        if key in self._entries and self._entries[key][0] is weak_power_management:
+                            del self._entries[key]
+                            if len(self._entries) == 0:
+                                self.stop_thread()
+                    continue
+
+                try:
+                    power_management._invalidate_status()
+                    status = power_management.get_status()
+                except Exception:
+                    self._diagnostics.warn(('poll', type(power_management)), "Unable to get power status", exc_info=True)
+                    status = None
+
+                with self._condition:
+                    entry = self._entries.get(key)
+                    if entry is None or entry[0] is not weak_power_management:
+                        continue
+                    previous_status = entry[1]
+                    if status is not None:
+                        entry[1] = status
+                    entry[2] = monotonic() + self.get_interval(entry[1], status is not None and status != previous_status)
+
+                if status is not None:
+                    try:
+                        power_management._notify_observers(previous_status, status)
+                    except Exception:
+                        self._diagnostics.warn(('notify', type(power_management)), "Unable to notify observers", exc_info=True)
+
+    def add_observer(self, power_management):
+        """
+        Starts polling status of PowerManagement.
+
+        @param power_management: Instance of PowerManagementBase
+        """
+        status = power_management.get_status()
+        with self._condition:
+            self._entries[id(power_management)] = [weakref.ref(power_management), status, monotonic() + self.get_interval(status)]
+            self.start_thread()
+            self._condition.notify_all()
+
+    def remove_observer(self, power_management):
+        """
+        Stops polling status of PowerManagement.
+
+        @param power_management: Previously added instance of PowerManagementBase
+        """
+        with self._condition:
+            self._entries.pop(id(power_management), None)
+            thread = self.stop_thread() if len(self._entries) == 0 else None
+
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+
+DEFAULT_POLLER = PowerManagementPoller()
+
+
+class PollingObserverMixin(object):
+    """
+    Implements observing for platforms without power notifications by polling the status with the poller.
+    Must precede PowerManagementBase in the list of bases.
+
+    @cvar poller: PowerManagementPoller shared by all instances
+    """
+    poller = DEFAULT_POLLER
+
+    def add_observer(self, observer):
+        """
+        Starts polling when first observer is added.
+        @see: PowerManagementPoller
+        """
+        super(PollingObserverMixin, self).add_observer(observer)
+        if len(self._weak_observers) == 1:
+            try:
+                self.poller.add_observer(self)
+            except:
+                super(PollingObserverMixin, self).remove_observer(observer)
+                raise
+
+    def remove_observer(self, observer):
+        """
+        Stops polling when last observer is removed.
+        """
+        super(PollingObserverMixin, self).remove_observer(observer)
+        if len(self._weak_observers) == 0:
+            self.poller.remove_observer(self)
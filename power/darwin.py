@@ -4,7 +4,6 @@ Implements PowerManagement functions using IOPowerSources.
 Requires Mac OS X 10.6+
 See doc/darwin for platform-specific details.
 """
-import weakref
 import warnings
 import objc
 from Foundation import *
@@ -168,7 +167,7 @@ class PowerSourcesNotificationsObserver(NSObject):
     def init(self):
         self = objc.super(PowerSourcesNotificationsObserver, self).init()
         if self is not None:
-            self._weak_observers = []
+            self._weak_observers = common.WeakObserverRegistry()
             self._thread = None
             self._lock = objc.object_lock(self)
         return self
@@ -219,7 +218,7 @@ class PowerSourcesNotificationsObserver(NSObject):
         @param observer: Instance of class that implements on_power_source_notification()
         """
         with self._lock:
-            self._weak_observers.append(weakref.ref(observer))
+            self._weak_observers.add(observer)
             if len(self._weak_observers) == 1:
                 self.startThread()
 
@@ -230,7 +229,7 @@ class PowerSourcesNotificationsObserver(NSObject):
         @param observer: Previously added observer
         """
         with self._lock:
-            self._weak_observers.remove(weakref.ref(observer))
+            self._weak_observers.remove(observer)
             if len(self._weak_observers) == 0:
                 self.stopThread()
 
@@ -244,16 +243,23 @@ class PowerManagement(common.PowerManagementBase):
         """
         super(PowerManagement, self).__init__()
         self._cf_run_loop = cf_run_loop
+        self._source = None
 
     def on_power_source_notification(self):
         """
         Called in response to IOPSNotificationCreateRunLoopSource() event.
         """
-        for weak_observer in self._weak_observers:
-            observer = weak_observer()
-            if observer:
-                observer.on_power_sources_change(self)
-                observer.on_time_remaining_change(self)
+        self._invalidate_status()
+        self._dispatch_to_observers(True, True)
+
+    def get_status(self):
+        """
+        Copies IOPSCopyPowerSourcesInfo once and derives power source type and time remaining estimate from it.
+        """
+        blob = IOPSCopyPowerSourcesInfo()
+        type = POWER_TYPE_MAP[IOPSGetProvidingPowerSourceType(blob)]
+        warning_level = WARNING_LEVEL_MAP[IOPSGetBatteryWarningLevel()]
+        return common.PowerStatus(type, warning_level, self._get_time_remaining_estimate(blob, type))
 
     def get_providing_power_source_type(self):
         """
@@ -281,6 +287,19 @@ class PowerManagement(common.PowerManagementBase):
         Otherwise looks through all power sources returned by IOPSGetProvidingPowerSourceType
         and returns total estimate.
         """
+        if IOPSGetTimeRemainingEstimate is not None: # Mac OS X 10.7+
+            return self._get_time_remaining_estimate(None, None)
+        else: # Mac OS X 10.6
+            blob = IOPSCopyPowerSourcesInfo()
+            type = POWER_TYPE_MAP[IOPSGetProvidingPowerSourceType(blob)]
+            return self._get_time_remaining_estimate(blob, type)
+
+    def _get_time_remaining_estimate(self, blob, type):
+        """
+        @param blob: Result of IOPSCopyPowerSourcesInfo. Used only in Mac OS X 10.6
+        @param type: Providing power source type. Used only in Mac OS X 10.6
+        @see: get_time_remaining_estimate
+        """
         if IOPSGetTimeRemainingEstimate is not None: # Mac OS X 10.7+
             estimate = float(IOPSGetTimeRemainingEstimate())
             if estimate == -1.0:
@@ -291,8 +310,6 @@ class PowerManagement(common.PowerManagementBase):
                 return estimate / 60.0
         else: # Mac OS X 10.6
             warnings.warn("IOPSGetTimeRemainingEstimate is not preset", RuntimeWarning)
-            blob = IOPSCopyPowerSourcesInfo()
-            type = IOPSGetProvidingPowerSourceType(blob)
             if type == common.POWER_TYPE_AC:
                 return common.TIME_REMAINING_UNLIMITED
             else:
@@ -315,7 +332,7 @@ class PowerManagement(common.PowerManagementBase):
         if len(self._weak_observers) == 1:
             if not self._cf_run_loop:
                 PowerManagement.notifications_observer.addObserver_(self)
-            else:
+            elif self._source is None:
                 @objc.callbackFor(IOPSNotificationCreateRunLoopSource)
                 def on_power_sources_change(context):
                     self.on_power_source_notification()
@@ -0,0 +1,287 @@
+# coding=utf-8
+"""
+Exposes power status as Prometheus metrics over HTTP.
+
+Status is collected by a background thread every interval seconds and rendered once per collection:
+scrapes are served from that snapshot, so any number of concurrent scrapers never adds backend I/O.
+
+Usage:
+    python -m power.exporter --port 9596 --interval 5
+
+    from power.exporter import Collector, serve
+    collector = Collector(interval=10.0)
+    collector.start()
+    serve(collector, ('127.0.0.1', 9596))
+"""
+from __future__ import print_function
+
+import argparse
+import math
+import threading
+import time
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+
+import power
+from power import common
+from power.common import POWER_SOURCE_TYPE_NAMES
+
+
+__all__ = [
+    'Collector',
+    'MetricsServer',
+    'render_metrics',
+    'serve'
+    ]
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+DEFAULT_PORT = 9596
+
+
+# Units of power_now by units of energy of PowerSourceInfo
+RATE_UNITS = {
+    'uWh': 'uW',
+    'uAh': 'uA',
+}
+
+
+def escape_label_value(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_value(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return 'NaN'
+    elif value == float('inf'):
+        return '+Inf'
+    elif value == float('-inf'):
+        return '-Inf'
+    elif isinstance(value, float):
+        return repr(value)
+    else:
+        return str(int(value))
+
+
+def get_supply_labels(power_source, attribute):
+    """
+    @param power_source: PowerSourceInfo
+    @param attribute: Name of the exported attribute
+    @return: Tuple of label pairs: supply and the unit of energy or power if it's known
+    """
+    labels = (('supply', power_source.name),)
+    energy_unit = power_source.energy_unit
+    if energy_unit is not None:
+        if attribute in ('energy_now', 'energy_full'):
+            labels += (('unit', energy_unit),)
+        elif attribute == 'power_now':
+            labels += (('unit', RATE_UNITS.get(energy_unit, energy_unit + '/h')),)
+    return labels
+
+
+def render_metrics(status, power_sources, stats):
+    """
+    Renders metrics in the Prometheus text exposition format.
+
+    @param status: PowerStatus or None if it was never collected
+    @param power_sources: Iterable of PowerSourceInfo
+    @param stats: Dict with collections, errors, duration and last_success of the collector
+    @return: Text of metrics
+    """
+    lines = []
+
+    def add(name, type, help, samples):
+        lines.append('# HELP {0} {1}'.format(name, help))
+        lines.append('# TYPE {0} {1}'.format(name, type))
+        for labels, value in samples:
+            if labels:
+                labels = '{' + ','.join('{0}="{1}"'.format(k, escape_label_value(v)) for k, v in labels) + '}'
+            lines.append('{0}{1} {2}'.format(name, labels or '', format_value(value)))
+
+    if status is not None:
+        add('power_source', 'gauge', "Whether the system is powered by the source of the type.",
+            [((('type', name),), 1 if type == status.power_source_type else 0) for type, name in sorted(POWER_SOURCE_TYPE_NAMES.items())])
+        add('power_low_battery_warning_level', 'gauge', "Low battery warning level: 1 none, 2 early (22%), 3 final (10 minutes).",
+            [((), status.low_battery_warning_level)])
+
+        time_remaining = status.time_remaining_estimate
+        if time_remaining == common.TIME_REMAINING_UNLIMITED:
+            time_remaining = float('inf')
+        elif time_remaining == common.TIME_REMAINING_UNKNOWN:
+            time_remaining = float('nan')
+        add('power_time_remaining_minutes', 'gauge', "Estimated minutes of battery time remaining, +Inf on AC, NaN if unknown.",
+            [((), time_remaining)])
+
+    power_sources = list(power_sources)
+    if power_sources:
+        add('power_supply_online', 'gauge', "Whether AC adapter is online or battery is present.",
+            [((('supply', i.name), ('type', POWER_SOURCE_TYPE_NAMES.get(i.type, 'unknown'))), 1 if i.is_online else 0) for i in power_sources])
+        batteries = [i for i in power_sources if i.type == common.POWER_TYPE_BATTERY]
+        add('power_supply_discharging', 'gauge', "Whether battery is discharging.",
+            [((('supply', i.name),), 1 if i.is_discharging else 0) for i in batteries])
+        for attribute, help in (
+            ('energy_now', "Current energy or charge of battery in the unit label, e.g. uWh or uAh, or in units of the platform."),
+            ('energy_full', "Full energy or charge of battery in the unit label, e.g. uWh or uAh, or in units of the platform."),
+            ('power_now', "Current power or current of battery in the unit label, e.g. uW or uA, or in units of the platform."),
+            ('voltage_now', "Current voltage of battery in units of the platform, e.g. uV."),
+            ('capacity', "Percentage of charge of battery reported by the platform."),
+        ):
+            add('power_supply_' + attribute, 'gauge', help,
+                [(get_supply_labels(i, attribute), getattr(i, attribute)) for i in batteries if getattr(i, attribute) is not None])
+
+    add('power_exporter_collections_total', 'counter', "Number of collections.", [((), stats['collections'])])
+    add('power_exporter_collection_errors_total', 'counter', "Number of collections that failed.", [((), stats['errors'])])
+    add('power_exporter_collection_duration_seconds', 'gauge', "Duration of the last collection.", [((), stats['duration'])])
+    add('power_exporter_last_success_timestamp_seconds', 'gauge', "Unix time of the last successful collection.", [((), stats['last_success'])])
+    lines.append('')
+    return '\n'.join(lines)
+
+
+class Collector(object):
+    """
+    Periodically collects status and readings of power supplies and renders them as metrics.
+    Values of the last successful collection are kept when collection fails.
+    """
+    def __init__(self, power_management=None, interval=5.0):
+        """
+        @param power_management: Instance of PowerManagement. By default new power.PowerManagement is created
+            with raise_errors, so that failed collections are counted instead of rendering its fallback
+        @param interval: Seconds between collections
+        """
+        super(Collector, self).__init__()
+        self.power_management = power_management if power_management is not None else power.PowerManagement(raise_errors=True)
+        self.interval = interval
+        self._status = None
+        self._power_sources = ()
+        self._stats = {'collections': 0, 'errors': 0, 'duration': None, 'last_success': None}
+        self._metrics = render_metrics(None, (), self._stats).encode('utf-8')
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._diagnostics = common.RateLimitedWarnings()
+
+    @property
+    def metrics(self):
+        """Rendered metrics of the last collection as bytes."""
+        with self._lock:
+            return self._metrics
+
+    def collect(self):
+        """
+        Reads status and power supplies in one query and renders metrics.
+        """
+        start = common.monotonic()
+        try:
+            status, power_sources = self.power_management.get_status_and_power_sources()
+        except Exception:
+            status = power_sources = None
+            self._diagnostics.warn('collect', "Unable to collect power status", exc_info=True)
+        duration = common.monotonic() - start
+
+        with self._lock:
+            stats = self._stats
+            stats['collections'] += 1
+            stats['duration'] = duration
+            if status is None:
+                stats['errors'] += 1
+            else:
+                self._status, self._power_sources = status, power_sources
+                stats['last_success'] = time.time()
+            self._metrics = render_metrics(self._status, self._power_sources, stats).encode('utf-8')
+
+    def start(self):
+        """
+        Collects once and spawns thread that collects every interval seconds.
+        """
+        if self._thread is not None:
+            return
+        self.collect()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self.run_collecting_thread, name='power.exporter.Collector')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops spawned thread.
+        """
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop_event.set()
+            thread.join()
+
+    def run_collecting_thread(self):
+        """Main method of the spawned thread."""
+        while not self._stop_event.wait(self.interval):
+            self.collect()
+
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    """
+    Serves metrics of server.collector at /metrics.
+    """
+    def do_GET(self):
+        if self.path.split('?', 1)[0] not in ('/metrics', '/'):
+            self.send_error(404)
+            return
+
+        body = self.server.collector.metrics
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MetricsServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, collector):
+        """
+        @param address: Tuple (host, port) to listen on
+        @param collector: Collector whose metrics are served
+        """
+        HTTPServer.__init__(self, address, MetricsRequestHandler)
+        self.collector = collector
+
+
+def serve(collector, address=('127.0.0.1', DEFAULT_PORT)):
+    """
+    Serves metrics of collector until interrupted.
+    """
+    server = MetricsServer(address, collector)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exposes power status as Prometheus metrics.")
+    parser.add_argument('--host', default='127.0.0.1', help="Address to listen on")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help="Port to listen on")
+    parser.add_argument('--interval', type=float, default=5.0, help="Seconds between collections")
+    args = parser.parse_args(argv)
+
+    collector = Collector(interval=args.interval)
+    collector.start()
+    print("Serving metrics at http://{0}:{1}/metrics".format(args.host, args.port))
+    try:
+        serve(collector, (args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        collector.stop()
+
+
+if __name__ == '__main__':
+    main()
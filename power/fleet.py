@@ -0,0 +1,194 @@
+# coding=utf-8
+"""
+Aggregates power status of many hosts at once, e.g. in a central collector of readings.
+
+Readings are passed as columns: i-th element of each column describes i-th battery.
+Batteries are grouped into hosts by the optional hosts column, otherwise each battery is a host on its own.
+Per-host status is calculated by the same rules as common.get_batteries_status
+with AC adapter online taking precedence like in platform implementations.
+
+Uses NumPy to process all hosts in a single vectorized pass if it's available and falls back to pure Python otherwise.
+
+Usage:
+    from power.fleet import get_fleet_status, summarize
+
+    status = get_fleet_status(energy_full, energy_now, power_now, ac_online, discharging, hosts=host_indexes)
+    print(status.low_battery_warning_level[host_index])
+    print(summarize(status))
+"""
+from collections import namedtuple
+import warnings
+
+from power import common
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+__all__ = [
+    'FleetStatus',
+    'FleetSummary',
+    'get_fleet_status',
+    'summarize'
+    ]
+
+
+FleetStatus = namedtuple('FleetStatus', ['power_source_type', 'low_battery_warning_level', 'time_remaining_estimate', 'percentage'])
+
+
+FleetSummary = namedtuple('FleetSummary', ['hosts', 'on_ac', 'on_battery', 'warning_early', 'warning_final', 'min_time_remaining_estimate'])
+
+
+def get_fleet_status(energy_full, energy_now, power_now, ac_online, discharging, hosts=None, host_count=None, use_numpy=None):
+    """
+    Calculates power status of each host.
+
+    @param energy_full: Column of full energy of batteries
+    @param energy_now: Column of current energy of batteries. Same units as energy_full
+    @param power_now: Column of current power of batteries. Same units as energy, e.g. uW for uWh
+    @param ac_online: Column of whether host of the battery has an AC adapter online
+    @param discharging: Column of whether battery is discharging
+    @param hosts: Column of indexes of hosts of batteries. By default i-th battery belongs to i-th host
+    @param host_count: Number of hosts. By default the largest index of a host plus one
+    @param use_numpy: Whether NumPy must be used. By default it's used if available
+
+    @return: Columns of power_source_type, low_battery_warning_level, time_remaining_estimate and percentage
+        of each host. NumPy arrays if NumPy is used, lists otherwise.
+        Percentage of a host that has no batteries is 100.0
+    @rtype: FleetStatus
+    @raise ImportError: If use_numpy is True, but NumPy is not available
+    """
+    if use_numpy is None:
+        use_numpy = numpy is not None
+    elif use_numpy and numpy is None:
+        raise ImportError("NumPy is not available.")
+
+    if use_numpy:
+        return _get_fleet_status_numpy(energy_full, energy_now, power_now, ac_online, discharging, hosts, host_count)
+    else:
+        return _get_fleet_status_python(energy_full, energy_now, power_now, ac_online, discharging, hosts, host_count)
+
+
+def _get_fleet_status_python(energy_full, energy_now, power_now, ac_online, discharging, hosts, host_count):
+    if hosts is None:
+        hosts = range(len(energy_full))
+    if host_count is None:
+        host_count = max(hosts) + 1 if len(hosts) else 0
+
+    batteries = [[] for _ in range(host_count)]
+    is_ac_online = [False] * host_count
+    for host, full, now, power, is_online, is_discharging in zip(hosts, energy_full, energy_now, power_now, ac_online, discharging):
+        batteries[host].append((float(full), float(now), float(power), bool(is_discharging)))
+        is_ac_online[host] = is_ac_online[host] or bool(is_online)
+
+    status = FleetStatus([], [], [], [])
+    for host_batteries, is_online in zip(batteries, is_ac_online):
+        all_energy_full = sum(battery[0] for battery in host_batteries)
+        all_energy_now = sum(battery[1] for battery in host_batteries)
+        percentage = all_energy_now / all_energy_full * 100.0 if all_energy_full else 100.0
+        host_status = common.AC_POWER_STATUS if is_online else common.get_batteries_status(host_batteries)
+        status.power_source_type.append(host_status.power_source_type)
+        status.low_battery_warning_level.append(host_status.low_battery_warning_level)
+        status.time_remaining_estimate.append(host_status.time_remaining_estimate)
+        status.percentage.append(percentage)
+    return status
+
+
+def _get_fleet_status_numpy(energy_full, energy_now, power_now, ac_online, discharging, hosts, host_count):
+    energy_full = numpy.asarray(energy_full, dtype=numpy.float64)
+    energy_now = numpy.asarray(energy_now, dtype=numpy.float64)
+    power_now = numpy.asarray(power_now, dtype=numpy.float64)
+    ac_online = numpy.asarray(ac_online, dtype=bool)
+    discharging = numpy.asarray(discharging, dtype=bool)
+    if hosts is None:
+        hosts = numpy.arange(len(energy_full))
+    else:
+        hosts = numpy.asarray(hosts, dtype=numpy.intp)
+    if host_count is None:
+        host_count = int(hosts.max()) + 1 if len(hosts) else 0
+
+    def total(column):
+        return numpy.bincount(hosts, weights=column, minlength=host_count)
+
+    all_energy_full = total(energy_full)
+    all_energy_now = total(energy_now)
+    is_ac_online = total(ac_online) > 0
+    discharging_count = total(discharging)
+
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        # Division by zero makes common.get_batteries_status fall back to TIME_REMAINING_UNKNOWN for the whole host
+        average_power_now = total(numpy.where(discharging, power_now, 0.0)) / discharging_count
+        time_remaining = total(numpy.where(discharging, energy_now / power_now * 60.0, 0.0))\
+            + total(numpy.where(discharging, 0.0, energy_now)) / average_power_now * 60.0
+        is_time_unknown = (total(discharging & (power_now == 0.0)) > 0) | (average_power_now == 0.0)
+        time_remaining = numpy.where(is_time_unknown, common.TIME_REMAINING_UNKNOWN, time_remaining)
+        percentage = numpy.where(all_energy_full == 0.0, 100.0, all_energy_now / all_energy_full * 100.0)
+
+    is_on_battery = ~is_ac_online & (discharging_count > 0)
+    if numpy.any(is_on_battery & is_time_unknown):
+        warnings.warn("Unable to calculate time remaining estimate of {0} hosts: division by zero".format(
+            int(numpy.count_nonzero(is_on_battery & is_time_unknown))), category=RuntimeWarning)
+
+    low_battery_warning_level = numpy.where(
+        (time_remaining != common.TIME_REMAINING_UNKNOWN) & (time_remaining <= common.LOW_BATTERY_WARNING_FINAL_TIME_REMAINING),
+        common.LOW_BATTERY_WARNING_FINAL,
+        numpy.where(percentage <= common.LOW_BATTERY_WARNING_EARLY_PERCENTAGE, common.LOW_BATTERY_WARNING_EARLY, common.LOW_BATTERY_WARNING_NONE)
+    )
+
+    return FleetStatus(
+        numpy.where(is_on_battery, common.POWER_TYPE_BATTERY, common.POWER_TYPE_AC),
+        numpy.where(is_on_battery, low_battery_warning_level, common.LOW_BATTERY_WARNING_NONE),
+        numpy.where(is_on_battery, time_remaining, numpy.where(is_ac_online, common.TIME_REMAINING_UNLIMITED, common.TIME_REMAINING_UNKNOWN)),
+        percentage
+    )
+
+
+def summarize(status):
+    """
+    Summarizes power status of the fleet.
+
+    @param status: Power status of hosts as returned by get_fleet_status
+    @type status: FleetStatus
+    @return: Number of hosts, number of hosts on AC, on battery, with early and final warning levels
+        and the lowest known time remaining estimate across hosts on battery.
+        TIME_REMAINING_UNLIMITED if no host is on battery, TIME_REMAINING_UNKNOWN if no estimate is known.
+    @rtype: FleetSummary
+    """
+    if numpy is not None and isinstance(status.power_source_type, numpy.ndarray):
+        power_source_type = status.power_source_type
+        low_battery_warning_level = status.low_battery_warning_level
+        on_battery = int(numpy.count_nonzero(power_source_type == common.POWER_TYPE_BATTERY))
+        known_time_remaining = status.time_remaining_estimate[
+            (power_source_type == common.POWER_TYPE_BATTERY) & (status.time_remaining_estimate != common.TIME_REMAINING_UNKNOWN)]
+        return FleetSummary(
+            len(power_source_type),
+            len(power_source_type) - on_battery,
+            on_battery,
+            int(numpy.count_nonzero(low_battery_warning_level == common.LOW_BATTERY_WARNING_EARLY)),
+            int(numpy.count_nonzero(low_battery_warning_level == common.LOW_BATTERY_WARNING_FINAL)),
+            _get_min_time_remaining(on_battery, known_time_remaining.min() if len(known_time_remaining) else None)
+        )
+
+    on_battery = status.power_source_type.count(common.POWER_TYPE_BATTERY)
+    known_time_remaining = [
+        time_remaining for power_source_type, time_remaining in zip(status.power_source_type, status.time_remaining_estimate)
+        if power_source_type == common.POWER_TYPE_BATTERY and time_remaining != common.TIME_REMAINING_UNKNOWN]
+    return FleetSummary(
+        len(status.power_source_type),
+        len(status.power_source_type) - on_battery,
+        on_battery,
+        status.low_battery_warning_level.count(common.LOW_BATTERY_WARNING_EARLY),
+        status.low_battery_warning_level.count(common.LOW_BATTERY_WARNING_FINAL),
+        _get_min_time_remaining(on_battery, min(known_time_remaining) if known_time_remaining else None)
+    )
+
+
+def _get_min_time_remaining(on_battery, min_time_remaining):
+    if not on_battery:
+        return common.TIME_REMAINING_UNLIMITED
+    elif min_time_remaining is None:
+        return common.TIME_REMAINING_UNKNOWN
+    else:
+        return float(min_time_remaining)
@@ -1,172 +1,354 @@
 # coding=utf-8
 """
-Implements PowerManagement functions using FreeBSD SYSCTL mechanism. 
+Implements PowerManagement functions using FreeBSD SYSCTL mechanism.
 FreeBSD portion written by Tomasz CEDRO (http://www.tomek.cedro.info)
+
+All OIDs needed for a status are queried at once through SysctlProvider.
+Changes are observed through ACPI notifications published by devd(8), or by polling if devd is not available.
 """
-import os
+import socket
+import subprocess
 import warnings
 from power import common
-import subprocess
+
+
+SYSCTL_PATH = '/sbin/sysctl'
+
+
+ACLINE_OID = 'hw.acpi.acline'
+
+BATTERY_LIFE_OID = 'hw.acpi.battery.life'
+
+BATTERY_TIME_OID = 'hw.acpi.battery.time'
+
+BATTERY_STATE_OID = 'hw.acpi.battery.state'
+
+BATTERY_UNITS_OID = 'hw.acpi.battery.units'
+
+STATUS_OIDS = (ACLINE_OID, BATTERY_LIFE_OID, BATTERY_TIME_OID, BATTERY_STATE_OID, BATTERY_UNITS_OID)
+
+
+# Flags of hw.acpi.battery.state, see acpiio.h
+ACPI_BATT_STAT_DISCHARG = 0x0001
+
+ACPI_BATT_STAT_NOT_PRESENT = 0x0007
+
+
+class SysctlProvider(object):
+    """
+    Reads values of sysctl OIDs.
+    Subclasses may call sysctl(3) directly instead of spawning a process.
+    """
+    def query(self, oids):
+        """
+        @param oids: Iterable of names of OIDs
+        @return: Dict of name of OID to its value as str. OIDs that do not exist are omitted
+        @raise: RuntimeError if values cannot be read
+        """
+        raise NotImplementedError()
+
+
+class SubprocessSysctlProvider(SysctlProvider):
+    """
+    Reads all OIDs by a single invocation of sysctl(8).
+    """
+    def __init__(self, executable=SYSCTL_PATH):
+        """
+        @param executable: Path to sysctl(8)
+        """
+        super(SubprocessSysctlProvider, self).__init__()
+        self.executable = executable
+
+    def query(self, oids):
+        try:
+            # -i ignores unknown OIDs, -e prints name=value
+            output = subprocess.check_output([self.executable, '-e', '-i'] + list(oids))
+        except (OSError, subprocess.CalledProcessError) as e:
+            raise RuntimeError("Unable to run {0}: {1}".format(self.executable, e))
+        return self.parse_output(output)
+
+    @staticmethod
+    def parse_output(output):
+        """
+        @param output: Output of sysctl -e as bytes
+        @return: Dict of name of OID to its value as str
+        """
+        values = {}
+        for line in output.decode('ascii', 'replace').splitlines():
+            name, separator, value = line.partition('=')
+            if separator:
+                values[name.strip()] = value.strip()
+        return values
+
+
+def _get_int(values, oid):
+    try:
+        return int(values[oid])
+    except (KeyError, ValueError):
+        return None
+
+
+DEVD_SOCKET_PATH = '/var/run/devd.seqpacket.pipe'
+
+
+def create_devd_socket(path=DEVD_SOCKET_PATH):
+    """
+    @param path: Path to the seqpacket socket of devd
+    @return: Socket connected to devd
+    """
+    devd_socket = socket.socket(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+    try:
+        devd_socket.connect(path)
+    except:
+        devd_socket.close()
+        raise
+    return devd_socket
+
+
+class DevdListener(common.EventSocketListener):
+    """
+    Receives devd notifications of ACPI AC adapters and batteries and forwards them to on_devd_event of added observers.
+    When devd closes the socket, e.g. it's restarted, the socket is connected again with backoff
+    and observers receive empty fields, since notifications may have been missed.
+    @see: common.EventSocketListener
+    """
+    SUBSYSTEMS = ('ACAD', 'CMBAT')
+
+    THREAD_NAME = 'power.freebsd.DevdListener'
+
+    def __init__(self, socket_path=DEVD_SOCKET_PATH, socket_factory=None):
+        """
+        @param socket_path: Path to the seqpacket socket of devd
+        @param socket_factory: Callable that returns socket-like object (fileno, recv, close).
+            By default socket_path is connected to
+        """
+        if socket_factory is None:
+            socket_factory = lambda: create_devd_socket(socket_path)
+        super(DevdListener, self).__init__(socket_factory)
+        self.socket_path = socket_path
+
+    @staticmethod
+    def parse_message(message):
+        """
+        @param message: Event of devd, e.g. b'!system=ACPI subsystem=ACAD type=\\_SB_.ACAD notify=0x00\\n'
+        @return: Dict of event fields or None if message is not a notification
+        """
+        message = message.decode('ascii', 'replace').strip()
+        if not message.startswith('!'):
+            return None
+
+        fields = {}
+        for field in message[1:].split():
+            name, separator, value = field.partition('=')
+            if separator:
+                fields[name] = value
+        return fields
+
+    def get_event(self, message):
+        fields = self.parse_message(message)
+        if fields is None or fields.get('system') != 'ACPI' or fields.get('subsystem') not in self.SUBSYSTEMS:
+            return None
+        return fields
+
+    def notify_observer(self, observer, event):
+        observer.on_devd_event(event)
+
 
 class PowerManagement(common.PowerManagementBase):
+    devd_listener = DevdListener()
+
+    poller = common.DEFAULT_POLLER
+
+    def __init__(self, sysctl=None, devd_listener=None):
+        """
+        @param sysctl: SysctlProvider used to read OIDs. By default SubprocessSysctlProvider
+        @param devd_listener: DevdListener used to observe changes. By default the one shared by all instances is used
+        """
+        super(PowerManagement, self).__init__()
+        self.sysctl = sysctl if sysctl is not None else SubprocessSysctlProvider()
+        if devd_listener is not None:
+            self.devd_listener = devd_listener
+        self._observed_status = None
+        self._notifications_source = None
+
+    def _get_reading_key(self):
+        """
+        Instances read the same values if they run the same sysctl(8).
+        """
+        if type(self.sysctl) is SubprocessSysctlProvider:
+            return type(self), self.sysctl.executable
+        return self
+
     @staticmethod
-    def power_source_type():
+    def status_from_sysctl(values):
         """
-        FreeBSD use sysctl hw.acpi.acline to tell if Mains (1) is used or Battery (0).
-        Beware, that on a Desktop machines this hw.acpi.acline oid may not exist.
-        @return: One of common.POWER_TYPE_*
-        @raise: Runtime error if type of power source is not supported
+        Beware, that on a Desktop machines hw.acpi.acline oid may not exist, then AC is assumed.
+
+        @param values: Dict of name of OID to its value as returned by SysctlProvider.query for STATUS_OIDS
+        @rtype: common.PowerStatus
         """
-        try:
-            supply=int(subprocess.check_output(["sysctl","-n","hw.acpi.acline"]))
-        except:
-            return common.POWER_TYPE_AC
- 
-        if supply == 1:
-            return common.POWER_TYPE_AC
-        elif supply == 0:
-            return common.POWER_TYPE_BATTERY
-        else:
+        acline = _get_int(values, ACLINE_OID)
+        if acline is None or acline == 1:
+            return common.AC_POWER_STATUS
+        elif acline != 0:
             raise RuntimeError("Unknown power source type!")
 
+        state = _get_int(values, BATTERY_STATE_OID)
+        if not _get_int(values, BATTERY_UNITS_OID) or state is None or state == ACPI_BATT_STAT_NOT_PRESENT \
+                or not state & ACPI_BATT_STAT_DISCHARG:
+            return common.get_batteries_status([])
+
+        percentage = _get_int(values, BATTERY_LIFE_OID)
+        if percentage is None or percentage < 0:
+            percentage = 100.0
+
+        time_remaining = _get_int(values, BATTERY_TIME_OID)
+        if time_remaining is None or time_remaining < 0:
+            time_remaining = common.TIME_REMAINING_UNKNOWN
+        else:
+            time_remaining = float(time_remaining)
+
+        return common.PowerStatus(
+            common.POWER_TYPE_BATTERY,
+            common.get_low_battery_warning_level(float(percentage), time_remaining),
+            time_remaining
+        )
 
     @staticmethod
-    def is_ac_online():
+    def _query_deprecated():
+        warnings.warn("Static helpers of freebsd.PowerManagement are deprecated, use get_status instead",
+                      category=DeprecationWarning, stacklevel=3)
+        try:
+            return SubprocessSysctlProvider(SYSCTL_PATH).query(STATUS_OIDS)
+        except RuntimeError:
+            return {}
+
+    @staticmethod
+    def power_source_type():
         """
-        @return: True if ac is online. Otherwise False
+        @deprecated: Use get_status().power_source_type
+        @return: One of common.POWER_TYPE_*
+        @raise: RuntimeError if type of power source is not supported
         """
-        try:
-            supply=int(subprocess.check_output(["sysctl","-n","hw.acpi.acline"]))
-        except:
-            return True
-        return supply == 1
+        return PowerManagement.status_from_sysctl(PowerManagement._query_deprecated()).power_source_type
 
+    @staticmethod
+    def is_ac_online():
+        """
+        @deprecated: Use get_status().power_source_type
+        @return: True if ac is online or its OID does not exist. Otherwise False
+        """
+        return _get_int(PowerManagement._query_deprecated(), ACLINE_OID) != 0
 
     @staticmethod
     def is_battery_present():
         """
-        TODO
+        @deprecated: Use get_status
         @return: True if battery is present. Otherwise False
         """
-        return False
-
+        values = PowerManagement._query_deprecated()
+        state = _get_int(values, BATTERY_STATE_OID)
+        return bool(_get_int(values, BATTERY_UNITS_OID)) and state is not None and state != ACPI_BATT_STAT_NOT_PRESENT
 
     @staticmethod
     def is_battery_discharging():
         """
-        TODO
-        @return: True if ac is online. Otherwise False
+        @deprecated: Use get_status
+        @return: True if battery is discharging. Otherwise False
         """
-        return False
-
+        state = _get_int(PowerManagement._query_deprecated(), BATTERY_STATE_OID)
+        return state is not None and state != ACPI_BATT_STAT_NOT_PRESENT and bool(state & ACPI_BATT_STAT_DISCHARG)
 
     @staticmethod
     def get_battery_state():
         """
-        TODO
+        sysctl does not report energy, the placeholder returned by previous versions is kept.
+
+        @deprecated: Use get_status
         @return: Tuple (energy_full, energy_now, power_now)
         """
-        energy_now = float(100.0)
-        power_now = float(100.0)
-        energy_full = float(100.0)
-        return energy_full, energy_now, power_now
+        warnings.warn("Static helpers of freebsd.PowerManagement are deprecated, use get_status instead",
+                      category=DeprecationWarning, stacklevel=2)
+        return 100.0, 100.0, 100.0
 
+    def get_status(self):
+        """
+        Queries STATUS_OIDS at once.
+        If AC is online returns common.AC_POWER_STATUS.
+        Otherwise determines power status from the combined state of batteries reported by ACPI.
+        """
+        return self.status_from_sysctl(self.sysctl.query(STATUS_OIDS))
 
     def get_providing_power_source_type(self):
         """
-        Looks through all power supplies in POWER_SUPPLY_PATH.
-        If there is an AC adapter online returns POWER_TYPE_AC.
+        If AC is online returns POWER_TYPE_AC.
         If there is a discharging battery, returns POWER_TYPE_BATTERY.
-        Since the order of supplies is arbitrary, whatever found first is returned.
+        @see: get_status
         """
-        type = self.power_source_type()
-        if type == common.POWER_TYPE_AC:
-            if self.is_ac_online():
-                return common.POWER_TYPE_AC
-            elif type == common.POWER_TYPE_BATTERY:
-                if self.is_battery_present() and self.is_battery_discharging():
-                    return common.POWER_TYPE_BATTERY
-                else:
-                    warnings.warn("UPS is not supported.")
-        return common.POWER_TYPE_AC
-
+        return self.get_status().power_source_type
 
     def get_low_battery_warning_level(self):
         """
-        Looks through all power supplies in POWER_SUPPLY_PATH.
-        If there is an AC adapter online returns POWER_TYPE_AC returns LOW_BATTERY_WARNING_NONE.
-        Otherwise determines total percentage and time remaining across all attached batteries.
+        If AC is online returns LOW_BATTERY_WARNING_NONE.
+        Otherwise determines percentage and time remaining of batteries.
+        @see: get_status
         """
-        all_energy_full = []
-        all_energy_now = []
-        all_power_now = []
-        try:
-            type = self.power_source_type()
-            if type == common.POWER_TYPE_AC:
-                if self.is_ac_online():
-                    return common.LOW_BATTERY_WARNING_NONE
-            elif type == common.POWER_TYPE_BATTERY:
-                if self.is_battery_present() and self.is_battery_discharging():
-                    energy_full, energy_now, power_now = self.get_battery_state()
-                    all_energy_full.append(energy_full)
-                    all_energy_now.append(energy_now)
-                    all_power_now.append(power_now)
-            else:
-                warnings.warn("UPS is not supported.")
-        except (RuntimeError, IOError) as e:
-            warnings.warn("Unable to read system power information!", category=RuntimeWarning)
-
-        try:
-            total_percentage = sum(all_energy_full) / sum(all_energy_now)
-            total_time = sum([energy_now / power_now * 60.0 for energy_now, power_now in zip(all_energy_now, all_power_now)])
-            if total_time <= 10.0:
-                return common.LOW_BATTERY_WARNING_FINAL
-            elif total_percentage <= 22.0:
-                return common.LOW_BATTERY_WARNING_EARLY
-            else:
-                return common.LOW_BATTERY_WARNING_NONE
-        except ZeroDivisionError as e:
-            warnings.warn("Unable to calculate low battery level: {0}".format(e), category=RuntimeWarning)
-            return common.LOW_BATTERY_WARNING_NONE
-
+        return self.get_status().low_battery_warning_level
 
     def get_time_remaining_estimate(self):
         """
-        Looks through all power sources and returns total time remaining estimate
-        or TIME_REMAINING_UNLIMITED if ac power supply is online.
+        Returns time remaining estimate of batteries
+        or TIME_REMAINING_UNLIMITED if AC is online.
+        @see: get_status
+        """
+        return self.get_status().time_remaining_estimate
+
+    def on_devd_event(self, fields):
+        """
+        Called by devd_listener in response to the notification of an AC adapter or a battery.
+        Observers are notified only if power status did change.
+
+        @param fields: Fields of the devd event or empty dict if events were lost
         """
-        all_energy_now = []
-        all_power_now = []
         try:
-            type = self.power_source_type()
-            if type == common.POWER_TYPE_AC:
-                if self.is_ac_online(supply_path):
-                    return common.TIME_REMAINING_UNLIMITED
-            elif type == common.POWER_TYPE_BATTERY:
-                if self.is_battery_present() and self.is_battery_discharging():
-                    energy_full, energy_now, power_now = self.get_battery_state()
-                    all_energy_now.append(energy_now)
-                    all_power_now.append(power_now)
-            else:
-                warnings.warn("UPS is not supported.")
-        except (RuntimeError, IOError) as e:
-            warnings.warn("Unable to read system power information!", category=RuntimeWarning)
-
-        if len(all_energy_now) > 0:
-            try:
-                return sum([energy_now / power_now * 60.0 for energy_now, power_now in zip(all_energy_now, all_power_now)])
-            except ZeroDivisionError as e:
-                warnings.warn("Unable to calculate time remaining estimate: {0}".format(e), category=RuntimeWarning)
-                return common.TIME_REMAINING_UNKNOWN
-        else:
-            return common.TIME_REMAINING_UNKNOWN
+            self._invalidate_status()
+            status = self.get_status()
+        except Exception as e:
+            warnings.warn("Unable to get power status: {0}".format(e), category=RuntimeWarning)
+            return
 
+        previous_status, self._observed_status = self._observed_status, status
+        if previous_status is not None:
+            self._notify_observers(previous_status, status)
 
     def add_observer(self, observer):
-        warnings.warn("Current system does not support observing.")
-        pass
-
+        """
+        Subscribes to ACPI notifications of devd when first observer is added.
+        Falls back to polling if devd is not available.
+        @see: DevdListener
+        @see: common.PowerManagementPoller
+        """
+        super(PowerManagement, self).add_observer(observer)
+        if len(self._weak_observers) == 1:
+            try:
+                self._observed_status = self.get_status()
+                try:
+                    self.devd_listener.add_observer(self)
+                    self._notifications_source = self.devd_listener
+                except (IOError, OSError) as e:
+                    warnings.warn("Unable to observe devd events, falling back to polling: {0}".format(e), category=RuntimeWarning)
+                    self.poller.add_observer(self)
+                    self._notifications_source = self.poller
+            except:
+                super(PowerManagement, self).remove_observer(observer)
+                raise
 
     def remove_observer(self, observer):
-        warnings.warn("Current system does not support observing.")
-        pass
+        """
+        Unsubscribes from notifications source when last observer is removed.
+        """
+        super(PowerManagement, self).remove_observer(observer)
+        if len(self._weak_observers) == 0:
+            self._notifications_source.remove_observer(self)
+            self._notifications_source = None
+            self._observed_status = None
@@ -0,0 +1,224 @@
+# coding=utf-8
+"""
+Limits parallelism of a concurrent.futures executor by power status.
+
+PowerAwareExecutor wraps an executor and admits at most limit tasks to it at once.
+The limit is recalculated by a policy whenever observers of PowerManagement are notified:
+by default all workers are used on AC, half on battery or UPS, a quarter at the early warning level
+and no new tasks are accepted at the final warning level: admitted ones are drained
+and the ones still waiting fail with DrainingError.
+
+Usage:
+    from concurrent.futures import ThreadPoolExecutor
+    from power.governor import PowerAwareExecutor, PowerPolicy
+
+    with PowerAwareExecutor(ThreadPoolExecutor(8), 8, policy=PowerPolicy(battery=0.5)) as executor:
+        results = list(executor.map(work, items))
+"""
+from collections import deque
+from concurrent.futures import CancelledError, Executor, Future
+import functools
+import threading
+
+import power
+from power import common
+
+
+__all__ = [
+    'DrainingError',
+    'PowerAwareExecutor',
+    'PowerPolicy'
+    ]
+
+
+class DrainingError(RuntimeError):
+    """
+    Raised by PowerAwareExecutor.submit and set on futures of waiting tasks when policy does not allow any tasks.
+    """
+    pass
+
+
+class PowerPolicy(object):
+    """
+    Maps power status to the number of workers as fractions of max_workers.
+    At least one worker is allowed unless fraction is 0.
+
+    @ivar ac: Fraction on AC
+    @ivar battery: Fraction on battery
+    @ivar ups: Fraction on UPS
+    @ivar early: Fraction at LOW_BATTERY_WARNING_EARLY
+    @ivar final: Fraction at LOW_BATTERY_WARNING_FINAL or when time remaining is below final_time_remaining
+    @ivar final_time_remaining: Minutes of time remaining below which final applies. None to rely on the warning level only
+    """
+    def __init__(self, ac=1.0, battery=0.5, ups=0.5, early=0.25, final=0.0, final_time_remaining=None):
+        super(PowerPolicy, self).__init__()
+        self.ac = ac
+        self.battery = battery
+        self.ups = ups
+        self.early = early
+        self.final = final
+        self.final_time_remaining = final_time_remaining
+
+    def get_fraction(self, status):
+        """
+        @param status: PowerStatus
+        @return: Fraction of workers allowed
+        """
+        if status.power_source_type == common.POWER_TYPE_AC:
+            return self.ac
+
+        time_remaining = status.time_remaining_estimate
+        if status.low_battery_warning_level == common.LOW_BATTERY_WARNING_FINAL or \
+                (self.final_time_remaining is not None and time_remaining >= 0 and time_remaining < self.final_time_remaining):
+            return self.final
+        elif status.low_battery_warning_level == common.LOW_BATTERY_WARNING_EARLY:
+            return self.early
+        elif status.power_source_type == common.POWER_TYPE_UPS:
+            return self.ups
+        else:
+            return self.battery
+
+    def __call__(self, status, max_workers):
+        """
+        @param status: PowerStatus
+        @param max_workers: Number of workers on full power
+        @return: Number of workers allowed
+        """
+        fraction = self.get_fraction(status)
+        if fraction <= 0:
+            return 0
+        return min(max_workers, max(1, int(max_workers * fraction)))
+
+
+class PowerAwareExecutor(Executor, common.PowerManagementObserver):
+    """
+    Executor that queues submitted tasks and passes at most limit of them to the wrapped executor at once.
+
+    @ivar executor: Wrapped executor
+    @ivar max_workers: Number of workers on full power, usually max_workers of the wrapped executor
+    @ivar policy: Callable that accepts PowerStatus and max_workers and returns the number of workers allowed
+    """
+    def __init__(self, executor, max_workers, power_management=None, policy=None):
+        """
+        @param executor: Executor to run tasks
+        @param max_workers: Number of workers on full power
+        @param power_management: Instance of PowerManagement. By default new power.PowerManagement is created
+        @param policy: Callable(PowerStatus, max_workers) -> int. By default PowerPolicy()
+        """
+        super(PowerAwareExecutor, self).__init__()
+        self.executor = executor
+        self.max_workers = max_workers
+        self.power_management = power_management if power_management is not None else power.PowerManagement()
+        self.policy = policy if policy is not None else PowerPolicy()
+        self._lock = threading.Lock()
+        self._pending = deque()
+        self._active = 0
+        self._limit = max_workers
+        self._shutdown = False
+        self._diagnostics = common.RateLimitedWarnings()
+        self.update()
+        self.power_management.add_observer(self)
+
+    @property
+    def limit(self):
+        """Number of tasks that may run at once."""
+        return self._limit
+
+    @property
+    def pending(self):
+        """Number of tasks waiting to be admitted."""
+        return len(self._pending)
+
+    def update(self):
+        """
+        Recalculates limit from the current power status and admits pending tasks.
+        If limit drops to 0, pending tasks fail with DrainingError.
+        Limit is kept if status cannot be read.
+        """
+        try:
+            status = self.power_management.get_status()
+        except Exception:
+            self._diagnostics.warn('update', "Unable to get power status", exc_info=True)
+            return
+
+        limit = max(0, min(self.max_workers, int(self.policy(status, self.max_workers))))
+        with self._lock:
+            self._limit = limit
+            if limit == 0:
+                pending, self._pending = self._pending, deque()
+            else:
+                pending = ()
+
+        for future, _, _, _ in pending:
+            if future.set_running_or_notify_cancel():
+                future.set_exception(DrainingError("Power policy does not allow waiting tasks"))
+        self._dispatch()
+
+    def on_power_sources_change(self, power_management):
+        self.update()
+
+    def on_time_remaining_change(self, power_management):
+        self.update()
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        @raise DrainingError: If policy does not allow any tasks
+        @see: concurrent.futures.Executor.submit
+        """
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("cannot schedule new futures after shutdown")
+            elif self._limit == 0:
+                raise DrainingError("Power policy does not allow new tasks")
+            future = Future()
+            self._pending.append((future, fn, args, kwargs))
+        self._dispatch()
+        return future
+
+    def shutdown(self, wait=True):
+        """
+        Stops observing, cancels tasks that were not admitted and shuts down the wrapped executor.
+        @see: concurrent.futures.Executor.shutdown
+        """
+        with self._lock:
+            if self._shutdown:
+                return
+            self._shutdown = True
+            pending, self._pending = self._pending, deque()
+        self.power_management.remove_observer(self)
+        for future, _, _, _ in pending:
+            future.cancel()
+        self.executor.shutdown(wait=wait)
+
+    def _dispatch(self):
+        while True:
+            with self._lock:
+                if not self._pending or self._active >= self._limit:
+                    return
+                future, fn, args, kwargs = self._pending.popleft()
+                if not future.set_running_or_notify_cancel():
+                    continue
+                self._active += 1
+
+            try:
+                inner_future = self.executor.submit(fn, *args, **kwargs)
+            except BaseException as e:
+                with self._lock:
+                    self._active -= 1
+                future.set_exception(e)
+            else:
+                inner_future.add_done_callback(functools.partial(self._on_done, future))
+
+    def _on_done(self, future, inner_future):
+        with self._lock:
+            self._active -= 1
+
+        if inner_future.cancelled():
+            future.set_exception(CancelledError())
+        elif inner_future.exception() is not None:
+            future.set_exception(inner_future.exception())
+        else:
+            future.set_result(inner_future.result())
+
+        self._dispatch()
+
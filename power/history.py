@@ -0,0 +1,152 @@
+# coding=utf-8
+"""
+Keeps bounded history of battery readings to estimate time remaining from a smoothed discharge rate.
+
+Instantaneous estimate (energy divided by current power) follows every change of the load.
+ReadingHistory averages power exponentially with weights that decay with age of readings,
+so the estimate stays stable between infrequent polls.
+
+Usage:
+    pm = PowerManagement()
+    pm.get_time_remaining_estimate(smoothed=True)
+
+    import numpy
+    times = numpy.concatenate([numpy.frombuffer(b) for b in pm.history.get_buffers('time')])
+"""
+from array import array
+import threading
+
+from power import common
+
+
+__all__ = [
+    'ReadingHistory'
+    ]
+
+
+class ReadingHistory(object):
+    """
+    Fixed-size ring of timestamped readings of batteries of a system stored in array('d') columns.
+    The oldest reading is overwritten when the ring is full.
+
+    Discharge rate is the exponentially weighted moving average of power:
+    weight of a reading halves every half_life seconds.
+    Readings may be appended from several threads, e.g. of the poller and of callers.
+
+    Energy includes batteries that do not discharge while power is of discharging ones only:
+    like common.get_batteries_status, the estimate assumes that batteries which are idle now,
+    e.g. the second battery of a laptop that drains them one by one, are drained after at the same rate.
+
+    @cvar COLUMNS: Names of columns
+    @ivar time: Column of times of readings in seconds, common.monotonic by default
+    @ivar energy_now: Column of total energy of present batteries, including the ones that do not discharge
+    @ivar power_now: Column of total power of discharging batteries. Same units as energy per hour, e.g. uW for uWh
+    """
+    COLUMNS = ('time', 'energy_now', 'power_now')
+
+    def __init__(self, capacity=256, half_life=120.0):
+        """
+        @param capacity: Maximum number of readings
+        @param half_life: Seconds after which weight of a reading in the discharge rate halves
+        """
+        super(ReadingHistory, self).__init__()
+        if capacity < 1:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.half_life = half_life
+        self.time = array('d', [0.0]) * capacity
+        self.energy_now = array('d', [0.0]) * capacity
+        self.power_now = array('d', [0.0]) * capacity
+        self._start = 0
+        self._count = 0
+        self._discharge_rate = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        """
+        Iterates over tuples (time, energy_now, power_now) from the oldest to the newest
+        as they were when iteration started.
+        """
+        with self._lock:
+            indices = [(self._start + i) % self.capacity for i in range(self._count)]
+            readings = [(self.time[j], self.energy_now[j], self.power_now[j]) for j in indices]
+        return iter(readings)
+
+    def append(self, energy_now, power_now, time=None):
+        """
+        Records reading and updates discharge rate.
+
+        @param energy_now: Total energy of present batteries
+        @param power_now: Total power of discharging batteries
+        @param time: Time of the reading in seconds. By default common.monotonic()
+        """
+        if time is None:
+            time = common.monotonic()
+
+        with self._lock:
+            if self._count:
+                elapsed = time - self.time[(self._start + self._count - 1) % self.capacity]
+                weight = 1.0 - 0.5 ** (max(elapsed, 0.0) / self.half_life) if self.half_life > 0 else 1.0
+                self._discharge_rate += (power_now - self._discharge_rate) * weight
+            else:
+                self._discharge_rate = power_now
+
+            if self._count < self.capacity:
+                i = (self._start + self._count) % self.capacity
+                self._count += 1
+            else:
+                i = self._start
+                self._start = (self._start + 1) % self.capacity
+            self.time[i] = time
+            self.energy_now[i] = energy_now
+            self.power_now[i] = power_now
+
+    def clear(self):
+        """
+        Forgets all readings, e.g. when AC is attached.
+        """
+        with self._lock:
+            self._start = 0
+            self._count = 0
+            self._discharge_rate = None
+
+    def get_buffers(self, column):
+        """
+        Returns column as memoryviews of its storage without copying, e.g. for numpy.frombuffer.
+        Readings are in order from the oldest to the newest across all returned views.
+        Views are not guarded: readings appended meanwhile overwrite the oldest ones in place.
+
+        @param column: One of COLUMNS
+        @return: Tuple of one or two memoryviews
+        """
+        if column not in self.COLUMNS:
+            raise ValueError("{0} is not a column of {1}".format(column, type(self).__name__))
+        view = memoryview(getattr(self, column))
+        with self._lock:
+            start = self._start
+            end = start + self._count
+        if end <= self.capacity:
+            return (view[start:end],)
+        else:
+            return view[start:], view[:end - self.capacity]
+
+    @property
+    def discharge_rate(self):
+        """
+        Smoothed power of discharging batteries or None if there are no readings.
+        """
+        return self._discharge_rate
+
+    def get_time_remaining_estimate(self):
+        """
+        Divides energy of the newest reading by the smoothed discharge rate.
+
+        @return: Minutes remaining or common.TIME_REMAINING_UNKNOWN if there are no readings or rate is not positive
+        """
+        with self._lock:
+            if not self._count or self._discharge_rate <= 0.0:
+                return common.TIME_REMAINING_UNKNOWN
+            return self.energy_now[(self._start + self._count - 1) % self.capacity] / self._discharge_rate * 60.0
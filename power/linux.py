@@ -3,200 +3,895 @@
 Implements PowerManagement functions using /sys/class/power_supply/*
 See doc/linux for platform-specific details.
 """
+from collections import namedtuple, OrderedDict
+import errno
 import os
+import socket
+import threading
 import warnings
 from power import common
+from power.history import ReadingHistory
 
 
-POWER_SUPPLY_PATH = '/sys/class/power_supply'
+SYSFS_ROOT = '/sys'
 
+POWER_SUPPLY_PATH = os.path.join(SYSFS_ROOT, 'class', 'power_supply')
 
-if not os.access(POWER_SUPPLY_PATH, os.R_OK):
-    raise RuntimeError("Unable to read {path}.".format(path=POWER_SUPPLY_PATH))
+
+def get_power_supply_path(root=None):
+    """
+    @param root: Mount point of sysfs, e.g. '/host/sys'. By default POWER_SUPPLY_PATH is used
+    @return: Path to the power_supply class of root
+    """
+    if root is None:
+        return POWER_SUPPLY_PATH
+    return os.path.join(root, 'class', 'power_supply')
+
+
+class AttributeReader(object):
+    """
+    Reads attributes of power supplies by opening the corresponding file on every read.
+    Values are returned as stripped bytes: they can be compared with byte strings and passed to int() or float() directly.
+    """
+    def refresh(self, supply_path):
+        """
+        Called before attributes of the supply are read within a single query.
+
+        @param supply_path: Path to power supply
+        """
+        pass
+
+    def read(self, supply_path, name):
+        """
+        @param supply_path: Path to power supply
+        @param name: Name of the attribute, e.g. 'type'
+        @return: Stripped value of the attribute
+        @raise: IOError or OSError if attribute cannot be read
+        """
+        with open(os.path.join(supply_path, name), 'rb') as attribute_file:
+            return attribute_file.readline().strip()
+
+    def has(self, supply_path, name):
+        """
+        @param supply_path: Path to power supply
+        @param name: Name of the attribute, e.g. 'energy_now'
+        @return: True if supply has the attribute. Otherwise False
+        """
+        return os.path.exists(os.path.join(supply_path, name))
+
+    def prune(self, supply_paths):
+        """
+        Releases resources held for supplies that are no longer listed.
+
+        @param supply_paths: Paths of currently available power supplies
+        """
+        pass
+
+    def close(self):
+        """
+        Releases all held resources.
+        """
+        pass
+
+
+class DescriptorCacheReader(AttributeReader):
+    """
+    Keeps descriptors of attribute files open and re-reads them at offset 0 with os.pread.
+    A sysfs attribute of an unplugged supply fails to read; its descriptor is reopened once
+    so the supply is picked up again if it is plugged back.
+
+    @ivar _descriptors: Dict of supply path to dict of attribute name to file descriptor
+    @ivar _buffer: Buffer reused by all reads
+    """
+    BUFFER_SIZE = 4096
+
+    def __init__(self):
+        super(DescriptorCacheReader, self).__init__()
+        self._descriptors = {}
+        self._buffer = bytearray(self.BUFFER_SIZE)
+        self._lock = threading.Lock()
+
+    def __del__(self):
+        self.close()
+
+    def read(self, supply_path, name):
+        with self._lock:
+            descriptors = self._descriptors.setdefault(supply_path, {})
+            descriptor = descriptors.get(name)
+            if descriptor is not None:
+                try:
+                    return self._read_descriptor(descriptor)
+                except (IOError, OSError):
+                    del descriptors[name]
+                    os.close(descriptor)
+
+            descriptor = os.open(os.path.join(supply_path, name), os.O_RDONLY)
+            try:
+                value = self._read_descriptor(descriptor)
+            except:
+                os.close(descriptor)
+                raise
+            descriptors[name] = descriptor
+            return value
+
+    def prune(self, supply_paths):
+        with self._lock:
+            for supply_path in set(self._descriptors) - set(supply_paths):
+                for descriptor in self._descriptors.pop(supply_path).values():
+                    os.close(descriptor)
+
+    def close(self):
+        with self._lock:
+            for descriptors in self._descriptors.values():
+                for descriptor in descriptors.values():
+                    os.close(descriptor)
+            self._descriptors.clear()
+
+    if hasattr(os, 'preadv'):
+        def _read_descriptor(self, descriptor):
+            size = os.preadv(descriptor, [self._buffer], 0)
+            return self._buffer[:size].strip()
+    elif hasattr(os, 'pread'):
+        def _read_descriptor(self, descriptor):
+            return os.pread(descriptor, self.BUFFER_SIZE, 0).strip()
+    else:
+        def _read_descriptor(self, descriptor):
+            os.lseek(descriptor, 0, os.SEEK_SET)
+            return os.read(descriptor, self.BUFFER_SIZE).strip()
+
+
+class UeventReader(DescriptorCacheReader):
+    """
+    Reads all POWER_SUPPLY_* properties of a supply from its uevent file once per query.
+    Attributes missing from uevent (e.g. type on older kernels) are read individually.
+    Attributes that do not exist either are remembered until the topology is planned again,
+    so they cost one failed open per topology and not one per query.
+
+    @ivar _properties: Dict of supply path to dict of lowercased property name to value
+    @ivar _missing: Dict of supply path to set of names of attributes that do not exist
+    """
+    PROPERTY_PREFIX = b'POWER_SUPPLY_'
+
+    def __init__(self):
+        super(UeventReader, self).__init__()
+        self._properties = {}
+        self._missing = {}
+
+    def refresh(self, supply_path):
+        try:
+            uevent = super(UeventReader, self).read(supply_path, 'uevent')
+        except (IOError, OSError):
+            self._properties[supply_path] = {}
+        else:
+            self._properties[supply_path] = self.parse_uevent(uevent)
+
+    def read(self, supply_path, name):
+        properties = self._properties.get(supply_path)
+        if properties is not None and name in properties:
+            return properties[name]
+        elif name in self._missing.get(supply_path, ()):
+            raise IOError(errno.ENOENT, "{0} is missing".format(name), os.path.join(supply_path, name))
+
+        try:
+            return super(UeventReader, self).read(supply_path, name)
+        except (IOError, OSError) as e:
+            if e.errno == errno.ENOENT:
+                self._missing.setdefault(supply_path, set()).add(name)
+            raise
+
+    def has(self, supply_path, name):
+        properties = self._properties.get(supply_path)
+        if properties is not None and name in properties:
+            return True
+        elif name in self._missing.get(supply_path, ()):
+            return False
+        return super(UeventReader, self).has(supply_path, name)
+
+    def prune(self, supply_paths):
+        super(UeventReader, self).prune(supply_paths)
+        for supply_path in set(self._properties) - set(supply_paths):
+            self._properties.pop(supply_path, None)
+        self._missing.clear()
+
+    def close(self):
+        super(UeventReader, self).close()
+        self._properties.clear()
+        self._missing.clear()
+
+    @classmethod
+    def parse_uevent(cls, uevent):
+        """
+        @param uevent: Content of the uevent file
+        @return: Dict of lowercased property name without POWER_SUPPLY_ prefix to its value, e.g. {'status': b'Charging'}
+        """
+        properties = {}
+        prefix_length = len(cls.PROPERTY_PREFIX)
+        for line in uevent.split(b'\n'):
+            if line.startswith(cls.PROPERTY_PREFIX):
+                name, _, value = line[prefix_length:].partition(b'=')
+                properties[name.decode('ascii').lower()] = bytes(value.strip())
+        return properties
+
+
+READERS = {
+    'attribute': AttributeReader,
+    'descriptor_cache': DescriptorCacheReader,
+    'uevent': UeventReader,
+}
+
+
+DEFAULT_READER = AttributeReader()
+
+
+NETLINK_KOBJECT_UEVENT = 15
+
+UEVENT_KERNEL_GROUP = 1
+
+# Not sent by the kernel: ACTION of the event UeventListener passes to observers when uevents were lost
+UEVENT_ACTION_LOST = b'lost'
+
+# Actions after which power supplies must be enumerated again
+UEVENT_TOPOLOGY_ACTIONS = (b'add', b'remove', UEVENT_ACTION_LOST)
+
+
+def create_uevent_socket():
+    """
+    @return: Netlink socket subscribed to kernel uevents
+    """
+    uevent_socket = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_KOBJECT_UEVENT)
+    try:
+        uevent_socket.bind((0, UEVENT_KERNEL_GROUP))
+    except:
+        uevent_socket.close()
+        raise
+    return uevent_socket
+
+
+class UeventListener(common.EventSocketListener):
+    """
+    Receives kernel uevents of the power_supply subsystem and forwards their properties to on_uevent of added observers.
+    @see: common.EventSocketListener
+    """
+    SUBSYSTEM_FILTER = b'\0SUBSYSTEM=power_supply\0'
+
+    THREAD_NAME = 'power.linux.UeventListener'
+
+    def __init__(self, socket_factory=create_uevent_socket):
+        """
+        @param socket_factory: Callable that returns socket-like object (fileno, recv, close) which receives uevent messages
+        """
+        super(UeventListener, self).__init__(socket_factory)
+
+    @staticmethod
+    def parse_message(message):
+        """
+        @param message: Datagram of the kernel uevent, e.g. b'change@/devices/...\\0ACTION=change\\0SUBSYSTEM=power_supply\\0...'
+        @return: Dict of uevent properties or None if message is not a kernel uevent
+        """
+        header, _, environment = message.partition(b'\0')
+        if b'@' not in header:
+            return None
+
+        properties = {}
+        for field in environment.split(b'\0'):
+            name, separator, value = field.partition(b'=')
+            if separator:
+                properties[name.decode('ascii')] = value
+        return properties
+
+    def get_event(self, message):
+        if self.SUBSYSTEM_FILTER not in message:
+            return None
+        return self.parse_message(message)
+
+    def notify_observer(self, observer, event):
+        observer.on_uevent(event)
+
+    def get_lost_event(self):
+        return {'ACTION': UEVENT_ACTION_LOST}
+
+
+class SupplyPlan(object):
+    """
+    Describes how to read a power supply.
+    Type and scope of a supply never change and its set of attributes changes only when it's plugged in or out.
+
+    @ivar path: Path to power supply
+    @ivar type: One of common.POWER_TYPE_*
+    @ivar scope: Value of the scope attribute, e.g. b'System' or b'Device'
+    @ivar energy_now: Name of the attribute with current energy or charge
+    @ivar energy_full: Name of the attribute with full energy or charge
+    @ivar power_now: Name of the attribute with current power or None if it's calculated from voltage and current
+    """
+    __slots__ = ('path', 'type', 'scope', 'energy_now', 'energy_full', 'power_now')
+
+    def __init__(self, path, type, scope=b'System', energy_now=None, energy_full=None, power_now=None):
+        self.path = path
+        self.type = type
+        self.scope = scope
+        self.energy_now = energy_now
+        self.energy_full = energy_full
+        self.power_now = power_now
 
 
 class PowerManagement(common.PowerManagementBase):
+    uevent_listener = UeventListener()
+
+    poller = common.DEFAULT_POLLER
+
+    SUPPORTS_SMOOTHING = True
+
+    def __init__(self, reader=None, uevent_listener=None, topology_max_age=60.0, root=None, history=None):
+        """
+        @param reader: Instance of AttributeReader or name of one of READERS used to read attributes of power supplies.
+            By default each attribute is read by opening its file.
+        @param uevent_listener: UeventListener used to observe changes. By default the one shared by all instances is used
+        @param topology_max_age: Seconds after which the list of supplies is rebuilt even if no change was seen.
+            sysfs does not reliably update mtime of directories, so unobserved hotplug is caught this way. None to disable
+        @param root: Mount point of sysfs to read supplies from, e.g. '/host/sys'. By default POWER_SUPPLY_PATH is used.
+            Uevents are received from the kernel of the current host regardless of root
+        @param history: ReadingHistory that records readings of batteries. By default it's created by the first
+            get_time_remaining_estimate(smoothed=True)
+        @raise: RuntimeError if power supplies of root cannot be read
+        """
+        super(PowerManagement, self).__init__()
+        self.root = root
+        self._supply_path = get_power_supply_path(root)
+        if not os.access(self._supply_path, os.R_OK):
+            raise RuntimeError("Unable to read {path}.".format(path=self._supply_path))
+
+        if reader is None:
+            reader = AttributeReader()
+        elif not isinstance(reader, AttributeReader):
+            reader = READERS[reader]()
+        self._reader = reader
+        if uevent_listener is not None:
+            self.uevent_listener = uevent_listener
+        self._observed_status = None
+        self._notifications_source = None
+        self._topology_max_age = topology_max_age
+        self._topology = None
+        self._topology_mtime = None
+        self._topology_time = None
+        self._uevent_socket = None
+        self._drained_status = None
+        self.history = history
+
     @staticmethod
-    def power_source_type(supply_path):
+    def power_source_type(supply_path, reader=DEFAULT_READER):
         """
         @param supply_path: Path to power supply
+        @param reader: AttributeReader used to read attributes
         @return: One of common.POWER_TYPE_*
         @raise: Runtime error if type of power source is not supported
         """
-        with open(os.path.join(supply_path, 'type'), 'r') as type_file:
-            type = type_file.readline().strip()
-            if type == 'Mains':
-                return common.POWER_TYPE_AC
-            elif type == 'UPS':
-                return common.POWER_TYPE_UPS
-            elif type == 'Battery':
-                return common.POWER_TYPE_BATTERY
-            else:
-                raise RuntimeError("Type of {path} ({type}) is not supported".format(path=supply_path, type=type))
+        type = reader.read(supply_path, 'type')
+        if type == b'Mains':
+            return common.POWER_TYPE_AC
+        elif type == b'UPS':
+            return common.POWER_TYPE_UPS
+        elif type == b'Battery':
+            return common.POWER_TYPE_BATTERY
+        else:
+            raise RuntimeError("Type of {path} ({type}) is not supported".format(path=supply_path, type=type.decode('ascii', 'replace')))
 
     @staticmethod
-    def is_ac_online(supply_path):
+    def is_ac_online(supply_path, reader=DEFAULT_READER):
         """
         @param supply_path: Path to power supply
+        @param reader: AttributeReader used to read attributes
         @return: True if ac is online. Otherwise False
         """
-        with open(os.path.join(supply_path, 'online'), 'r') as online_file:
-            return online_file.readline().strip() == '1'
+        return reader.read(supply_path, 'online') == b'1'
 
     @staticmethod
-    def is_battery_present(supply_path):
+    def is_battery_present(supply_path, reader=DEFAULT_READER):
         """
         @param supply_path: Path to power supply
+        @param reader: AttributeReader used to read attributes
         @return: True if battery is present. Otherwise False
         """
-        with open(os.path.join(supply_path, 'present'), 'r') as present_file:
-            return present_file.readline().strip() == '1'
+        return reader.read(supply_path, 'present') == b'1'
 
     @staticmethod
-    def is_battery_discharging(supply_path):
+    def is_battery_discharging(supply_path, reader=DEFAULT_READER):
         """
         @param supply_path: Path to power supply
+        @param reader: AttributeReader used to read attributes
         @return: True if ac is online. Otherwise False
         """
-        with open(os.path.join(supply_path, 'status'), 'r') as status_file:
-            return status_file.readline().strip() == 'Discharging'
+        return reader.read(supply_path, 'status') == b'Discharging'
 
     @staticmethod
-    def get_battery_state(supply_path):
+    def get_battery_state(supply_path, reader=DEFAULT_READER):
         """
         @param supply_path: Path to power supply
-        @return: Tuple (energy_full, energy_now, power_now)
+        @param reader: AttributeReader used to read attributes
+        @return: Tuple (energy_full, energy_now, power_now) in uWh and uW, or in uAh and uA if battery reports charge
+        @see: get_rate
         """
         try:
-            energy_now_file = open(os.path.join(supply_path, 'energy_now'), 'r')
-        except IOError:
-            energy_now_file = open(os.path.join(supply_path, 'charge_now'), 'r')
+            energy_now = float(reader.read(supply_path, 'energy_now'))
+            energy_unit = 'uWh'
+        except (IOError, OSError):
+            energy_now = float(reader.read(supply_path, 'charge_now'))
+            energy_unit = 'uAh'
 
         try:
-            energy_full_file = open(os.path.join(supply_path, 'energy_full'), 'r')
-        except IOError:
-            energy_full_file = open(os.path.join(supply_path, 'charge_full'), 'r')
+            energy_full = float(reader.read(supply_path, 'energy_full'))
+        except (IOError, OSError):
+            energy_full = float(reader.read(supply_path, 'charge_full'))
+
+        power_now = current_now = voltage_now = None
+        try:
+            power_now = float(reader.read(supply_path, 'power_now'))
+        except (IOError, OSError):
+            current_now = float(reader.read(supply_path, 'current_now'))
+        if energy_unit == 'uWh' and power_now is None or energy_unit == 'uAh' and current_now is None:
+            voltage_now = float(reader.read(supply_path, 'voltage_now'))
+
+        return energy_full, energy_now, PowerManagement.get_rate(energy_unit, power_now, current_now, voltage_now)
+
+    @classmethod
+    def plan_supply(cls, supply_path, reader=DEFAULT_READER):
+        """
+        @param supply_path: Path to power supply
+        @param reader: AttributeReader used to read attributes
+        @rtype: SupplyPlan
+        @raise: Runtime error if type of power source is not supported
+        """
+        type = cls.power_source_type(supply_path, reader)
+        try:
+            scope = reader.read(supply_path, 'scope')
+        except (IOError, OSError):
+            scope = b'System'
+
+        plan = SupplyPlan(supply_path, type, scope)
+        if type == common.POWER_TYPE_BATTERY:
+            plan.energy_now = 'energy_now' if reader.has(supply_path, 'energy_now') else 'charge_now'
+            plan.energy_full = 'energy_full' if reader.has(supply_path, 'energy_full') else 'charge_full'
+            plan.power_now = 'power_now' if reader.has(supply_path, 'power_now') else None
+        return plan
+
+    def _get_reading_key(self):
+        """
+        Instances read the same values if they read the same root, unless they record history.
+        """
+        if self.history is not None:
+            return self
+        return type(self), self._supply_path
+
+    def invalidate_topology(self):
+        """
+        Makes the next query list and plan power supplies again.
+        """
+        self._topology = None
+
+    def get_topology(self):
+        """
+        Lists and plans power supplies of the root.
+        The result is reused until mtime of the directory changes, the topology is invalidated or gets older than topology_max_age.
+        Unsupported supplies are omitted.
+
+        @return: Tuple of SupplyPlan
+        """
+        mtime = os.stat(self._supply_path).st_mtime
+        now = common.monotonic()
+        topology = self._topology
+        if topology is not None and mtime == self._topology_mtime and \
+                (self._topology_max_age is None or now - self._topology_time <= self._topology_max_age):
+            return topology
+
+        reader = self._reader
+        supply_paths = [os.path.join(self._supply_path, supply) for supply in os.listdir(self._supply_path)]
+        reader.prune(supply_paths)
+
+        plans = []
+        for supply_path in supply_paths:
+            try:
+                reader.refresh(supply_path)
+                plan = self.plan_supply(supply_path, reader)
+            except (RuntimeError, IOError, OSError) as e:
+                self._diagnostics.warn(('plan_supply', supply_path), "Unable to read properties of {0}: {1}".format(supply_path, e))
+                continue
+
+            if plan.type == common.POWER_TYPE_UPS:
+                self._diagnostics.warn(('plan_supply', supply_path), "UPS is not supported.", category=UserWarning)
+            else:
+                plans.append(plan)
 
+        self._topology = topology = tuple(plans)
+        self._topology_mtime = mtime
+        self._topology_time = now
+        return topology
+
+    def get_status(self):
+        """
+        Reads power supplies of the topology once.
+        If there are no batteries or there is an AC adapter online returns common.AC_POWER_STATUS.
+        Otherwise determines power status across all attached batteries.
+        Supplies of the Device scope (e.g. batteries of wireless peripherals) do not power the system and are not read.
+
+        Without batteries of the System scope no attributes are read at all, so time remaining is
+        TIME_REMAINING_UNLIMITED even if no AC adapter reports online, e.g. on servers without any supplies.
+        @see: get_topology
+        """
+        return self._read_supplies()
+
+    def get_power_sources(self):
+        """
+        Returns readings of power supplies of the topology.
+        Energy of batteries is in uWh, or in uAh if they report charge, and power is in the same unit per hour.
+        @see: get_status_and_power_sources
+        """
+        return self.get_status_and_power_sources()[1]
+
+    def get_status_and_power_sources(self):
+        """
+        Reads every power supply of the topology once, producing the status and a record of each supply in the same pass.
+        Unlike get_status it does not stop at the first AC adapter online and records supplies of the Device scope,
+        which are not accounted in the status.
+        @see: get_status
+        @see: get_topology
+        """
+        power_sources = []
+        status = self._read_supplies(power_sources)
+        return status, tuple(power_sources)
+
+    def _read_supplies(self, power_sources=None):
+        """
+        @param power_sources: List that PowerSourceInfo of each supply is appended to.
+            If None, reading stops at the first AC adapter online
+        @rtype: common.PowerStatus
+        """
+        topology = self.get_topology()
+        has_batteries = any(plan.type == common.POWER_TYPE_BATTERY and plan.scope != b'Device' for plan in topology)
+        if power_sources is None and not has_batteries:
+            if self.history is not None:
+                self.history.clear()
+            return common.AC_POWER_STATUS
+
+        reader = self._reader
+        batteries = []
+        is_ac_online = False
+        for plan in topology:
+            is_system = plan.scope != b'Device'
+            if not is_system and power_sources is None:
+                continue
+
+            supply_path = plan.path
+            try:
+                reader.refresh(supply_path)
+                if plan.type == common.POWER_TYPE_AC:
+                    is_online = self.is_ac_online(supply_path, reader)
+                    if power_sources is not None:
+                        power_sources.append(common.PowerSourceInfo(
+                            os.path.basename(supply_path), plan.type, is_online, scope=plan.scope.decode('ascii', 'replace')))
+                    if is_online and is_system:
+                        is_ac_online = True
+                        if power_sources is None:
+                            break
+                elif self.is_battery_present(supply_path, reader):
+                    battery_status = reader.read(supply_path, 'status')
+                    is_discharging = battery_status == b'Discharging'
+                    energy_now = float(reader.read(supply_path, plan.energy_now))
+                    energy_full = float(reader.read(supply_path, plan.energy_full))
+                    energy_unit = 'uWh' if plan.energy_now == 'energy_now' else 'uAh'
+                    power_now = current_now = voltage_now = None
+                    if plan.power_now is not None:
+                        power_now = float(reader.read(supply_path, plan.power_now))
+                        if power_sources is not None or energy_unit == 'uAh':
+                            voltage_now = self._read_optional(supply_path, 'voltage_now')
+                    else:
+                        current_now = float(reader.read(supply_path, 'current_now'))
+                        voltage_now = float(reader.read(supply_path, 'voltage_now'))
+                    rate = self.get_rate(energy_unit, power_now, current_now, voltage_now)
+                    # Time remaining of a battery which rate is unknown cannot be estimated
+                    if is_system:
+                        batteries.append((energy_full, energy_now, rate if rate is not None else 0.0, is_discharging))
+                    if power_sources is not None:
+                        power_sources.append(common.PowerSourceInfo(
+                            os.path.basename(supply_path), plan.type, True, is_discharging, energy_now, energy_full, rate,
+                            plan.scope.decode('ascii', 'replace'), battery_status.decode('ascii', 'replace'),
+                            voltage_now, self._read_optional(supply_path, 'capacity'), energy_unit))
+                elif power_sources is not None:
+                    power_sources.append(common.PowerSourceInfo(
+                        os.path.basename(supply_path), plan.type, False, scope=plan.scope.decode('ascii', 'replace')))
+            except (IOError, OSError) as e:
+                # Other errors, e.g. EIO of a faulty battery, do not change the topology
+                if e.errno in (errno.ENOENT, errno.ENODEV):
+                    self.invalidate_topology()
+                self._diagnostics.warn(('get_status', supply_path), "Unable to read properties of {0}: {1}".format(supply_path, e))
+            except ValueError as e:
+                self._diagnostics.warn(('get_status', supply_path), "Unable to read properties of {0}: {1}".format(supply_path, e))
+
+        if is_ac_online or not has_batteries:
+            status = common.AC_POWER_STATUS
+        else:
+            status = common.get_batteries_status(batteries)
+
+        if self.history is not None:
+            if status.power_source_type == common.POWER_TYPE_BATTERY:
+                self.history.append(
+                    sum(battery[1] for battery in batteries),
+                    sum(battery[2] for battery in batteries if battery[3])
+                )
+            else:
+                self.history.clear()
+        return status
+
+    @staticmethod
+    def get_rate(energy_unit, power_now=None, current_now=None, voltage_now=None):
+        """
+        @param energy_unit: 'uWh' or 'uAh'
+        @param power_now: Value of power_now in uW or None
+        @param current_now: Value of current_now in uA or None
+        @param voltage_now: Value of voltage_now in uV or None
+        @return: Rate of discharge in energy_unit per hour, i.e. uW or uA, or None if it cannot be converted
+        """
+        if energy_unit == 'uWh':
+            if power_now is not None:
+                return power_now
+            elif current_now is not None and voltage_now is not None:
+                return current_now * voltage_now / 1000000
+        else:
+            if current_now is not None:
+                return current_now
+            elif power_now is not None and voltage_now:
+                return power_now / voltage_now * 1000000
+        return None
+
+    def _read_optional(self, supply_path, name):
+        """
+        @return: Value of the numeric attribute or None if supply does not have it
+        """
         try:
-            with open(os.path.join(supply_path, 'power_now'), 'r') as power_now_file:
-                    power_now = float(power_now_file.readline().strip())
-        except IOError:
-            with open(os.path.join(supply_path, 'voltage_now'), 'r') as voltage_now_file:
-                with open(os.path.join(supply_path, 'current_now'), 'r') as current_now_file:
-                        power_now = float(current_now_file.readline().strip()) * float(voltage_now_file.readline().strip()) / 10000000
-
-        with energy_now_file:
-            with energy_full_file:
-                energy_now = float(energy_now_file.readline().strip())
-                energy_full = float(energy_full_file.readline().strip())
-                return energy_full, energy_now, power_now
+            return float(self._reader.read(supply_path, name))
+        except (IOError, OSError, ValueError):
+            return None
 
     def get_providing_power_source_type(self):
         """
-        Looks through all power supplies in POWER_SUPPLY_PATH.
         If there is an AC adapter online returns POWER_TYPE_AC.
         If there is a discharging battery, returns POWER_TYPE_BATTERY.
-        Since the order of supplies is arbitrary, whatever found first is returned.
+        @see: get_status
         """
-        for supply in os.listdir(POWER_SUPPLY_PATH):
-            supply_path = os.path.join(POWER_SUPPLY_PATH, supply)
-            try:
-                type = self.power_source_type(supply_path)
-                if type == common.POWER_TYPE_AC:
-                    if self.is_ac_online(supply_path):
-                        return common.POWER_TYPE_AC
-                elif type == common.POWER_TYPE_BATTERY:
-                    if self.is_battery_present(supply_path) and self.is_battery_discharging(supply_path):
-                        return common.POWER_TYPE_BATTERY
-                else:
-                    warnings.warn("UPS is not supported.")
-            except (RuntimeError, IOError) as e:
-                warnings.warn("Unable to read properties of {0}: {1}".format(supply_path, e), category=RuntimeWarning)
-
-        return common.POWER_TYPE_AC
+        return self.get_status().power_source_type
 
     def get_low_battery_warning_level(self):
         """
-        Looks through all power supplies in POWER_SUPPLY_PATH.
-        If there is an AC adapter online returns POWER_TYPE_AC returns LOW_BATTERY_WARNING_NONE.
+        If there is an AC adapter online returns LOW_BATTERY_WARNING_NONE.
         Otherwise determines total percentage and time remaining across all attached batteries.
+        @see: get_status
         """
-        all_energy_full = []
-        all_energy_now = []
-        all_power_now = []
-        for supply in os.listdir(POWER_SUPPLY_PATH):
-            supply_path = os.path.join(POWER_SUPPLY_PATH, supply)
-            try:
-                type = self.power_source_type(supply_path)
-                if type == common.POWER_TYPE_AC:
-                    if self.is_ac_online(supply_path):
-                        return common.LOW_BATTERY_WARNING_NONE
-                elif type == common.POWER_TYPE_BATTERY:
-                    if self.is_battery_present(supply_path) and self.is_battery_discharging(supply_path):
-                        energy_full, energy_now, power_now = self.get_battery_state(supply_path)
-                        all_energy_full.append(energy_full)
-                        all_energy_now.append(energy_now)
-                        all_power_now.append(power_now)
-                else:
-                    warnings.warn("UPS is not supported.")
-            except (RuntimeError, IOError) as e:
-                warnings.warn("Unable to read properties of {0}: {1}".format(supply_path, e), category=RuntimeWarning)
+        return self.get_status().low_battery_warning_level
+
+    def get_time_remaining_estimate(self, smoothed=False):
+        """
+        Returns total time remaining estimate of all batteries
+        or TIME_REMAINING_UNLIMITED if ac power supply is online.
+
+        @param smoothed: Whether total energy is divided by the discharge rate smoothed over history of readings
+            instead of the current power. Starts recording history if it's not yet.
+        @see: get_status
+        @see: ReadingHistory
+        """
+        if smoothed and self.history is None:
+            self.history = ReadingHistory()
+
+        status = self.get_status()
+        if smoothed and status.power_source_type == common.POWER_TYPE_BATTERY:
+            time_remaining = self.history.get_time_remaining_estimate()
+            if time_remaining != common.TIME_REMAINING_UNKNOWN:
+                return time_remaining
+        return status.time_remaining_estimate
+
+    def on_uevent(self, properties):
+        """
+        Called by uevent_listener in response to the uevent of a power supply.
+        Observers are notified only if power status did change or a supply was added or removed.
+        If uevents were lost, supplies are enumerated again and observers are notified as if they were changed.
+
+        @param properties: Properties of the uevent
+        """
+        topology_changed = properties.get('ACTION') in UEVENT_TOPOLOGY_ACTIONS
+        if topology_changed:
+            self.invalidate_topology()
 
         try:
-            total_percentage = sum(all_energy_full) / sum(all_energy_now)
-            total_time = sum([energy_now / power_now * 60.0 for energy_now, power_now in zip(all_energy_now, all_power_now)])
-            if total_time <= 10.0:
-                return common.LOW_BATTERY_WARNING_FINAL
-            elif total_percentage <= 22.0:
-                return common.LOW_BATTERY_WARNING_EARLY
-            else:
-                return common.LOW_BATTERY_WARNING_NONE
-        except ZeroDivisionError as e:
-            warnings.warn("Unable to calculate low battery level: {0}".format(e), category=RuntimeWarning)
-            return common.LOW_BATTERY_WARNING_NONE
+            self._invalidate_status()
+            status = self.get_status()
+        except Exception as e:
+            warnings.warn("Unable to get power status: {0}".format(e), category=RuntimeWarning)
+            return
+
+        previous_status, self._observed_status = self._observed_status, status
+        if previous_status is not None:
+            self._notify_observers(previous_status, status, power_sources_changed=topology_changed)
 
-    def get_time_remaining_estimate(self):
+    def fileno(self):
         """
-        Looks through all power sources and returns total time remaining estimate
-        or TIME_REMAINING_UNLIMITED if ac power supply is online.
+        Returns descriptor of a netlink socket of kernel uevents owned by the instance, so no thread is involved.
+        It becomes readable on every uevent of a power supply, e.g. periodic update of capacity,
+        while drain_events counts only changes of status.
+        Falls back to the self-pipe of observers if uevents are not available.
+        @see: common.PowerManagementBase.fileno
         """
-        all_energy_now = []
-        all_energy_not_discharging = []
-        all_power_now = []
-        for supply in os.listdir(POWER_SUPPLY_PATH):
-            supply_path = os.path.join(POWER_SUPPLY_PATH, supply)
-            try:
-                type = self.power_source_type(supply_path)
-                if type == common.POWER_TYPE_AC:
-                    if self.is_ac_online(supply_path):
-                        return common.TIME_REMAINING_UNLIMITED
-                elif type == common.POWER_TYPE_BATTERY:
-                    if self.is_battery_present(supply_path) and self.is_battery_discharging(supply_path):
-                        energy_full, energy_now, power_now = self.get_battery_state(supply_path)
-                        all_energy_now.append(energy_now)
-                        all_power_now.append(power_now)
-                    elif self.is_battery_present(supply_path) and not self.is_battery_discharging(supply_path):
-                        energy_now = self.get_battery_state(supply_path)[1]
-                        all_energy_not_discharging.append(energy_now)
-                else:
-                    warnings.warn("UPS is not supported.")
-            except (RuntimeError, IOError) as e:
-                warnings.warn("Unable to read properties of {0}: {1}".format(supply_path, e), category=RuntimeWarning)
-
-        if len(all_energy_now) > 0:
+        if self._uevent_socket is None and self._event_pipe is None:
             try:
-                return sum([energy_now / power_now * 60.0 for energy_now, power_now in zip(all_energy_now, all_power_now)])\
-                    + sum(all_energy_not_discharging) / (sum(all_power_now) / len(all_power_now)) * 60.0
-            except ZeroDivisionError as e:
-                warnings.warn("Unable to calculate time remaining estimate: {0}".format(e), category=RuntimeWarning)
-                return common.TIME_REMAINING_UNKNOWN
-        else:
-            return common.TIME_REMAINING_UNKNOWN
+                uevent_socket = self.uevent_listener.create_socket()
+                uevent_socket.setblocking(False)
+            except (IOError, OSError) as e:
+                warnings.warn("Unable to receive uevents, falling back to observing: {0}".format(e), category=RuntimeWarning)
+            else:
+                self._uevent_socket = uevent_socket
+                try:
+                    self._drained_status = self.get_status()
+                except Exception as e:
+                    warnings.warn("Unable to get power status: {0}".format(e), category=RuntimeWarning)
+
+        if self._uevent_socket is not None:
+            return self._uevent_socket.fileno()
+        return super(PowerManagement, self).fileno()
+
+    def drain_events(self):
+        """
+        Receives pending uevents of power supplies and reads status again if there were any.
+        If uevents were lost due to overflow of the socket, supplies are enumerated again as well.
+        Observers are not notified.
+
+        @return: Number of notifications observers would receive for the change of status since the last call
+        @see: common.PowerManagementBase.drain_events
+        """
+        if self._uevent_socket is None:
+            return super(PowerManagement, self).drain_events()
+
+        events = self.uevent_listener.receive_events(self._uevent_socket)
+        if not events:
+            return 0
+
+        topology_changed = any(event.get('ACTION') in UEVENT_TOPOLOGY_ACTIONS for event in events)
+        if topology_changed:
+            self.invalidate_topology()
+        try:
+            self._invalidate_status()
+            status = self.get_status()
+        except Exception as e:
+            warnings.warn("Unable to get power status: {0}".format(e), category=RuntimeWarning)
+            return 0
+
+        previous_status, self._drained_status = self._drained_status, status
+        if previous_status is None:
+            return 1
+        return sum(self._get_changes(previous_status, status, topology_changed))
+
+    def close_events(self):
+        uevent_socket, self._uevent_socket = self._uevent_socket, None
+        self._drained_status = None
+        if uevent_socket is not None:
+            uevent_socket.close()
+        super(PowerManagement, self).close_events()
 
     def add_observer(self, observer):
-        warnings.warn("Current system does not support observing.")
-        pass
+        """
+        Subscribes to kernel uevents of the power_supply subsystem when first observer is added.
+        Falls back to polling if uevents are not available, e.g. netlink is restricted.
+        @see: UeventListener
+        @see: common.PowerManagementPoller
+        """
+        super(PowerManagement, self).add_observer(observer)
+        if len(self._weak_observers) == 1:
+            try:
+                self._observed_status = self.get_status()
+                try:
+                    self.uevent_listener.add_observer(self)
+                    self._notifications_source = self.uevent_listener
+                except (IOError, OSError) as e:
+                    warnings.warn("Unable to observe uevents, falling back to polling: {0}".format(e), category=RuntimeWarning)
+                    self.poller.add_observer(self)
+                    self._notifications_source = self.poller
+            except:
+                super(PowerManagement, self).remove_observer(observer)
+                raise
 
     def remove_observer(self, observer):
-        warnings.warn("Current system does not support observing.")
-        pass
+        """
+        Unsubscribes from notifications source when last observer is removed.
+        """
+        super(PowerManagement, self).remove_observer(observer)
+        if len(self._weak_observers) == 0:
+            self._notifications_source.remove_observer(self)
+            self._notifications_source = None
+            self._observed_status = None
+
+
+RootSnapshot = namedtuple('RootSnapshot', ['root', 'status', 'error', 'duration'])
+
+
+class MultiRootMonitor(object):
+    """
+    Queries power status of several sysfs roots concurrently on a bounded thread pool.
+
+    A root that does not respond within timeout is reported with TimeoutError and is not queried again
+    until its pending query finishes, so a hung mount occupies at most one worker.
+    Requires concurrent.futures (the futures package on Python 2).
+
+    Usage:
+        with MultiRootMonitor(['/sys', '/host/sys'], max_workers=4, timeout=1.0) as monitor:
+            for root, snapshot in monitor.get_snapshots().items():
+                print(root, snapshot.status, snapshot.error)
+    """
+    def __init__(self, roots, max_workers=4, timeout=1.0, **kwargs):
+        """
+        @param roots: Iterable of sysfs mount points
+        @param max_workers: Maximum number of concurrently queried roots
+        @param timeout: Seconds to wait for all roots
+        @param kwargs: Parameters passed to PowerManagement of each root
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        super(MultiRootMonitor, self).__init__()
+        self.roots = tuple(roots)
+        self.timeout = timeout
+        self._kwargs = kwargs
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._power_managements = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """
+        Stops accepting queries. Pending queries are not waited for.
+        """
+        self._executor.shutdown(wait=False)
+
+    def get_power_management(self, root):
+        """
+        @return: PowerManagement of root, created on first use
+        @raise: RuntimeError if power supplies of root cannot be read
+        """
+        with self._lock:
+            power_management = self._power_managements.get(root)
+        if power_management is None:
+            power_management = PowerManagement(root=root, **self._kwargs)
+            with self._lock:
+                power_management = self._power_managements.setdefault(root, power_management)
+        return power_management
+
+    def _get_snapshot(self, root):
+        start = common.monotonic()
+        try:
+            status = self.get_power_management(root).get_status()
+        except Exception as e:
+            return RootSnapshot(root, None, e, common.monotonic() - start)
+        return RootSnapshot(root, status, None, common.monotonic() - start)
+
+    def get_snapshots(self):
+        """
+        @return: OrderedDict of root to RootSnapshot. Either status or error of each snapshot is None
+        """
+        from concurrent.futures import wait, TimeoutError
+
+        with self._lock:
+            futures = []
+            for root in self.roots:
+                future = self._pending.get(root)
+                if future is None or future.done():
+                    future = self._pending[root] = self._executor.submit(self._get_snapshot, root)
+                futures.append(future)
+
+        wait(futures, timeout=self.timeout)
+
+        snapshots = OrderedDict()
+        for root, future in zip(self.roots, futures):
+            if future.done():
+                snapshots[root] = future.result()
+            else:
+                snapshots[root] = RootSnapshot(root, None, TimeoutError("{0} did not respond in {1}s".format(root, self.timeout)), None)
+        return snapshots
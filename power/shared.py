@@ -0,0 +1,357 @@
+# coding=utf-8
+"""
+Shares power status between processes of a host through a memory-mapped file.
+
+A single Publisher (e.g. in the master of a pre-forked pool or in a sidecar) polls the platform
+and writes snapshots of fixed layout into the file. Any number of readers serve getters from the mapping
+without system calls, so I/O of the platform does not grow with the number of processes.
+
+Snapshots are guarded by a seqlock: the writer makes the sequence odd before the update and even after it,
+readers retry until they read the same even sequence before and after copying the payload.
+
+Usage:
+    python -m power.shared --interval 1
+
+    from power import shared
+    pm = shared.PowerManagement(max_age=5.0)
+    pm.get_time_remaining_estimate()
+"""
+from __future__ import print_function
+
+import argparse
+from collections import namedtuple
+import errno
+import mmap
+import os
+import stat
+import struct
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+import power
+from power import common
+
+
+__all__ = [
+    'PowerManagement',
+    'Publisher',
+    'Snapshot',
+    'SnapshotSegment'
+    ]
+
+
+def get_default_path():
+    """
+    @return: Path of the segment in /dev/shm if available, otherwise in the temporary directory. Unique per user
+    """
+    directory = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    uid = os.getuid() if hasattr(os, 'getuid') else 0
+    return os.path.join(directory, 'power-{0}.snapshot'.format(uid))
+
+
+MAGIC = b'PWRS'
+
+LAYOUT_VERSION = 1
+
+# magic, layout version, sequence
+HEADER = struct.Struct('<4sIQ')
+
+SEQUENCE_OFFSET = 8
+
+# power source type, low battery warning level, time remaining estimate, unix time of publishing
+PAYLOAD = struct.Struct('<iidd')
+
+SEGMENT_SIZE = HEADER.size + PAYLOAD.size
+
+SEQUENCE = struct.Struct('<Q')
+
+O_NOFOLLOW = getattr(os, 'O_NOFOLLOW', 0)
+
+
+class Snapshot(namedtuple('Snapshot', ['status', 'timestamp'])):
+    """
+    @ivar status: Published PowerStatus
+    @ivar timestamp: Unix time when status was published
+    """
+    __slots__ = ()
+
+
+class SnapshotSegment(object):
+    """
+    Memory-mapped file of SEGMENT_SIZE bytes that holds the last snapshot.
+    Only one writer may open it at a time: writable segment holds an exclusive flock until closed.
+
+    Symbolic links are not followed and the file must be a regular file of owner
+    that is not writable by group or others, so another local user cannot substitute it.
+    """
+    def __init__(self, path=None, writable=False, owner=None):
+        """
+        @param path: Path to the file. By default get_default_path()
+        @param writable: Whether the file is created and opened for writing
+        @param owner: Uid the file must belong to. By default uid of the process
+        @raise: EnvironmentError if file cannot be opened, ValueError if it's not a segment or cannot be trusted,
+            RuntimeError if it's writable and another writer holds it
+        """
+        super(SnapshotSegment, self).__init__()
+        self.path = path if path is not None else get_default_path()
+        self.writable = writable
+        self.owner = owner if owner is not None or not hasattr(os, 'getuid') else os.getuid()
+
+        if writable:
+            try:
+                fd = os.open(self.path, os.O_RDWR | os.O_CREAT | os.O_EXCL | O_NOFOLLOW, 0o644)
+            except OSError as e:
+                if e.errno != errno.EEXIST:
+                    raise
+                fd = os.open(self.path, os.O_RDWR | O_NOFOLLOW)
+        else:
+            fd = os.open(self.path, os.O_RDONLY | O_NOFOLLOW)
+        try:
+            file_stat = os.fstat(fd)
+            self._check_stat(file_stat)
+            if writable:
+                self._lock(fd)
+                if file_stat.st_size < SEGMENT_SIZE:
+                    os.ftruncate(fd, SEGMENT_SIZE)
+            elif file_stat.st_size < SEGMENT_SIZE:
+                raise ValueError("{0} is not a power snapshot".format(self.path))
+            self._map = mmap.mmap(fd, SEGMENT_SIZE, access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+        except:
+            os.close(fd)
+            raise
+
+        # Lock of the writer is released when descriptor is closed
+        if writable:
+            self._fd = fd
+        else:
+            self._fd = None
+            os.close(fd)
+
+        magic, version, sequence = HEADER.unpack_from(self._map)
+        if writable:
+            # Continue sequence of the previous writer, skipping an update it did not finish
+            HEADER.pack_into(self._map, 0, MAGIC, LAYOUT_VERSION, sequence + (sequence & 1) if magic == MAGIC else 0)
+        elif magic != MAGIC or version != LAYOUT_VERSION:
+            self.close()
+            raise ValueError("{0} is not a power snapshot".format(self.path))
+
+    def _check_stat(self, file_stat):
+        """
+        @raise: ValueError if the file cannot be trusted
+        """
+        if not stat.S_ISREG(file_stat.st_mode):
+            raise ValueError("{0} is not a regular file".format(self.path))
+        elif self.owner is not None and file_stat.st_uid != self.owner:
+            raise ValueError("{0} is owned by uid {1} instead of {2}".format(self.path, file_stat.st_uid, self.owner))
+        elif file_stat.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+            raise ValueError("{0} is writable by group or others".format(self.path))
+
+    def _lock(self, fd):
+        """
+        @raise: RuntimeError if another writer holds the file
+        """
+        if fcntl is None:
+            return
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except (IOError, OSError) as e:
+            if e.errno in (errno.EAGAIN, errno.EWOULDBLOCK, errno.EACCES):
+                raise RuntimeError("{0} is written by another process".format(self.path))
+            raise
+
+    def close(self):
+        self._map.close()
+        fd, self._fd = self._fd, None
+        if fd is not None:
+            os.close(fd)
+
+    def write(self, status, timestamp=None):
+        """
+        @param status: PowerStatus to publish
+        @param timestamp: Unix time of the status. By default time.time()
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        sequence = SEQUENCE.unpack_from(self._map, SEQUENCE_OFFSET)[0]
+        SEQUENCE.pack_into(self._map, SEQUENCE_OFFSET, sequence + 1)
+        PAYLOAD.pack_into(self._map, HEADER.size, status.power_source_type, status.low_battery_warning_level,
+                          status.time_remaining_estimate, timestamp)
+        SEQUENCE.pack_into(self._map, SEQUENCE_OFFSET, sequence + 2)
+
+    def read(self, retries=100):
+        """
+        @param retries: Number of attempts to read while the writer is updating the snapshot
+        @return: Snapshot or None if nothing was published yet or the writer did not finish in time
+        """
+        for _ in range(retries):
+            sequence = SEQUENCE.unpack_from(self._map, SEQUENCE_OFFSET)[0]
+            if sequence & 1:
+                continue
+            power_source_type, low_battery_warning_level, time_remaining_estimate, timestamp = PAYLOAD.unpack_from(self._map, HEADER.size)
+            if SEQUENCE.unpack_from(self._map, SEQUENCE_OFFSET)[0] == sequence:
+                if not sequence:
+                    return None
+                return Snapshot(common.PowerStatus(power_source_type, low_battery_warning_level, time_remaining_estimate), timestamp)
+        return None
+
+
+class Publisher(common.PowerManagementObserver):
+    """
+    Publishes status of power_management into the segment every interval seconds and whenever observers are notified.
+    Failed reads are not published, so readers see the snapshot aging.
+    """
+    def __init__(self, power_management=None, path=None, interval=1.0):
+        """
+        @param power_management: Instance of PowerManagement. By default new power.PowerManagement is created
+            with raise_errors, so that its fallback status is not published
+        @param path: Path to the segment. By default get_default_path()
+        @param interval: Seconds between publications
+        """
+        super(Publisher, self).__init__()
+        self.power_management = power_management if power_management is not None else power.PowerManagement(raise_errors=True)
+        self.segment = SnapshotSegment(path, writable=True)
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._diagnostics = common.RateLimitedWarnings()
+
+    def publish(self):
+        """
+        Reads status once and writes it into the segment.
+        """
+        try:
+            status = self.power_management.get_status()
+        except Exception:
+            self._diagnostics.warn('publish', "Unable to get power status", exc_info=True)
+            return
+        with self._lock:
+            self.segment.write(status)
+
+    def on_power_sources_change(self, power_management):
+        self.publish()
+
+    def on_time_remaining_change(self, power_management):
+        self.publish()
+
+    def start(self):
+        """
+        Publishes once, observes power_management and spawns thread that publishes every interval seconds.
+        """
+        if self._thread is not None:
+            return
+        self.publish()
+        self.power_management.add_observer(self)
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self.run_publishing_thread, name='power.shared.Publisher')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops spawned thread and observing.
+        """
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop_event.set()
+            thread.join()
+            self.power_management.remove_observer(self)
+
+    def run_publishing_thread(self):
+        """Main method of the spawned thread."""
+        while not self._stop_event.wait(self.interval):
+            self.publish()
+
+
+class PowerManagement(common.PollingObserverMixin, common.PowerManagementBase):
+    """
+    Serves status published by Publisher in another process.
+    If segment does not exist, nothing was published or snapshot is older than max_age,
+    status is read from fallback, or RuntimeError is raised if there is none.
+    """
+    def __init__(self, path=None, max_age=None, fallback=None, owner=None):
+        """
+        @param path: Path to the segment. By default get_default_path()
+        @param max_age: Maximum age of snapshot in seconds. None to accept snapshot of any age
+        @param fallback: PowerManagement used when there is no fresh snapshot
+        @param owner: Uid of the publisher. By default uid of the process
+        """
+        super(PowerManagement, self).__init__()
+        self.path = path if path is not None else get_default_path()
+        self.max_age = max_age
+        self.fallback = fallback
+        self.owner = owner
+        self._segment = None
+
+    def get_snapshot(self):
+        """
+        @return: Snapshot or None if there is no fresh one
+        """
+        if self._segment is None:
+            try:
+                self._segment = SnapshotSegment(self.path, owner=self.owner)
+            except (EnvironmentError, ValueError):
+                return None
+
+        snapshot = self._segment.read()
+        if snapshot is None or (self.max_age is not None and time.time() - snapshot.timestamp > self.max_age):
+            return None
+        return snapshot
+
+    def get_status(self):
+        """
+        Returns published status.
+        """
+        snapshot = self.get_snapshot()
+        if snapshot is not None:
+            return snapshot.status
+        elif self.fallback is not None:
+            return self.fallback.get_status()
+        else:
+            raise RuntimeError("No fresh power status is published at {0}".format(self.path))
+
+    def get_providing_power_source_type(self):
+        """
+        @see: get_status
+        """
+        return self.get_status().power_source_type
+
+    def get_low_battery_warning_level(self):
+        """
+        @see: get_status
+        """
+        return self.get_status().low_battery_warning_level
+
+    def get_time_remaining_estimate(self):
+        """
+        @see: get_status
+        """
+        return self.get_status().time_remaining_estimate
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Publishes power status for readers in other processes.")
+    parser.add_argument('--path', default=get_default_path(), help="Path to the segment")
+    parser.add_argument('--interval', type=float, default=1.0, help="Seconds between publications")
+    args = parser.parse_args(argv)
+
+    publisher = Publisher(path=args.path, interval=args.interval)
+    publisher.start()
+    print("Publishing power status at {0}".format(args.path))
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        publisher.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -2,11 +2,10 @@
 """
 Implements PowerManagement functions using GetSystemPowerStatus.
 Requires Windows XP+.
-Observing is not supported
+Observing is implemented by polling.
 """
 import ctypes
 from ctypes import wintypes
-import warnings
 
 from power import common
 
@@ -43,17 +42,35 @@ POWER_TYPE_MAP = {
 }
 
 
-class PowerManagement(common.PowerManagementBase):
-    def get_providing_power_source_type(self):
+class PowerManagement(common.PollingObserverMixin, common.PowerManagementBase):
+    def get_status(self):
         """
-        Returns GetSystemPowerStatus().ACLineStatus
+        Calls GetSystemPowerStatus once and derives all values from its result.
 
         @raise: WindowsError if any underlying error occures.
         """
         power_status = SYSTEM_POWER_STATUS()
         if not GetSystemPowerStatus(ctypes.pointer(power_status)):
             raise ctypes.WinError()
-        return POWER_TYPE_MAP[power_status.ACLineStatus]
+
+        if POWER_TYPE_MAP[power_status.ACLineStatus] == common.POWER_TYPE_AC:
+            return common.AC_POWER_STATUS
+
+        if power_status.BatteryLifeTime == -1:
+            time_remaining = common.TIME_REMAINING_UNKNOWN
+        else:
+            time_remaining = float(power_status.BatteryLifeTime) / 60.0
+
+        warning_level = common.get_low_battery_warning_level(float(power_status.BatteryLifePercent), time_remaining)
+        return common.PowerStatus(common.POWER_TYPE_BATTERY, warning_level, time_remaining)
+
+    def get_providing_power_source_type(self):
+        """
+        Returns GetSystemPowerStatus().ACLineStatus
+
+        @raise: WindowsError if any underlying error occures.
+        """
+        return self.get_status().power_source_type
 
     def get_low_battery_warning_level(self):
         """
@@ -61,39 +78,10 @@ class PowerManagement(common.PowerManagementBase):
 
         @raise WindowsError if any underlying error occures.
         """
-        power_status = SYSTEM_POWER_STATUS()
-        if not GetSystemPowerStatus(ctypes.pointer(power_status)):
-            raise ctypes.WinError()
-
-        if POWER_TYPE_MAP[power_status.ACLineStatus] == common.POWER_TYPE_AC:
-            return common.LOW_BATTERY_WARNING_NONE
-        else:
-            if power_status.BatteryLifeTime != -1 and power_status.BatteryLifeTime <= 600:
-                return common.LOW_BATTERY_WARNING_FINAL
-            elif power_status.BatteryLifePercent <= 22:
-                return common.LOW_BATTERY_WARNING_EARLY
-            else:
-                return common.LOW_BATTERY_WARNING_NONE
+        return self.get_status().low_battery_warning_level
 
     def get_time_remaining_estimate(self):
         """
         Returns time remaining estimate according to GetSystemPowerStatus().BatteryLifeTime
         """
-        power_status = SYSTEM_POWER_STATUS()
-        if not GetSystemPowerStatus(ctypes.pointer(power_status)):
-            raise ctypes.WinError()
-
-        if POWER_TYPE_MAP[power_status.ACLineStatus] == common.POWER_TYPE_AC:
-            return common.TIME_REMAINING_UNLIMITED
-        elif power_status.BatteryLifeTime == -1:
-            return common.TIME_REMAINING_UNKNOWN
-        else:
-            return float(power_status.BatteryLifeTime) / 60.0
-
-    def add_observer(self, observer):
-        warnings.warn("Current system does not support observing.")
-        pass
-
-    def remove_observer(self, observer):
-        warnings.warn("Current system does not support observing.")
-        pass
+        return self.get_status().time_remaining_estimate
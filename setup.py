@@ -78,7 +78,14 @@ setup(
     install_requires=REQUIREMENTS,
     tests_require=TEST_REQUIREMENTS,
     extras_require={
-        'tests': TEST_REQUIREMENTS
+        'tests': TEST_REQUIREMENTS,
+        'fleet': ['numpy'],
+        'governor': ['futures; python_version < "3"'],
+    },
+    entry_points={
+        'console_scripts': [
+            'power = power.__main__:main',
+        ]
     },
     cmdclass={'test': PyTest}
 )
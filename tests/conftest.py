@@ -0,0 +1,8 @@
+# coding=utf-8
+import sys
+
+
+collect_ignore = []
+
+if sys.version_info < (3, 5):
+    collect_ignore.append('test_aio.py')
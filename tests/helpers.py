@@ -0,0 +1,71 @@
+# coding=utf-8
+"""
+Doubles shared by test modules.
+"""
+import threading
+import time
+
+import power
+from power import common
+
+
+class PowerManagementStub(common.PollingObserverMixin, common.PowerManagementBase):
+    def __init__(self, status=common.AC_POWER_STATUS, poller=None):
+        super(PowerManagementStub, self).__init__()
+        self.status = status
+        if poller is not None:
+            self.poller = poller
+
+    def get_status(self):
+        return self.status
+
+    def get_providing_power_source_type(self):
+        return self.status.power_source_type
+
+    def get_low_battery_warning_level(self):
+        return self.status.low_battery_warning_level
+
+    def get_time_remaining_estimate(self):
+        return self.status.time_remaining_estimate
+
+
+class PowerManagementCounting(PowerManagementStub):
+    def __init__(self, *args, **kwargs):
+        super(PowerManagementCounting, self).__init__(*args, **kwargs)
+        self.calls = 0
+        self.error = None
+
+    def get_status(self):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return super(PowerManagementCounting, self).get_status()
+
+    def get_power_sources(self):
+        return (
+            common.PowerSourceInfo('AC', power.POWER_TYPE_AC, False),
+            common.PowerSourceInfo('BAT0', power.POWER_TYPE_BATTERY, True, True, 50000.0, 100000.0, 25000.0),
+        )
+
+
+class RecordingObserver(power.PowerManagementObserver):
+    def __init__(self):
+        self.changes = []
+        self.condition = threading.Condition()
+
+    def on_power_sources_change(self, power_management):
+        with self.condition:
+            self.changes.append('power_sources')
+            self.condition.notify_all()
+
+    def on_time_remaining_change(self, power_management):
+        with self.condition:
+            self.changes.append('time_remaining')
+            self.condition.notify_all()
+
+    def wait_for_changes(self, count, timeout=5.0):
+        with self.condition:
+            deadline = time.time() + timeout
+            while len(self.changes) < count and time.time() < deadline:
+                self.condition.wait(deadline - time.time())
+            return len(self.changes) >= count
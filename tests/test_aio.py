@@ -0,0 +1,146 @@
+# coding=utf-8
+from __future__ import print_function
+
+import asyncio
+import threading
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+import power.common
+from power.aio import AsyncPowerManagement, PowerEvent, POWER_SOURCES_CHANGE, TIME_REMAINING_CHANGE
+from tests.helpers import PowerManagementStub
+
+
+class TestAsyncPowerManagement(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+        self.poller = power.common.PowerManagementPoller(ac_interval=0.01, battery_interval=0.01, early_interval=0.01, final_interval=0.01)
+
+    def test_getters(self):
+        pm = AsyncPowerManagement(PowerManagementStub())
+
+        async def get_all():
+            return (await pm.get_status(),
+                    await pm.get_providing_power_source_type(),
+                    await pm.get_low_battery_warning_level(),
+                    await pm.get_time_remaining_estimate())
+
+        self.assertEqual(self.loop.run_until_complete(get_all()),
+                         (power.common.AC_POWER_STATUS, power.POWER_TYPE_AC, power.LOW_BATTERY_WARNING_NONE, power.TIME_REMAINING_UNLIMITED))
+
+    def test_watch(self):
+        stub = PowerManagementStub(poller=self.poller)
+        pm = AsyncPowerManagement(stub)
+
+        async def watch():
+            async with pm.watch() as first, pm.watch() as second:
+                self.assertEqual(len(stub._weak_observers), 1)
+                stub.status = power.PowerStatus(power.POWER_TYPE_BATTERY, power.LOW_BATTERY_WARNING_NONE, 60.0)
+                events = []
+                async for event in first:
+                    events.append(event.kind)
+                    if len(events) == 2:
+                        break
+                second_event = await asyncio.wait_for(second.__anext__(), 5.0)
+                return events, second_event.kind
+
+        events, second_event = self.loop.run_until_complete(asyncio.wait_for(watch(), 5.0))
+        self.assertEqual(events, [POWER_SOURCES_CHANGE, TIME_REMAINING_CHANGE])
+        self.assertEqual(second_event, POWER_SOURCES_CHANGE)
+        self.assertEqual(len(stub._weak_observers), 0)
+        self.assertIsNone(self.poller._thread)
+
+    def test_watch_bounded(self):
+        pm = AsyncPowerManagement(PowerManagementStub(poller=self.poller))
+
+        async def overflow():
+            async with pm.watch(maxsize=2) as stream:
+                for i in range(5):
+                    stream.put(PowerEvent(i, None))
+                return stream.dropped_count, [(await stream.__anext__()).kind for i in range(2)]
+
+        self.assertEqual(self.loop.run_until_complete(overflow()), (3, [3, 4]))
+
+    def test_remove_observer_in_executor(self):
+        stub = PowerManagementStub(poller=self.poller)
+        pm = AsyncPowerManagement(stub)
+        threads = []
+        remove_observer = stub.remove_observer
+
+        def record_remove_observer(observer):
+            threads.append(threading.current_thread())
+            remove_observer(observer)
+
+        stub.remove_observer = record_remove_observer
+
+        async def watch():
+            async with pm.watch():
+                pass
+            return threading.current_thread()
+
+        loop_thread = self.loop.run_until_complete(watch())
+        self.assertEqual(len(threads), 1)
+        self.assertIsNot(threads[0], loop_thread)
+        self.assertEqual(len(stub._weak_observers), 0)
+
+    def test_add_observer_cancelled(self):
+        stub = PowerManagementStub(poller=self.poller)
+        pm = AsyncPowerManagement(stub)
+        release = threading.Event()
+        removed = threading.Event()
+        add_observer, remove_observer = stub.add_observer, stub.remove_observer
+
+        def slow_add_observer(observer):
+            release.wait(5.0)
+            add_observer(observer)
+
+        def record_remove_observer(observer):
+            remove_observer(observer)
+            removed.set()
+
+        stub.add_observer, stub.remove_observer = slow_add_observer, record_remove_observer
+
+        async def watch():
+            stream = pm.watch()
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(stream.__anext__(), 0.05)
+            release.set()
+            while not removed.is_set():
+                await asyncio.sleep(0.01)
+
+        self.loop.run_until_complete(asyncio.wait_for(watch(), 5.0))
+        self.assertEqual(len(stub._weak_observers), 0)
+        self.assertEqual(self.poller._entries, {})
+        self.assertIsNone(pm._observer)
+
+    def test_add_observer_failure(self):
+        stub = PowerManagementStub(poller=self.poller)
+        pm = AsyncPowerManagement(stub)
+        release = threading.Event()
+
+        def add_observer(observer):
+            release.wait(5.0)
+            raise OSError("observing is not available")
+
+        stub.add_observer = add_observer
+
+        async def watch():
+            first, second = pm.watch(), pm.watch()
+            first_start = asyncio.ensure_future(first.start())
+            await asyncio.sleep(0)
+            await second.start()
+            release.set()
+            with self.assertRaises(OSError):
+                await first_start
+            with self.assertRaises(OSError):
+                await asyncio.wait_for(second.__anext__(), 5.0)
+            with self.assertRaises(OSError):
+                await first.__anext__()
+
+        self.loop.run_until_complete(asyncio.wait_for(watch(), 5.0))
+        self.assertEqual(pm._streams, [])
+        self.assertIsNone(pm._observer)
@@ -11,7 +11,14 @@ try:
 except ImportError:
     import mock
 
+import gc
+import os
+import select
+import threading
+import warnings
+
 import power.common
+from tests.helpers import PowerManagementStub, RecordingObserver
 
 
 class TestPowerManagementCommon(unittest.TestCase):
@@ -33,6 +40,27 @@ class TestPowerManagementCommon(unittest.TestCase):
         self.assertIsInstance(type, int)
         self.assertIn(type, [power.POWER_TYPE_AC, power.POWER_TYPE_BATTERY, power.POWER_TYPE_UPS])
 
+    def test_get_status(self):
+        status = power.PowerManagement().get_status()
+        self.assertIsInstance(status, power.PowerStatus)
+        self.assertIn(status.power_source_type, [power.POWER_TYPE_AC, power.POWER_TYPE_BATTERY, power.POWER_TYPE_UPS])
+        self.assertIn(status.low_battery_warning_level, [power.LOW_BATTERY_WARNING_NONE, power.LOW_BATTERY_WARNING_EARLY, power.LOW_BATTERY_WARNING_FINAL])
+        self.assertIsInstance(status.time_remaining_estimate, float)
+
+    def test_get_batteries_status(self):
+        status = power.common.get_batteries_status([])
+        self.assertEqual(status.power_source_type, power.POWER_TYPE_AC)
+        self.assertEqual(status.time_remaining_estimate, power.TIME_REMAINING_UNKNOWN)
+
+        status = power.common.get_batteries_status([(100.0, 50.0, 50.0, True)])
+        self.assertEqual(status, power.PowerStatus(power.POWER_TYPE_BATTERY, power.LOW_BATTERY_WARNING_NONE, 60.0))
+
+        status = power.common.get_batteries_status([(100.0, 20.0, 50.0, True), (100.0, 0.0, 0.0, False)])
+        self.assertEqual(status, power.PowerStatus(power.POWER_TYPE_BATTERY, power.LOW_BATTERY_WARNING_EARLY, 24.0))
+
+        status = power.common.get_batteries_status([(100.0, 50.0, 600.0, True)])
+        self.assertEqual(status.low_battery_warning_level, power.LOW_BATTERY_WARNING_FINAL)
+
     def test_fallback_unsupported_platform(self):
         with mock.patch('sys.platform', 'planb'):
             self.assertEqual(power.get_power_management_class(), power.common.PowerManagementNoop)
@@ -65,3 +93,562 @@ class TestPowerManagementCommon(unittest.TestCase):
             with self.assertWarns(RuntimeWarning):
                 pm = c()
                 self.assertEqual(pm.get_providing_power_source_type(), power.POWER_TYPE_AC)
+
+            with self.assertWarns(RuntimeWarning):
+                self.assertEqual(pm.get_status(), power.common.AC_POWER_STATUS)
+
+
+class TestEventPipe(unittest.TestCase):
+    def test_fileno(self):
+        pm = PowerManagementStub(poller=power.common.PowerManagementPoller())
+        self.assertEqual(pm.drain_events(), 0)
+        self.assertEqual(select.select([pm], [], [], 0)[0], [])
+        self.assertEqual(len(pm._weak_observers), 1)
+
+        pm._notify_observers(power.common.AC_POWER_STATUS, power.PowerStatus(power.POWER_TYPE_BATTERY, power.LOW_BATTERY_WARNING_NONE, 60.0))
+        self.assertEqual(select.select([pm], [], [], 0)[0], [pm])
+        self.assertEqual(pm.drain_events(), 2)
+        self.assertEqual(select.select([pm], [], [], 0)[0], [])
+
+        pm.close_events()
+        self.assertEqual(len(pm._weak_observers), 0)
+        self.assertEqual(pm.drain_events(), 0)
+
+    def test_remove_all_observers(self):
+        pm = PowerManagementStub(poller=power.common.PowerManagementPoller())
+        observer = RecordingObserver()
+        pm.add_observer(observer)
+        pm.fileno()
+        statuses = []
+        subscription = pm.subscribe(lambda subscription, status: statuses.append(status), on_power_type_change=True)
+        pm.remove_all_observers()
+        self.assertEqual(len(pm._weak_observers), 2)
+
+        battery_status = power.PowerStatus(power.POWER_TYPE_BATTERY, power.LOW_BATTERY_WARNING_NONE, 60.0)
+        pm.status = battery_status
+        pm._notify_observers(power.common.AC_POWER_STATUS, battery_status)
+        self.assertEqual(select.select([pm], [], [], 0)[0], [pm])
+        self.assertEqual(statuses, [battery_status])
+        self.assertEqual(observer.changes, [])
+
+        subscription.cancel()
+        pm.close_events()
+        self.assertEqual(len(pm._weak_observers), 0)
+
+    def test_full_pipe(self):
+        event_pipe = power.common.EventPipe()
+        self.addCleanup(event_pipe.close)
+        for _ in range(100000):
+            event_pipe.notify()
+        self.assertGreater(event_pipe.drain(), 0)
+        self.assertEqual(event_pipe.drain(), 0)
+
+    def test_notify_after_close(self):
+        event_pipe = power.common.EventPipe()
+        event_pipe.close()
+        read_fd, write_fd = os.pipe()
+        self.addCleanup(os.close, read_fd)
+        self.addCleanup(os.close, write_fd)
+        event_pipe.notify()
+        event_pipe.close()
+        self.assertEqual(event_pipe.drain(), 0)
+        self.assertEqual(select.select([read_fd], [], [], 0)[0], [])
+
+
+class TestDiagnostics(unittest.TestCase):
+    def test_rate_limited_warnings(self):
+        diagnostics = power.common.RateLimitedWarnings(interval=60.0)
+        with mock.patch('power.common.monotonic', return_value=100.0) as monotonic:
+            with warnings.catch_warnings(record=True) as w:
+                warnings.simplefilter('always')
+                self.assertTrue(diagnostics.warn('key', "failed"))
+                self.assertFalse(diagnostics.warn('key', lambda: self.fail("message must not be formatted")))
+                self.assertTrue(diagnostics.warn('other', "failed"))
+                monotonic.return_value = 160.0
+                self.assertTrue(diagnostics.warn('key', "failed"))
+
+        self.assertEqual([str(i.message) for i in w], ["failed", "failed", "failed (occurred 2 times in the last 60 seconds)"])
+        self.assertEqual(diagnostics.counts(), {'key': 3, 'other': 1})
+
+    def test_circuit_breaker(self):
+        breaker = power.common.CircuitBreaker(failure_threshold=2, reset_timeout=30.0)
+        with mock.patch('power.common.monotonic', return_value=100.0) as monotonic:
+            breaker.record_failure()
+            self.assertTrue(breaker.allow())
+            breaker.record_failure()
+            self.assertEqual(breaker.state, power.common.CircuitBreaker.OPEN)
+            self.assertFalse(breaker.allow())
+
+            monotonic.return_value = 130.0
+            self.assertTrue(breaker.allow())
+            self.assertFalse(breaker.allow())
+            breaker.record_failure()
+            self.assertEqual(breaker.state, power.common.CircuitBreaker.OPEN)
+
+            monotonic.return_value = 160.0
+            self.assertTrue(breaker.allow())
+            breaker.record_success()
+            self.assertEqual(breaker.state, power.common.CircuitBreaker.CLOSED)
+
+    def test_observer_errors_are_not_guarded(self):
+        with mock.patch('power.get_platform_power_management_class', return_value=PowerManagementStub):
+            pm = power.get_power_management_class()(failure_threshold=1)
+        pm.poller = power.common.PowerManagementPoller()
+
+        for _ in range(3):
+            self.assertRaises(TypeError, pm.add_observer, object())
+            self.assertRaises(ValueError, pm.remove_observer, RecordingObserver())
+        self.assertEqual(pm.diagnostics_info().open_methods, ())
+
+        observer = RecordingObserver()
+        pm.add_observer(observer)
+        self.assertIn(id(pm), pm.poller._entries)
+        pm.remove_observer(observer)
+        self.assertEqual(pm.poller._entries, {})
+
+    def test_fallback_circuit_breaker(self):
+        class PowerManagementFlaky(PowerManagementStub):
+            calls = 0
+            is_failing = False
+
+            def get_status(self):
+                self.calls += 1
+                if self.is_failing:
+                    raise IOError()
+                return super(PowerManagementFlaky, self).get_status()
+
+        battery_status = power.PowerStatus(power.POWER_TYPE_BATTERY, power.LOW_BATTERY_WARNING_NONE, 60.0)
+        with mock.patch('power.get_platform_power_management_class', return_value=PowerManagementFlaky):
+            pm = power.get_power_management_class()(failure_threshold=2, failure_cooldown=30.0)
+
+        pm.status = battery_status
+        with mock.patch('power.common.monotonic', return_value=100.0) as monotonic:
+            self.assertEqual(pm.get_status(), battery_status)
+            pm.is_failing = True
+            with warnings.catch_warnings(record=True) as w:
+                warnings.simplefilter('always')
+                for i in range(5):
+                    self.assertEqual(pm.get_status(), battery_status)
+            self.assertEqual(len(w), 1)
+            self.assertEqual(pm.calls, 3)
+            self.assertEqual(pm.diagnostics_info(), power.common.DiagnosticsInfo({'get_status': 2}, ('get_status',)))
+
+            pm.is_failing = False
+            monotonic.return_value = 130.0
+            self.assertEqual(pm.get_status(), battery_status)
+            self.assertEqual(pm.calls, 4)
+            self.assertEqual(pm.diagnostics_info().open_methods, ())
+
+
+    def test_raise_errors(self):
+        class PowerManagementFailing(PowerManagementStub):
+            def get_status_and_power_sources(self):
+                raise IOError("Unreadable")
+
+        with mock.patch('power.get_platform_power_management_class', return_value=PowerManagementFailing):
+            pm = power.get_power_management_class()(failure_threshold=2, raise_errors=True, hub=None)
+
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter('always')
+            self.assertRaises(IOError, pm.get_status_and_power_sources)
+            self.assertRaises(IOError, pm.get_status_and_power_sources)
+            self.assertRaises(RuntimeError, pm.get_status_and_power_sources)
+        self.assertEqual(w, [])
+        self.assertEqual(pm.diagnostics_info().open_methods, ('get_status_and_power_sources',))
+
+class ManualExecutor(object):
+    def __init__(self):
+        self.calls = []
+
+    def submit(self, func, *args):
+        self.calls.append((func, args))
+
+    def run(self):
+        calls, self.calls = self.calls, []
+        for func, args in calls:
+            func(*args)
+
+
+class TestObserverDispatcher(unittest.TestCase):
+    def test_coalesces_pending(self):
+        executor = ManualExecutor()
+        dispatcher = power.common.ObserverDispatcher(executor=executor)
+        pm = PowerManagementStub()
+        pm.dispatcher = dispatcher
+        observer = RecordingObserver()
+        pm.add_observer(observer)
+        try:
+            pm._notify_observers(power.common.AC_POWER_STATUS, power.PowerStatus(power.POWER_TYPE_AC, power.LOW_BATTERY_WARNING_NONE, power.TIME_REMAINING_UNKNOWN))
+            pm._notify_observers(power.common.AC_POWER_STATUS, power.PowerStatus(power.POWER_TYPE_BATTERY, power.LOW_BATTERY_WARNING_NONE, 60.0))
+            self.assertEqual(observer.changes, [])
+            self.assertEqual(dispatcher.queue_depth, 1)
+            self.assertEqual(dispatcher.get_stats(observer)[:3], (2, 0, True))
+
+            executor.run()
+            self.assertEqual(observer.changes, ['power_sources', 'time_remaining'])
+            self.assertEqual(dispatcher.queue_depth, 0)
+            stats = dispatcher.get_stats(observer)
+            self.assertEqual(stats[:3], (2, 1, False))
+            self.assertGreaterEqual(stats.max_latency, 0.0)
+        finally:
+            pm.remove_observer(observer)
+
+    def test_debounce(self):
+        dispatcher = power.common.ObserverDispatcher(debounce=0.05)
+        pm = PowerManagementStub()
+        observer = RecordingObserver()
+        for i in range(3):
+            dispatcher.dispatch(pm, observer, False, True)
+        self.assertTrue(observer.wait_for_changes(1))
+        self.assertEqual(observer.changes, ['time_remaining'])
+        self.assertEqual(dispatcher.get_stats(observer)[:2], (3, 1))
+        self.assertGreaterEqual(dispatcher.get_stats(observer).last_latency, 0.05)
+
+    def test_failing_observer(self):
+        class FailingObserver(RecordingObserver):
+            def on_time_remaining_change(self, power_management):
+                raise ValueError()
+
+        dispatcher = power.common.ObserverDispatcher()
+        pm = PowerManagementStub()
+        failing, observer = FailingObserver(), RecordingObserver()
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter('always')
+            dispatcher.dispatch(pm, failing, False, True)
+            dispatcher.dispatch(pm, observer, False, True)
+        self.assertEqual(len(w), 1)
+        self.assertEqual(observer.changes, ['time_remaining'])
+
+    def test_unhashable_observer(self):
+        class UnhashableObserver(RecordingObserver):
+            __hash__ = None
+
+        dispatcher = power.common.ObserverDispatcher()
+        pm = PowerManagementStub()
+        observer = UnhashableObserver()
+        dispatcher.dispatch(pm, observer, False, True)
+        self.assertEqual(observer.changes, ['time_remaining'])
+        self.assertEqual(dispatcher.get_stats(observer)[:2], (1, 1))
+
+        del observer
+        gc.collect()
+        self.assertEqual(dispatcher._stats, {})
+
+
+class TestSubscriptions(unittest.TestCase):
+    def setUp(self):
+        poller = power.common.PowerManagementPoller(ac_interval=100.0, battery_interval=100.0, early_interval=100.0, final_interval=100.0)
+        self.pm = PowerManagementStub(status=self.battery_status(60.0), poller=poller)
+        self.calls = []
+
+    @staticmethod
+    def battery_status(time_remaining):
+        return power.PowerStatus(power.POWER_TYPE_BATTERY, power.LOW_BATTERY_WARNING_NONE, time_remaining)
+
+    def callback(self, subscription, status):
+        self.calls.append((subscription.kind, subscription.is_below, status.time_remaining_estimate))
+
+    def set_status(self, status):
+        previous_status, self.pm.status = self.pm.status, status
+        self.pm._notify_observers(previous_status, status)
+
+    def test_weak_observer_registry(self):
+        registry = power.common.WeakObserverRegistry()
+        first, second = RecordingObserver(), RecordingObserver()
+        self.assertTrue(registry.add(first))
+        self.assertFalse(registry.add(first))
+        self.assertTrue(registry.add(second))
+        self.assertEqual(registry.observers(), [first, second])
+
+        del second
+        gc.collect()
+        self.assertEqual(len(registry), 1)
+        registry.remove(first)
+        self.assertNotIn(first, registry)
+        with self.assertRaises(ValueError):
+            registry.remove(first)
+
+    def test_time_remaining_below_hysteresis(self):
+        subscription = self.pm.subscribe(self.callback, on_time_remaining_below=15, hysteresis=2)
+        for time_remaining in (20.0, 14.0, 16.0, power.TIME_REMAINING_UNKNOWN, 14.5, 17.0, 16.0):
+            self.set_status(self.battery_status(time_remaining))
+        self.set_status(power.PowerStatus(power.POWER_TYPE_BATTERY, power.LOW_BATTERY_WARNING_FINAL, 5.0))
+        self.set_status(power.common.AC_POWER_STATUS)
+
+        self.assertEqual(self.calls, [
+            ('time_remaining_below', True, 14.0),
+            ('time_remaining_below', False, 17.0),
+            ('time_remaining_below', True, 5.0),
+            ('time_remaining_below', False, power.TIME_REMAINING_UNLIMITED),
+        ])
+
+        subscription.cancel()
+        self.assertFalse(subscription.is_active)
+        self.assertEqual(len(self.pm._weak_observers), 0)
+        self.assertIsNone(self.pm._subscriptions)
+
+    def test_power_type_change(self):
+        subscription = self.pm.subscribe(self.callback, on_power_type_change=True)
+        self.set_status(self.battery_status(30.0))
+        self.set_status(power.common.AC_POWER_STATUS)
+        self.assertEqual(self.calls, [('power_type_change', False, power.TIME_REMAINING_UNLIMITED)])
+        subscription.cancel()
+
+    def test_only_crossed_subscriptions_fire(self):
+        self.pm.status = self.battery_status(2000.0)
+        subscriptions = [self.pm.subscribe(self.callback, on_time_remaining_below=threshold) for threshold in range(1, 1001)]
+        self.set_status(self.battery_status(10.5))
+        self.assertEqual(len(self.calls), 990)
+
+        del self.calls[:]
+        del subscriptions[:500]
+        gc.collect()
+        self.set_status(self.battery_status(600.5))
+        self.assertEqual(len(self.calls), 100)
+        self.assertEqual(len(self.pm._subscriptions), 500)
+
+    def test_subscribe_requires_one_kind(self):
+        with self.assertRaises(ValueError):
+            self.pm.subscribe(self.callback)
+        with self.assertRaises(ValueError):
+            self.pm.subscribe(self.callback, on_time_remaining_below=10, on_power_type_change=True)
+
+
+class TestPowerManagementPoller(unittest.TestCase):
+    def test_get_interval(self):
+        poller = power.common.PowerManagementPoller(ac_interval=10.0, battery_interval=5.0, early_interval=2.0, final_interval=1.0, early_time_remaining=30.0)
+        self.assertEqual(poller.get_interval(power.common.AC_POWER_STATUS), 10.0)
+        self.assertEqual(poller.get_interval(power.common.AC_POWER_STATUS, did_change=True), 1.0)
+        self.assertEqual(poller.get_interval(power.PowerStatus(power.POWER_TYPE_BATTERY, power.LOW_BATTERY_WARNING_NONE, 120.0)), 5.0)
+        self.assertEqual(poller.get_interval(power.PowerStatus(power.POWER_TYPE_BATTERY, power.LOW_BATTERY_WARNING_NONE, 20.0)), 2.0)
+        self.assertEqual(poller.get_interval(power.PowerStatus(power.POWER_TYPE_BATTERY, power.LOW_BATTERY_WARNING_EARLY, 120.0)), 2.0)
+        self.assertEqual(poller.get_interval(power.PowerStatus(power.POWER_TYPE_BATTERY, power.LOW_BATTERY_WARNING_FINAL, 5.0)), 1.0)
+
+    def test_notifies_on_change(self):
+        poller = power.common.PowerManagementPoller(ac_interval=0.01, battery_interval=0.01, early_interval=0.01, final_interval=0.01)
+        pm = PowerManagementStub(poller=poller)
+        observer = RecordingObserver()
+        pm.add_observer(observer)
+        try:
+            self.assertFalse(observer.wait_for_changes(1, 0.1))
+            self.assertEqual(observer.changes, [])
+
+            pm.status = power.PowerStatus(power.POWER_TYPE_BATTERY, power.LOW_BATTERY_WARNING_NONE, 60.0)
+            self.assertTrue(observer.wait_for_changes(2))
+            self.assertEqual(observer.changes, ['power_sources', 'time_remaining'])
+        finally:
+            pm.remove_observer(observer)
+        self.assertIsNone(poller._thread)
+        self.assertEqual(poller._entries, {})
+
+    def test_notification_failure(self):
+        poller = power.common.PowerManagementPoller(ac_interval=0.01, battery_interval=0.01, early_interval=0.01, final_interval=0.01)
+        failing_pm = PowerManagementStub(poller=poller)
+        failing_pm._notify_observers = mock.Mock(side_effect=TypeError("unhashable type"))
+        pm = PowerManagementStub(poller=poller)
+        failing_observer, observer = RecordingObserver(), RecordingObserver()
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter('always')
+            failing_pm.add_observer(failing_observer)
+            pm.add_observer(observer)
+            try:
+                battery_status = power.PowerStatus(power.POWER_TYPE_BATTERY, power.LOW_BATTERY_WARNING_NONE, 60.0)
+                failing_pm.status = pm.status = battery_status
+                self.assertTrue(observer.wait_for_changes(2))
+                self.assertTrue(poller._thread.is_alive())
+            finally:
+                failing_pm.remove_observer(failing_observer)
+                pm.remove_observer(observer)
+        self.assertGreaterEqual(poller._diagnostics.counts()[('notify', PowerManagementStub)], 1)
+        self.assertTrue(any("Unable to notify observers" in str(i.message) for i in w))
+
+
+class TestReadingHub(unittest.TestCase):
+    def setUp(self):
+        self.hub = power.common.ReadingHub()
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.reads = 0
+
+    def read(self, value):
+        self.reads += 1
+        self.started.set()
+        self.release.wait(5.0)
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    def read_concurrently(self, key, value, count):
+        results = []
+
+        def target():
+            try:
+                results.append(self.hub.read(key, self.read, value))
+            except Exception as e:
+                results.append(e)
+
+        threads = [threading.Thread(target=target) for _ in range(count)]
+        threads[0].start()
+        self.started.wait(5.0)
+        for thread in threads[1:]:
+            thread.start()
+        while self.hub.get_info().shared < count - 1:
+            threading.Event().wait(0.01)
+        self.release.set()
+        for thread in threads:
+            thread.join(5.0)
+        return results
+
+    def test_shared(self):
+        self.assertEqual(self.read_concurrently(('source', 'get_status'), 42, 5), [42] * 5)
+        self.assertEqual(self.reads, 1)
+        self.assertEqual(self.hub.get_info(), power.common.HubInfo(1, 4, 0))
+
+        self.assertEqual(self.hub.read(('source', 'get_status'), self.read, 43), 43)
+        self.assertEqual(self.reads, 2)
+
+    def test_exception(self):
+        error = RuntimeError("unable to read")
+        results = self.read_concurrently(('source', 'get_status'), error, 3)
+        self.assertIs(results[0], error)
+        self.assertEqual([type(i) for i in results[1:]], [power.common.SharedReadError] * 2)
+        self.assertTrue(all(i.error is error for i in results[1:]))
+        self.assertEqual(self.reads, 1)
+
+    def test_forget(self):
+        thread = threading.Thread(target=self.hub.read, args=(('source', 'get_status'), self.read, 1))
+        thread.start()
+        self.started.wait(5.0)
+        self.hub.forget('other')
+        self.assertEqual(self.hub.get_info().in_flight, 1)
+        self.hub.forget('source')
+        self.assertEqual(self.hub.get_info().in_flight, 0)
+
+        self.release.set()
+        self.assertEqual(self.hub.read(('source', 'get_status'), self.read, 2), 2)
+        thread.join(5.0)
+        self.assertEqual(self.reads, 2)
+
+    def test_facade(self):
+        test = self
+
+        class PowerManagementSlow(PowerManagementStub):
+            def get_status(self):
+                return test.read(super(PowerManagementSlow, self).get_status())
+
+        with mock.patch('power.get_platform_power_management_class', return_value=PowerManagementSlow):
+            power_management_class = power.get_power_management_class()
+
+        power_managements = [power_management_class(hub=self.hub) for _ in range(3)]
+        threads = [threading.Thread(target=pm.get_status) for pm in power_managements]
+        for thread in threads:
+            thread.start()
+        while self.hub.get_info().shared < 2:
+            threading.Event().wait(0.01)
+        self.release.set()
+        for thread in threads:
+            thread.join(5.0)
+        self.assertEqual(self.reads, 1)
+
+        pm = power_management_class(hub=None)
+        pm.get_status()
+        self.assertEqual(self.reads, 2)
+        self.assertEqual(self.hub.get_info().reads, 1)
+
+    def test_facade_failure(self):
+        test = self
+
+        class PowerManagementFailing(PowerManagementStub):
+            def get_status(self):
+                return test.read(IOError("unable to read"))
+
+        with mock.patch('power.get_platform_power_management_class', return_value=PowerManagementFailing):
+            pm = power.get_power_management_class()(hub=self.hub, failure_threshold=2)
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(pm.get_status())) for _ in range(3)]
+        with warnings.catch_warnings(record=True):
+            warnings.simplefilter('always')
+            threads[0].start()
+            self.started.wait(5.0)
+            for thread in threads[1:]:
+                thread.start()
+            while self.hub.get_info().shared < 2:
+                threading.Event().wait(0.01)
+            self.release.set()
+            for thread in threads:
+                thread.join(5.0)
+
+        self.assertEqual(results, [power.common.AC_POWER_STATUS] * 3)
+        self.assertEqual(self.reads, 1)
+        self.assertEqual(pm.diagnostics_info(), power.common.DiagnosticsInfo({'get_status': 1}, ()))
+
+
+class TestPowerManagementCache(unittest.TestCase):
+    def setUp(self):
+        class PowerManagementCounting(PowerManagementStub):
+            reads = 0
+
+            def get_status(self):
+                PowerManagementCounting.reads += 1
+                return super(PowerManagementCounting, self).get_status()
+
+        self.platform_class = PowerManagementCounting
+        with mock.patch('power.get_platform_power_management_class', return_value=PowerManagementCounting):
+            self.power_management_class = power.get_power_management_class()
+
+    def test_disabled_by_default(self):
+        pm = self.power_management_class()
+        pm.get_status()
+        pm.get_status()
+        self.assertEqual(self.platform_class.reads, 2)
+        self.assertEqual(pm.cache_info(), power.common.CacheInfo(0, 0, None))
+
+    def test_max_age(self):
+        pm = self.power_management_class(cache_max_age=60.0)
+        self.assertEqual(pm.get_time_remaining_estimate(), power.TIME_REMAINING_UNLIMITED)
+        self.assertEqual(pm.get_providing_power_source_type(), power.POWER_TYPE_AC)
+        self.assertEqual(pm.get_low_battery_warning_level(), power.LOW_BATTERY_WARNING_NONE)
+        self.assertEqual(self.platform_class.reads, 1)
+        self.assertEqual(pm.cache_info(), power.common.CacheInfo(2, 1, 60.0))
+
+        pm.get_time_remaining_estimate(max_age=0)
+        self.assertEqual(self.platform_class.reads, 2)
+
+    def test_per_call_max_age(self):
+        pm = self.power_management_class()
+        pm.get_status()
+        pm.get_status(max_age=60.0)
+        self.assertEqual(self.platform_class.reads, 1)
+        self.assertEqual(pm.cache_info().hits, 1)
+
+    def test_invalidated_by_notifications(self):
+        pm = self.power_management_class(cache_max_age=60.0)
+        pm.get_status()
+        pm._invalidate_status()
+        pm.status = power.PowerStatus(power.POWER_TYPE_BATTERY, power.LOW_BATTERY_WARNING_NONE, 60.0)
+        self.assertEqual(pm.get_status(), pm.status)
+        self.assertEqual(self.platform_class.reads, 2)
+
+
+class TestLazyPowerManagement(unittest.TestCase):
+    def test_loaded_on_first_use(self):
+        with mock.patch('power._power_management_class', None):
+            with mock.patch('power.get_power_management_class', return_value=PowerManagementStub) as get_class:
+                self.assertIn('lazy', repr(power.PowerManagement))
+                get_class.assert_not_called()
+
+                pm = power.PowerManagement()
+                self.assertIsInstance(pm, PowerManagementStub)
+                self.assertIsInstance(pm, power.PowerManagement)
+                self.assertIs(power.preload(), PowerManagementStub)
+                get_class.assert_called_once_with()
+
+    def test_subclass(self):
+        with mock.patch('power._power_management_class', None):
+            with mock.patch('power.get_power_management_class', return_value=PowerManagementStub):
+                class PowerManagementSubclass(power.PowerManagement):
+                    pass
+
+                self.assertTrue(issubclass(PowerManagementSubclass, PowerManagementStub))
+                self.assertIsInstance(PowerManagementSubclass(), PowerManagementSubclass)
@@ -0,0 +1,112 @@
+# coding=utf-8
+from __future__ import print_function
+
+import threading
+import warnings
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+try:
+    import unittest.mock as mock
+except ImportError:
+    import mock
+
+try:
+    from urllib.request import urlopen
+except ImportError:
+    from urllib2 import urlopen
+
+import power
+from power import common, exporter
+from tests.helpers import PowerManagementCounting
+
+
+class TestExporter(unittest.TestCase):
+    def setUp(self):
+        self.pm = PowerManagementCounting(status=power.PowerStatus(power.POWER_TYPE_BATTERY, power.LOW_BATTERY_WARNING_NONE, 120.0))
+
+    def test_render(self):
+        collector = exporter.Collector(self.pm)
+        collector.collect()
+        metrics = collector.metrics.decode('utf-8').splitlines()
+        self.assertIn('power_source{type="battery"} 1', metrics)
+        self.assertIn('power_source{type="ac"} 0', metrics)
+        self.assertIn('power_time_remaining_minutes 120.0', metrics)
+        self.assertIn('power_supply_energy_now{supply="BAT0"} 50000.0', metrics)
+        self.assertIn('power_supply_online{supply="AC",type="ac"} 0', metrics)
+        self.assertIn('power_exporter_collections_total 1', metrics)
+        self.assertIn('power_exporter_collection_errors_total 0', metrics)
+
+    def test_render_units(self):
+        power_sources = (
+            common.PowerSourceInfo('BAT0', power.POWER_TYPE_BATTERY, True, True, 50000.0, 100000.0, 25000.0, energy_unit='uWh'),
+            common.PowerSourceInfo('BAT1', power.POWER_TYPE_BATTERY, True, True, 2000.0, 4000.0, 500.0, voltage_now=11000000.0, energy_unit='uAh'),
+        )
+        stats = {'collections': 1, 'errors': 0, 'duration': 0.0, 'last_success': 0.0}
+        metrics = exporter.render_metrics(None, power_sources, stats).splitlines()
+        self.assertIn('power_supply_energy_now{supply="BAT0",unit="uWh"} 50000.0', metrics)
+        self.assertIn('power_supply_power_now{supply="BAT0",unit="uW"} 25000.0', metrics)
+        self.assertIn('power_supply_energy_full{supply="BAT1",unit="uAh"} 4000.0', metrics)
+        self.assertIn('power_supply_power_now{supply="BAT1",unit="uA"} 500.0', metrics)
+        self.assertIn('power_supply_voltage_now{supply="BAT1"} 11000000.0', metrics)
+
+    def test_render_special_values(self):
+        status = power.PowerStatus(power.POWER_TYPE_AC, power.LOW_BATTERY_WARNING_NONE, power.TIME_REMAINING_UNLIMITED)
+        stats = {'collections': 0, 'errors': 0, 'duration': None, 'last_success': None}
+        metrics = exporter.render_metrics(status, (), stats).splitlines()
+        self.assertIn('power_time_remaining_minutes +Inf', metrics)
+        self.assertIn('power_exporter_collection_duration_seconds NaN', metrics)
+        self.assertNotIn('power_supply', '\n'.join(metrics))
+
+    def test_errors_keep_last_values(self):
+        collector = exporter.Collector(self.pm)
+        collector.collect()
+        self.pm.error = IOError("Unreadable")
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter('always')
+            collector.collect()
+            collector.collect()
+        self.assertEqual(len(w), 1)
+        metrics = collector.metrics.decode('utf-8').splitlines()
+        self.assertIn('power_exporter_collection_errors_total 2', metrics)
+        self.assertIn('power_time_remaining_minutes 120.0', metrics)
+
+    def test_errors_through_facade(self):
+        class PowerManagementFailing(PowerManagementCounting):
+            def get_status_and_power_sources(self):
+                raise IOError("Unreadable")
+
+        with mock.patch('power.get_platform_power_management_class', return_value=PowerManagementFailing):
+            power_management_class = power.get_power_management_class()
+        with mock.patch('power._power_management_class', power_management_class):
+            collector = exporter.Collector()
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            for _ in range(4):
+                collector.collect()
+        metrics = collector.metrics.decode('utf-8').splitlines()
+        self.assertIn('power_exporter_collection_errors_total 4', metrics)
+        self.assertFalse([line for line in metrics if line.startswith('power_source{')])
+        self.assertIn('power_exporter_last_success_timestamp_seconds NaN', metrics)
+
+    def test_scrapes_share_snapshot(self):
+        collector = exporter.Collector(self.pm, interval=60.0)
+        collector.start()
+        self.addCleanup(collector.stop)
+        server = exporter.MetricsServer(('127.0.0.1', 0), collector)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            url = 'http://127.0.0.1:{0}/metrics'.format(server.server_address[1])
+            bodies = [urlopen(url).read() for i in range(5)]
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+
+        self.assertEqual(self.pm.calls, 1)
+        self.assertEqual(len(set(bodies)), 1)
+        self.assertIn(b'power_low_battery_warning_level 1', bodies[0])
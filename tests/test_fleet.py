@@ -0,0 +1,109 @@
+# coding=utf-8
+from __future__ import print_function
+
+import random
+import warnings
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+import power
+from power import common
+from power.fleet import get_fleet_status, summarize, FleetSummary, numpy
+
+
+# (energy_full, energy_now, power_now, ac_online, discharging, host)
+BATTERIES = [
+    (100.0, 50.0, 50.0, False, True, 0),  # 60 minutes
+    (100.0, 50.0, 50.0, True, True, 1),  # AC online
+    (100.0, 20.0, 50.0, False, True, 2),  # 24 minutes, 20%
+    (100.0, 5.0, 60.0, False, True, 3),  # 5 minutes
+    (100.0, 80.0, 0.0, False, True, 4),  # Zero power
+    (100.0, 30.0, 60.0, False, True, 5),  # 30 minutes of discharging battery...
+    (100.0, 60.0, 0.0, False, False, 5),  # ... and 60 minutes of idle battery
+    (100.0, 100.0, 0.0, False, False, 6),  # Charged
+]
+
+HOST_COUNT = 7
+
+
+def columns(batteries):
+    return [list(column) for column in zip(*batteries)]
+
+
+class TestFleetPython(unittest.TestCase):
+    use_numpy = False
+
+    def get_fleet_status(self, batteries, host_count=HOST_COUNT):
+        energy_full, energy_now, power_now, ac_online, discharging, hosts = columns(batteries)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            status = get_fleet_status(energy_full, energy_now, power_now, ac_online, discharging, hosts=hosts, host_count=host_count, use_numpy=self.use_numpy)
+        return [tuple(float(value) for value in column) for column in status]
+
+    def test_fleet_status(self):
+        power_source_type, low_battery_warning_level, time_remaining_estimate, percentage = self.get_fleet_status(BATTERIES)
+        self.assertEqual(power_source_type, (1, 0, 1, 1, 1, 1, 0))
+        self.assertEqual(low_battery_warning_level, (
+            power.LOW_BATTERY_WARNING_NONE,
+            power.LOW_BATTERY_WARNING_NONE,
+            power.LOW_BATTERY_WARNING_EARLY,
+            power.LOW_BATTERY_WARNING_FINAL,
+            power.LOW_BATTERY_WARNING_NONE,
+            power.LOW_BATTERY_WARNING_NONE,
+            power.LOW_BATTERY_WARNING_NONE,
+        ))
+        self.assertEqual(time_remaining_estimate, (60.0, power.TIME_REMAINING_UNLIMITED, 24.0, 5.0, power.TIME_REMAINING_UNKNOWN, 90.0, power.TIME_REMAINING_UNKNOWN))
+        self.assertEqual(percentage[:3], (50.0, 50.0, 20.0))
+        self.assertEqual(percentage[-1], 100.0)
+
+    def test_matches_backend(self):
+        rng = random.Random(0)
+        batteries = []
+        for i in range(500):
+            host = rng.randrange(100)
+            batteries.append((
+                rng.choice([0.0, 100.0, 5000.0]),
+                rng.uniform(0.0, 100.0),
+                rng.choice([0.0, rng.uniform(1.0, 600.0)]),
+                rng.random() < 0.1,
+                rng.random() < 0.7,
+                host
+            ))
+
+        fleet_status = list(zip(*self.get_fleet_status(batteries, host_count=100)))
+        for host in range(100):
+            host_batteries = [battery for battery in batteries if battery[5] == host]
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                if any(battery[3] for battery in host_batteries):
+                    expected = common.AC_POWER_STATUS
+                else:
+                    expected = common.get_batteries_status([battery[:3] + (battery[4],) for battery in host_batteries])
+            actual = fleet_status[host][:3]
+            self.assertEqual(actual[:2], expected[:2])
+            self.assertAlmostEqual(actual[2], expected[2])
+
+    def test_summarize(self):
+        energy_full, energy_now, power_now, ac_online, discharging, hosts = columns(BATTERIES)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            status = get_fleet_status(energy_full, energy_now, power_now, ac_online, discharging, hosts=hosts, use_numpy=self.use_numpy)
+        self.assertEqual(summarize(status), FleetSummary(7, 2, 5, 1, 1, 5.0))
+
+    def test_summarize_ac(self):
+        status = get_fleet_status([100.0], [50.0], [10.0], [True], [False], use_numpy=self.use_numpy)
+        self.assertEqual(summarize(status), FleetSummary(1, 1, 0, 0, 0, power.TIME_REMAINING_UNLIMITED))
+
+
+@unittest.skipIf(numpy is None, "NumPy is not available")
+class TestFleetNumPy(TestFleetPython):
+    use_numpy = True
+
+    def test_warns_once(self):
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter('always')
+            get_fleet_status([100.0] * 3, [50.0] * 3, [0.0] * 3, [False] * 3, [True] * 3)
+        self.assertEqual(len(w), 1)
@@ -0,0 +1,186 @@
+# coding=utf-8
+from __future__ import print_function
+
+import os
+import shutil
+import socket
+import stat
+import tempfile
+import warnings
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+import power
+from power import freebsd
+from tests.helpers import RecordingObserver
+
+
+DEVD_LINES = [
+    b'!system=IFNET subsystem=em0 type=LINK_UP\n',
+    b'!system=ACPI subsystem=ACAD type=\\_SB_.PCI0.LPCB.ACAD notify=0x00\n',
+    b'!system=ACPI subsystem=CMBAT type=\\_SB_.PCI0.LPCB.BAT0 notify=0x80\n',
+]
+
+
+class StaticSysctlProvider(freebsd.SysctlProvider):
+    def __init__(self, **values):
+        self.values = values
+
+    def query(self, oids):
+        return dict(('hw.acpi.{0}'.format(name.replace('_', '.')), str(value)) for name, value in self.values.items())
+
+
+FAKE_SYSCTL = """#!/bin/sh
+echo "$@" >> "{log}"
+cat "{output}"
+"""
+
+
+@unittest.skipIf(os.name != 'posix', "Fake sysctl requires POSIX shell")
+class TestPowerManagementFreeBSD(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.log_path = os.path.join(self.root, 'log')
+        self.output_path = os.path.join(self.root, 'output')
+        self.sysctl_path = os.path.join(self.root, 'sysctl')
+        with open(self.sysctl_path, 'w') as f:
+            f.write(FAKE_SYSCTL.format(log=self.log_path, output=self.output_path))
+        os.chmod(self.sysctl_path, stat.S_IRWXU)
+        self.pm = freebsd.PowerManagement(sysctl=freebsd.SubprocessSysctlProvider(self.sysctl_path))
+
+    def set_sysctl(self, **values):
+        with open(self.output_path, 'w') as f:
+            for name, value in values.items():
+                f.write('hw.acpi.{0}={1}\n'.format(name.replace('_', '.'), value))
+
+    def test_single_invocation(self):
+        self.set_sysctl(acline=0, battery_life=50, battery_time=120, battery_state=1, battery_units=1)
+        self.assertEqual(self.pm.get_status(), power.PowerStatus(power.POWER_TYPE_BATTERY, power.LOW_BATTERY_WARNING_NONE, 120.0))
+        with open(self.log_path) as f:
+            self.assertEqual(f.read().split(), ['-e', '-i'] + list(freebsd.STATUS_OIDS))
+
+    def test_ac_online(self):
+        self.set_sysctl(acline=1, battery_life=50, battery_time=-1, battery_state=2, battery_units=1)
+        self.assertEqual(self.pm.get_status(), power.common.AC_POWER_STATUS)
+
+    def test_desktop(self):
+        self.set_sysctl()
+        self.assertEqual(self.pm.get_status(), power.common.AC_POWER_STATUS)
+
+    def test_warning_levels(self):
+        self.set_sysctl(acline=0, battery_life=20, battery_time=-1, battery_state=1, battery_units=2)
+        self.assertEqual(self.pm.get_status(), power.PowerStatus(power.POWER_TYPE_BATTERY, power.LOW_BATTERY_WARNING_EARLY, power.TIME_REMAINING_UNKNOWN))
+        self.set_sysctl(acline=0, battery_life=30, battery_time=8, battery_state=5, battery_units=1)
+        self.assertEqual(self.pm.get_low_battery_warning_level(), power.LOW_BATTERY_WARNING_FINAL)
+
+    def test_battery_not_discharging(self):
+        self.set_sysctl(acline=0, battery_life=100, battery_time=-1, battery_state=0, battery_units=1)
+        self.assertEqual(self.pm.get_providing_power_source_type(), power.POWER_TYPE_AC)
+        self.set_sysctl(acline=0, battery_life=-1, battery_time=-1, battery_state=7, battery_units=1)
+        self.assertEqual(self.pm.get_providing_power_source_type(), power.POWER_TYPE_AC)
+
+    def test_sysctl_failure(self):
+        pm = freebsd.PowerManagement(sysctl=freebsd.SubprocessSysctlProvider(os.path.join(self.root, 'missing')))
+        with self.assertRaises(RuntimeError):
+            pm.get_status()
+
+    def test_deprecated_helpers(self):
+        self.set_sysctl(acline=0, battery_life=50, battery_time=120, battery_state=1, battery_units=1)
+        sysctl_path = freebsd.SYSCTL_PATH
+        freebsd.SYSCTL_PATH = self.sysctl_path
+        self.addCleanup(setattr, freebsd, 'SYSCTL_PATH', sysctl_path)
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter('always')
+            self.assertEqual(freebsd.PowerManagement.power_source_type(), power.POWER_TYPE_BATTERY)
+            self.assertFalse(freebsd.PowerManagement.is_ac_online())
+            self.assertTrue(freebsd.PowerManagement.is_battery_present())
+            self.assertTrue(freebsd.PowerManagement.is_battery_discharging())
+            self.assertEqual(len(freebsd.PowerManagement.get_battery_state()), 3)
+        self.assertEqual([x.category for x in w], [DeprecationWarning] * 5)
+        self.assertTrue(all(x.filename == __file__.replace('.pyc', '.py') for x in w))
+
+        freebsd.SYSCTL_PATH = os.path.join(self.root, 'missing')
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', DeprecationWarning)
+            self.assertEqual(freebsd.PowerManagement.power_source_type(), power.POWER_TYPE_AC)
+            self.assertTrue(freebsd.PowerManagement.is_ac_online())
+            self.assertFalse(freebsd.PowerManagement.is_battery_present())
+
+
+@unittest.skipIf(not hasattr(socket, 'AF_UNIX') or not hasattr(socket, 'SOCK_SEQPACKET'), "Unix seqpacket sockets are not available")
+class TestDevdObserver(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.socket_path = os.path.join(self.root, 'devd.seqpacket.pipe')
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        self.addCleanup(self.server.close)
+        self.server.bind(self.socket_path)
+        self.server.listen(1)
+
+    def test_parse_message(self):
+        self.assertEqual(freebsd.DevdListener.parse_message(DEVD_LINES[1]),
+                         {'system': 'ACPI', 'subsystem': 'ACAD', 'type': '\\_SB_.PCI0.LPCB.ACAD', 'notify': '0x00'})
+        self.assertIsNone(freebsd.DevdListener.parse_message(b'+uhub0 at bus=0\n'))
+
+    def test_observer(self):
+        sysctl = StaticSysctlProvider(acline=1, battery_life=80, battery_time=-1, battery_state=0, battery_units=1)
+        pm = freebsd.PowerManagement(sysctl=sysctl, devd_listener=freebsd.DevdListener(self.socket_path))
+        observer = RecordingObserver()
+        pm.add_observer(observer)
+        try:
+            connection = self.server.accept()[0]
+            self.addCleanup(connection.close)
+
+            sysctl.values.update(acline=0, battery_state=1, battery_time=120)
+            connection.send(DEVD_LINES[0])
+            connection.send(DEVD_LINES[1])
+            self.assertTrue(observer.wait_for_changes(2))
+            self.assertEqual(observer.changes, ['power_sources', 'time_remaining'])
+
+            sysctl.values.update(battery_time=100)
+            connection.send(DEVD_LINES[2])
+            self.assertTrue(observer.wait_for_changes(3))
+            self.assertEqual(observer.changes[2], 'time_remaining')
+        finally:
+            pm.remove_observer(observer)
+        self.assertIsNone(pm.devd_listener._thread)
+
+    def test_devd_restart(self):
+        sysctl = StaticSysctlProvider(acline=1, battery_life=80, battery_time=-1, battery_state=0, battery_units=1)
+        listener = freebsd.DevdListener(self.socket_path)
+        listener.RECONNECT_INTERVAL = 0.05
+        pm = freebsd.PowerManagement(sysctl=sysctl, devd_listener=listener)
+        observer = RecordingObserver()
+        pm.add_observer(observer)
+        try:
+            sysctl.values.update(acline=0, battery_state=1, battery_time=120)
+            self.server.accept()[0].close()
+            connection = self.server.accept()[0]
+            self.addCleanup(connection.close)
+            self.assertTrue(observer.wait_for_changes(2))
+            self.assertEqual(observer.changes, ['power_sources', 'time_remaining'])
+
+            sysctl.values.update(battery_time=100)
+            connection.send(DEVD_LINES[2])
+            self.assertTrue(observer.wait_for_changes(3))
+            self.assertEqual(observer.changes[2], 'time_remaining')
+        finally:
+            pm.remove_observer(observer)
+        self.assertIsNone(listener._thread)
+
+    def test_polling_fallback(self):
+        pm = freebsd.PowerManagement(sysctl=StaticSysctlProvider(), devd_listener=freebsd.DevdListener(os.path.join(self.root, 'missing')))
+        observer = RecordingObserver()
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter('always')
+            pm.add_observer(observer)
+        try:
+            self.assertIs(pm._notifications_source, pm.poller)
+            self.assertTrue(any(issubclass(i.category, RuntimeWarning) for i in w))
+        finally:
+            pm.remove_observer(observer)
@@ -0,0 +1,106 @@
+# coding=utf-8
+from __future__ import print_function
+
+from concurrent.futures import ThreadPoolExecutor
+import threading
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+import power
+from power import common
+from power.governor import DrainingError, PowerAwareExecutor, PowerPolicy
+from tests.helpers import PowerManagementCounting
+
+
+def battery_status(warning_level=power.LOW_BATTERY_WARNING_NONE, time_remaining=120.0, power_type=power.POWER_TYPE_BATTERY):
+    return common.PowerStatus(power_type, warning_level, time_remaining)
+
+
+class TestPowerPolicy(unittest.TestCase):
+    def test_default(self):
+        policy = PowerPolicy()
+        self.assertEqual(policy(common.AC_POWER_STATUS, 8), 8)
+        self.assertEqual(policy(battery_status(), 8), 4)
+        self.assertEqual(policy(battery_status(power_type=power.POWER_TYPE_UPS), 8), 4)
+        self.assertEqual(policy(battery_status(power.LOW_BATTERY_WARNING_EARLY), 8), 2)
+        self.assertEqual(policy(battery_status(power.LOW_BATTERY_WARNING_EARLY), 2), 1)
+        self.assertEqual(policy(battery_status(power.LOW_BATTERY_WARNING_FINAL), 8), 0)
+
+    def test_final_time_remaining(self):
+        policy = PowerPolicy(final_time_remaining=30.0)
+        self.assertEqual(policy(battery_status(time_remaining=20.0), 8), 0)
+        self.assertEqual(policy(battery_status(time_remaining=power.TIME_REMAINING_UNKNOWN), 8), 4)
+
+
+class TestPowerAwareExecutor(unittest.TestCase):
+    def setUp(self):
+        self.pm = PowerManagementCounting(status=battery_status(), poller=common.PowerManagementPoller())
+        self.executor = PowerAwareExecutor(ThreadPoolExecutor(4), 4, power_management=self.pm)
+        self.release = threading.Event()
+        self.running = []
+        self.max_running = 0
+        self.lock = threading.Lock()
+
+    def tearDown(self):
+        self.release.set()
+        self.executor.shutdown()
+
+    def task(self, value):
+        with self.lock:
+            self.running.append(value)
+            self.max_running = max(self.max_running, len(self.running))
+        self.release.wait(5.0)
+        with self.lock:
+            self.running.remove(value)
+        return value * 2
+
+    def test_limit(self):
+        self.assertEqual(self.executor.limit, 2)
+        futures = [self.executor.submit(self.task, i) for i in range(6)]
+        self.assertEqual(self.executor.pending, 4)
+
+        self.pm.status = common.AC_POWER_STATUS
+        self.executor.on_power_sources_change(self.pm)
+        self.assertEqual(self.executor.limit, 4)
+        self.assertEqual(self.executor.pending, 2)
+
+        self.release.set()
+        self.assertEqual([f.result(5.0) for f in futures], [0, 2, 4, 6, 8, 10])
+        self.assertEqual(self.max_running, 4)
+
+    def test_draining(self):
+        future = self.executor.submit(self.task, 1)
+        self.pm.status = battery_status(power.LOW_BATTERY_WARNING_FINAL, 5.0)
+        self.executor.on_time_remaining_change(self.pm)
+        self.assertEqual(self.executor.limit, 0)
+        self.assertRaises(DrainingError, self.executor.submit, self.task, 2)
+
+        self.release.set()
+        self.assertEqual(future.result(5.0), 2)
+
+    def test_draining_fails_pending(self):
+        futures = [self.executor.submit(self.task, i) for i in range(3)]
+        self.assertEqual(self.executor.pending, 1)
+        self.pm.status = battery_status(power.LOW_BATTERY_WARNING_FINAL, 5.0)
+        self.executor.on_time_remaining_change(self.pm)
+        self.assertEqual(self.executor.pending, 0)
+        self.assertRaises(DrainingError, futures[2].result, 5.0)
+
+        self.release.set()
+        self.assertEqual([f.result(5.0) for f in futures[:2]], [0, 2])
+
+    def test_exception(self):
+        future = self.executor.submit(int, 'x')
+        self.assertRaises(ValueError, future.result, 5.0)
+
+    def test_shutdown_cancels_pending(self):
+        futures = [self.executor.submit(self.task, i) for i in range(3)]
+        self.executor.shutdown(wait=False)
+        self.assertTrue(futures[2].cancelled())
+        self.release.set()
+        self.assertEqual([f.result(5.0) for f in futures[:2]], [0, 2])
+        self.assertEqual(len(self.pm._weak_observers), 0)
+        self.assertRaises(RuntimeError, self.executor.submit, self.task, 3)
@@ -0,0 +1,74 @@
+# coding=utf-8
+from __future__ import print_function
+
+import threading
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+import power
+from power.history import ReadingHistory
+
+
+class TestReadingHistory(unittest.TestCase):
+    def test_ring(self):
+        history = ReadingHistory(capacity=3)
+        for i in range(5):
+            history.append(100.0 - i, 10.0, time=float(i))
+
+        self.assertEqual(len(history), 3)
+        self.assertEqual(list(history), [(2.0, 98.0, 10.0), (3.0, 97.0, 10.0), (4.0, 96.0, 10.0)])
+        self.assertEqual([list(view.tolist()) for view in history.get_buffers('time')], [[2.0], [3.0, 4.0]])
+        self.assertEqual(len(history.time), 3)
+
+        history.clear()
+        self.assertEqual(len(history), 0)
+        self.assertEqual(history.get_buffers('energy_now')[0].tolist(), [])
+        self.assertEqual(history.get_time_remaining_estimate(), power.TIME_REMAINING_UNKNOWN)
+
+    def test_buffers_share_storage(self):
+        history = ReadingHistory(capacity=4)
+        history.append(50.0, 10.0, time=0.0)
+        view = history.get_buffers('power_now')[0]
+        history.power_now[0] = 20.0
+        self.assertEqual(view[0], 20.0)
+        with self.assertRaises(ValueError):
+            history.get_buffers('status')
+
+    def test_discharge_rate(self):
+        history = ReadingHistory(half_life=60.0)
+        history.append(100.0, 10.0, time=0.0)
+        self.assertEqual(history.discharge_rate, 10.0)
+        self.assertEqual(history.get_time_remaining_estimate(), 600.0)
+
+        history.append(90.0, 30.0, time=60.0)
+        self.assertEqual(history.discharge_rate, 20.0)
+        self.assertEqual(history.get_time_remaining_estimate(), 270.0)
+
+        history.append(90.0, 0.0, time=60.0)
+        self.assertEqual(history.discharge_rate, 20.0)
+
+    def test_zero_discharge_rate(self):
+        history = ReadingHistory()
+        history.append(100.0, 0.0, time=0.0)
+        self.assertEqual(history.get_time_remaining_estimate(), power.TIME_REMAINING_UNKNOWN)
+
+    def test_concurrent_append(self):
+        history = ReadingHistory(capacity=64)
+
+        def append(offset):
+            for i in range(1000):
+                history.append(100.0, 10.0, time=float(offset + i))
+
+        threads = [threading.Thread(target=append, args=(i * 1000,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(history), 64)
+        self.assertEqual(len(list(history)), 64)
+        self.assertEqual(history.discharge_rate, 10.0)
+        self.assertEqual(sum(len(view) for view in history.get_buffers('time')), 64)
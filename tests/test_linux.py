@@ -0,0 +1,498 @@
+# coding=utf-8
+from __future__ import print_function
+
+import errno
+import os
+import select
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import warnings
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+try:
+    import unittest.mock as mock
+except ImportError:
+    import mock
+
+import power
+import power.history
+from tests.helpers import RecordingObserver
+
+try:
+    import power.linux
+except (RuntimeError, ImportError):
+    linux = None
+else:
+    linux = power.linux
+
+
+def write_supply(root, name, **attributes):
+    supply_path = os.path.join(root, name)
+    if not os.path.isdir(supply_path):
+        os.makedirs(supply_path)
+    for attribute, value in attributes.items():
+        with open(os.path.join(supply_path, attribute), 'w') as f:
+            f.write('{0}\n'.format(value))
+    return supply_path
+
+
+def uevent_message(action, name, subsystem='power_supply'):
+    return '{0}@/devices/platform/{1}\0ACTION={0}\0SUBSYSTEM={2}\0POWER_SUPPLY_NAME={1}\0'.format(action, name, subsystem).encode('ascii')
+
+
+class OverflowingSocket(object):
+    """
+    Raises ENOBUFS instead of returning b'overflow' message, like netlink socket which buffer did overflow.
+    """
+    def __init__(self, wrapped):
+        self.wrapped = wrapped
+
+    def fileno(self):
+        return self.wrapped.fileno()
+
+    def recv(self, size):
+        message = self.wrapped.recv(size)
+        if message == b'overflow':
+            raise OSError(errno.ENOBUFS, "No buffer space available")
+        return message
+
+    def setblocking(self, flag):
+        self.wrapped.setblocking(flag)
+
+    def close(self):
+        self.wrapped.close()
+
+
+@unittest.skipIf(linux is None, "/sys/class/power_supply is not available")
+class TestPowerManagementLinux(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        patcher = mock.patch('power.linux.POWER_SUPPLY_PATH', self.root)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_no_supplies(self):
+        status = linux.PowerManagement().get_status()
+        self.assertEqual(status.power_source_type, power.POWER_TYPE_AC)
+        self.assertEqual(status.low_battery_warning_level, power.LOW_BATTERY_WARNING_NONE)
+        self.assertEqual(status.time_remaining_estimate, power.TIME_REMAINING_UNLIMITED)
+
+    def test_no_batteries_ac_offline(self):
+        write_supply(self.root, 'AC', type='Mains', online=0)
+        pm = linux.PowerManagement()
+        self.assertEqual(pm.get_status(), power.common.AC_POWER_STATUS)
+        self.assertEqual(pm.get_time_remaining_estimate(), power.TIME_REMAINING_UNLIMITED)
+
+    def test_ac_online(self):
+        write_supply(self.root, 'AC', type='Mains', online=1)
+        write_supply(self.root, 'BAT0', type='Battery', present=1, status='Discharging', energy_full=100, energy_now=10, power_now=10)
+        self.assertEqual(linux.PowerManagement().get_status(), power.common.AC_POWER_STATUS)
+
+    def test_energy_battery(self):
+        write_supply(self.root, 'AC', type='Mains', online=0)
+        write_supply(self.root, 'BAT0', type='Battery', present=1, status='Discharging', energy_full=100, energy_now=50, power_now=50)
+        pm = linux.PowerManagement()
+        self.assertEqual(pm.get_status(), power.PowerStatus(power.POWER_TYPE_BATTERY, power.LOW_BATTERY_WARNING_NONE, 60.0))
+        self.assertEqual(pm.get_providing_power_source_type(), power.POWER_TYPE_BATTERY)
+        self.assertEqual(pm.get_low_battery_warning_level(), power.LOW_BATTERY_WARNING_NONE)
+        self.assertEqual(pm.get_time_remaining_estimate(), 60.0)
+
+    def test_smoothed_time_remaining(self):
+        write_supply(self.root, 'AC', type='Mains', online=0)
+        write_supply(self.root, 'BAT0', type='Battery', present=1, status='Discharging', energy_full=100, energy_now=50, power_now=50)
+        pm = linux.PowerManagement(history=power.history.ReadingHistory(half_life=10.0))
+        with mock.patch('power.common.monotonic', return_value=100.0) as monotonic:
+            self.assertEqual(pm.get_time_remaining_estimate(smoothed=True), 60.0)
+
+            write_supply(self.root, 'BAT0', power_now=150)
+            monotonic.return_value = 110.0
+            self.assertEqual(pm.get_time_remaining_estimate(), 20.0)
+            self.assertEqual(pm.get_time_remaining_estimate(smoothed=True), 30.0)
+            self.assertEqual(len(pm.history), 3)
+
+            write_supply(self.root, 'AC', online=1)
+            self.assertEqual(pm.get_time_remaining_estimate(smoothed=True), power.TIME_REMAINING_UNLIMITED)
+            self.assertEqual(len(pm.history), 0)
+
+    def test_charge_battery(self):
+        write_supply(self.root, 'BAT0', type='Battery', present=1, status='Discharging', charge_full=5000000, charge_now=1000000, voltage_now=12000000, current_now=500000)
+        status = linux.PowerManagement().get_status()
+        self.assertEqual(status.power_source_type, power.POWER_TYPE_BATTERY)
+        self.assertEqual(status.low_battery_warning_level, power.LOW_BATTERY_WARNING_EARLY)
+        self.assertAlmostEqual(status.time_remaining_estimate, 120.0)
+
+    def test_charge_battery_power_sources(self):
+        write_supply(self.root, 'BAT0', type='Battery', present=1, status='Discharging', charge_full=100, charge_now=20, voltage_now=1000, current_now=100000)
+        pm = linux.PowerManagement()
+        pm.get_topology()
+        with mock.patch.object(linux.AttributeReader, 'read', autospec=True, side_effect=linux.AttributeReader.read) as read:
+            power_sources = pm.get_power_sources()
+        self.assertEqual([call[0][2] for call in read.call_args_list].count('voltage_now'), 1)
+        self.assertEqual(power_sources, (
+            power.common.PowerSourceInfo('BAT0', power.POWER_TYPE_BATTERY, True, True, 20.0, 100.0, 100000.0, 'System', 'Discharging', 1000.0, None, 'uAh'),
+        ))
+        self.assertEqual(linux.PowerManagement.get_rate('uWh', current_now=100000.0, voltage_now=12000000.0), 1200000.0)
+        self.assertEqual(linux.PowerManagement.get_rate('uAh', power_now=1200000.0, voltage_now=12000000.0), 100000.0)
+        self.assertIsNone(linux.PowerManagement.get_rate('uAh', power_now=1200000.0))
+
+    def test_status_matches_power_sources(self):
+        variants = [
+            ('current_voltage', dict(energy_full=50000000, energy_now=25000000, current_now=1000000, voltage_now=12000000), 125.0, 12000000.0),
+            ('charge', dict(charge_full=3000000, charge_now=2000000, current_now=1000000, voltage_now=12000000), 120.0, 1000000.0),
+            ('charge_power', dict(charge_full=3000000, charge_now=2000000, power_now=12000000, voltage_now=12000000), 120.0, 1000000.0),
+        ]
+        for name, attributes, time_remaining, rate in variants:
+            supply_path = write_supply(self.root, name, type='Battery', present=1, status='Discharging', **attributes)
+            try:
+                status, power_sources = linux.PowerManagement().get_status_and_power_sources()
+                self.assertAlmostEqual(status.time_remaining_estimate, time_remaining, msg=name)
+                self.assertEqual(power_sources[0].power_now, rate, name)
+                self.assertAlmostEqual(power_sources[0].energy_now / power_sources[0].power_now * 60.0, time_remaining, msg=name)
+                self.assertEqual(linux.PowerManagement.get_battery_state(supply_path)[2], rate, name)
+            finally:
+                shutil.rmtree(supply_path)
+
+    def test_power_sources(self):
+        write_supply(self.root, 'AC', type='Mains', online=1)
+        write_supply(self.root, 'BAT0', type='Battery', present=1, status='Discharging', energy_full=100, energy_now=50, power_now=50, voltage_now=12000000, capacity=50)
+        write_supply(self.root, 'BAT1', type='Battery', present=0)
+        pm = linux.PowerManagement()
+        status, power_sources = pm.get_status_and_power_sources()
+        self.assertEqual(status, power.common.AC_POWER_STATUS)
+        self.assertEqual(sorted(power_sources, key=lambda i: i.name), [
+            power.common.PowerSourceInfo('AC', power.POWER_TYPE_AC, True, scope='System'),
+            power.common.PowerSourceInfo('BAT0', power.POWER_TYPE_BATTERY, True, True, 50.0, 100.0, 50.0, 'System', 'Discharging', 12000000.0, 50.0, 'uWh'),
+            power.common.PowerSourceInfo('BAT1', power.POWER_TYPE_BATTERY, False, scope='System'),
+        ])
+        self.assertEqual(pm.get_power_sources(), power_sources)
+
+        write_supply(self.root, 'AC', online=0)
+        status, power_sources = pm.get_status_and_power_sources()
+        self.assertEqual(status, power.PowerStatus(power.POWER_TYPE_BATTERY, power.LOW_BATTERY_WARNING_NONE, 60.0))
+        self.assertEqual(status, pm.get_status())
+
+    def test_unreadable_supply(self):
+        write_supply(self.root, 'BAT0', type='Battery', present=1, status='Discharging')
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter('always')
+            status = linux.PowerManagement().get_status()
+        self.assertEqual(status.power_source_type, power.POWER_TYPE_AC)
+        self.assertTrue(any(issubclass(i.category, RuntimeWarning) for i in w))
+
+    def test_descriptor_cache_reader(self):
+        write_supply(self.root, 'BAT0', type='Battery', present=1, status='Discharging', energy_full=100, energy_now=50, power_now=50)
+        reader = linux.DescriptorCacheReader()
+        self.addCleanup(reader.close)
+        pm = linux.PowerManagement(reader=reader)
+        self.assertEqual(pm.get_time_remaining_estimate(), 60.0)
+
+        with mock.patch('os.open', side_effect=AssertionError("descriptors must be reused")):
+            write_supply(self.root, 'BAT0', energy_now=25)
+            self.assertEqual(pm.get_time_remaining_estimate(), 30.0)
+
+    def test_descriptor_cache_reader_supply_removed(self):
+        supply_path = write_supply(self.root, 'BAT0', type='Battery', present=1, status='Discharging', energy_full=100, energy_now=50, power_now=50)
+        pm = linux.PowerManagement(reader='descriptor_cache')
+        self.assertEqual(pm.get_providing_power_source_type(), power.POWER_TYPE_BATTERY)
+
+        shutil.rmtree(supply_path)
+        self.assertEqual(pm.get_providing_power_source_type(), power.POWER_TYPE_AC)
+        self.assertEqual(pm._reader._descriptors, {})
+
+        write_supply(self.root, 'BAT0', type='Battery', present=1, status='Discharging', energy_full=100, energy_now=50, power_now=50)
+        self.assertEqual(pm.get_providing_power_source_type(), power.POWER_TYPE_BATTERY)
+
+    def test_uevent_reader(self):
+        supply_path = write_supply(self.root, 'BAT0', type='Battery', energy_full=1)
+        with open(os.path.join(supply_path, 'uevent'), 'w') as f:
+            f.write('POWER_SUPPLY_NAME=BAT0\nPOWER_SUPPLY_PRESENT=1\nPOWER_SUPPLY_STATUS=Discharging\n'
+                    'POWER_SUPPLY_ENERGY_FULL=100\nPOWER_SUPPLY_ENERGY_NOW=50\nPOWER_SUPPLY_POWER_NOW=50\n')
+
+        pm = linux.PowerManagement(reader='uevent')
+        self.assertEqual(pm.get_status(), power.PowerStatus(power.POWER_TYPE_BATTERY, power.LOW_BATTERY_WARNING_NONE, 60.0))
+        self.assertEqual(sorted(pm._reader._descriptors[supply_path]), ['type', 'uevent'])
+
+    def test_uevent_reader_missing_attribute(self):
+        supply_path = write_supply(self.root, 'BAT0', type='Battery')
+        with open(os.path.join(supply_path, 'uevent'), 'w') as f:
+            f.write('POWER_SUPPLY_NAME=BAT0\nPOWER_SUPPLY_PRESENT=1\nPOWER_SUPPLY_STATUS=Discharging\n'
+                    'POWER_SUPPLY_ENERGY_FULL=100\nPOWER_SUPPLY_ENERGY_NOW=50\nPOWER_SUPPLY_POWER_NOW=50\n')
+
+        pm = linux.PowerManagement(reader='uevent')
+        pm.get_status_and_power_sources()
+        self.assertEqual(pm._reader._missing, {supply_path: set(['scope', 'voltage_now', 'capacity'])})
+        with mock.patch('os.open', side_effect=os.open) as os_open:
+            _, power_sources = pm.get_status_and_power_sources()
+        self.assertEqual(os_open.call_count, 0)
+        self.assertIsNone(power_sources[0].voltage_now)
+
+        pm.invalidate_topology()
+        pm.get_topology()
+        self.assertEqual(pm._reader._missing, {supply_path: set(['scope'])})
+
+    def test_parse_uevent(self):
+        properties = linux.UeventReader.parse_uevent(b'DEVTYPE=x\nPOWER_SUPPLY_NAME=AC\nPOWER_SUPPLY_ONLINE=1\n')
+        self.assertEqual(properties, {'name': b'AC', 'online': b'1'})
+
+    def test_uevent_observer(self):
+        write_supply(self.root, 'BAT0', type='Battery', present=1, status='Discharging', energy_full=100, energy_now=50, power_now=50)
+        listener_socket, kernel_socket = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.addCleanup(kernel_socket.close)
+        listener = linux.UeventListener(socket_factory=lambda: listener_socket)
+        pm = linux.PowerManagement(uevent_listener=listener)
+        observer = RecordingObserver()
+        pm.add_observer(observer)
+        try:
+            kernel_socket.send(uevent_message('change', 'BAT0'))
+            self.assertFalse(observer.wait_for_changes(1, timeout=0.2))
+
+            write_supply(self.root, 'BAT0', energy_now=25)
+            kernel_socket.send(uevent_message('change', 'input0', subsystem='input'))
+            kernel_socket.send(uevent_message('change', 'BAT0'))
+            self.assertTrue(observer.wait_for_changes(1))
+            self.assertEqual(observer.changes, ['time_remaining'])
+
+            write_supply(self.root, 'AC', type='Mains', online=1)
+            kernel_socket.send(uevent_message('add', 'AC'))
+            self.assertTrue(observer.wait_for_changes(3))
+            self.assertEqual(observer.changes, ['time_remaining', 'power_sources', 'time_remaining'])
+        finally:
+            pm.remove_observer(observer)
+
+        self.assertIsNone(listener._thread)
+        self.assertEqual(listener_socket.fileno(), -1)
+
+    def test_uevent_listener_errors(self):
+        write_supply(self.root, 'BAT0', type='Battery', present=1, status='Discharging', energy_full=100, energy_now=50, power_now=50)
+        listener_socket, kernel_socket = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.addCleanup(kernel_socket.close)
+
+        class FailingObserver(object):
+            def on_uevent(self, properties):
+                raise ValueError("observer failed")
+
+        listener = linux.UeventListener(socket_factory=lambda: OverflowingSocket(listener_socket))
+        pm = linux.PowerManagement(uevent_listener=listener)
+        failing_observer = FailingObserver()
+        observer = RecordingObserver()
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter('always')
+            listener.add_observer(failing_observer)
+            pm.add_observer(observer)
+            try:
+                write_supply(self.root, 'AC', type='Mains', online=0)
+                kernel_socket.send(b'overflow')
+                self.assertTrue(observer.wait_for_changes(1))
+                self.assertEqual(observer.changes, ['power_sources'])
+                self.assertEqual(len(pm.get_topology()), 2)
+
+                write_supply(self.root, 'BAT0', energy_now=25)
+                kernel_socket.send(uevent_message('change', 'BAT0'))
+                self.assertTrue(observer.wait_for_changes(2))
+                self.assertEqual(observer.changes, ['power_sources', 'time_remaining'])
+                self.assertTrue(listener._thread.is_alive())
+            finally:
+                pm.remove_observer(observer)
+                listener.remove_observer(failing_observer)
+        self.assertTrue(any("Unable to notify" in str(warning.message) for warning in w))
+        self.assertIsNone(listener._thread)
+
+    def check_fileno(self, pm, kernel_socket):
+        self.assertEqual(select.select([pm], [], [], 0)[0], [])
+        self.assertEqual(pm.drain_events(), 0)
+
+        kernel_socket.send(uevent_message('change', 'input0', subsystem='input'))
+        kernel_socket.send(uevent_message('change', 'BAT0'))
+        select.select([pm], [], [], 0.2)
+        self.assertEqual(pm.drain_events(), 0)
+
+        write_supply(self.root, 'BAT0', energy_now=25)
+        kernel_socket.send(uevent_message('change', 'BAT0'))
+        self.assertEqual(select.select([pm], [], [], 1.0)[0], [pm])
+        time.sleep(0.05)
+        self.assertEqual(pm.drain_events(), 1)
+        self.assertEqual(select.select([pm], [], [], 0)[0], [])
+
+        write_supply(self.root, 'AC', type='Mains', online=1)
+        kernel_socket.send(uevent_message('add', 'AC'))
+        self.assertEqual(select.select([pm], [], [], 1.0)[0], [pm])
+        time.sleep(0.05)
+        self.assertEqual(pm.drain_events(), 2)
+        self.assertEqual(select.select([pm], [], [], 0)[0], [])
+        self.assertEqual(pm.get_status(), power.common.AC_POWER_STATUS)
+
+    def test_fileno(self):
+        write_supply(self.root, 'BAT0', type='Battery', present=1, status='Discharging', energy_full=100, energy_now=50, power_now=50)
+        event_socket, kernel_socket = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.addCleanup(kernel_socket.close)
+        listener = linux.UeventListener(socket_factory=lambda: event_socket)
+        pm = linux.PowerManagement(uevent_listener=listener)
+        self.assertEqual(pm.fileno(), event_socket.fileno())
+        self.check_fileno(pm, kernel_socket)
+        self.assertIsNone(listener._thread)
+
+        pm.close_events()
+        self.assertEqual(event_socket.fileno(), -1)
+
+    def test_fileno_observing(self):
+        write_supply(self.root, 'BAT0', type='Battery', present=1, status='Discharging', energy_full=100, energy_now=50, power_now=50)
+        listener_socket, kernel_socket = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.addCleanup(kernel_socket.close)
+
+        class ThreadOnlyListener(linux.UeventListener):
+            def create_socket(self):
+                raise OSError("netlink is not permitted")
+
+        listener = ThreadOnlyListener(socket_factory=lambda: listener_socket)
+        pm = linux.PowerManagement(uevent_listener=listener)
+        with self.assertWarns(RuntimeWarning):
+            pm.fileno()
+        self.assertIsNotNone(pm._event_pipe)
+        self.check_fileno(pm, kernel_socket)
+
+        pm.close_events()
+        self.assertIsNone(listener._thread)
+
+    def test_fileno_overflow(self):
+        write_supply(self.root, 'BAT0', type='Battery', present=1, status='Discharging', energy_full=100, energy_now=50, power_now=50)
+        event_socket, kernel_socket = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.addCleanup(kernel_socket.close)
+        pm = linux.PowerManagement(uevent_listener=linux.UeventListener(socket_factory=lambda: OverflowingSocket(event_socket)))
+        self.addCleanup(pm.close_events)
+        pm.fileno()
+        self.assertEqual(len(pm.get_topology()), 1)
+
+        write_supply(self.root, 'AC', type='Mains', online=1)
+        kernel_socket.send(b'overflow')
+        self.assertEqual(pm.drain_events(), 2)
+        self.assertEqual(len(pm.get_topology()), 2)
+        self.assertEqual(pm.get_status(), power.common.AC_POWER_STATUS)
+
+    def test_parse_uevent_message(self):
+        self.assertEqual(linux.UeventListener.parse_message(uevent_message('remove', 'AC')),
+                         {'ACTION': b'remove', 'SUBSYSTEM': b'power_supply', 'POWER_SUPPLY_NAME': b'AC'})
+        self.assertIsNone(linux.UeventListener.parse_message(b'libudev\0\xfe\xed'))
+
+    def test_polling_fallback(self):
+        def socket_factory():
+            raise OSError("netlink is not permitted")
+
+        poller = power.common.PowerManagementPoller()
+        pm = linux.PowerManagement(uevent_listener=linux.UeventListener(socket_factory=socket_factory))
+        pm.poller = poller
+        observer = RecordingObserver()
+        with self.assertWarns(RuntimeWarning):
+            pm.add_observer(observer)
+        self.assertIn(id(pm), poller._entries)
+        pm.remove_observer(observer)
+        self.assertEqual(poller._entries, {})
+
+    def test_topology_is_reused(self):
+        write_supply(self.root, 'BAT0', type='Battery', present=1, status='Discharging', charge_full=5000000, charge_now=1000000, voltage_now=12000000, current_now=500000)
+        pm = linux.PowerManagement()
+        pm.get_status()
+
+        with mock.patch('os.listdir', side_effect=AssertionError("topology must be reused")):
+            with mock.patch.object(linux.AttributeReader, 'read', autospec=True, side_effect=linux.AttributeReader.read) as read:
+                self.assertAlmostEqual(pm.get_time_remaining_estimate(), 120.0)
+        self.assertEqual(sorted(call[0][2] for call in read.call_args_list),
+                         ['charge_full', 'charge_now', 'current_now', 'present', 'status', 'voltage_now'])
+
+    def test_topology_hotplug(self):
+        pm = linux.PowerManagement()
+        self.assertEqual(pm.get_topology(), ())
+
+        write_supply(self.root, 'BAT0', type='Battery', present=1, status='Discharging', energy_full=100, energy_now=50, power_now=50)
+        pm.invalidate_topology()
+        self.assertEqual([plan.path for plan in pm.get_topology()], [os.path.join(self.root, 'BAT0')])
+
+        with mock.patch('os.listdir', return_value=[]) as listdir:
+            pm.on_uevent({'ACTION': b'remove'})
+        listdir.assert_called_once_with(self.root)
+        self.assertEqual(pm.get_topology(), ())
+
+    def test_read_error_keeps_topology(self):
+        write_supply(self.root, 'BAT0', type='Battery', present=1, status='Discharging', energy_full=100, energy_now=50, power_now=50)
+        pm = linux.PowerManagement()
+        pm.get_status()
+        read = linux.AttributeReader.read
+        errors = [errno.EIO]
+
+        def read_failing(reader, supply_path, name):
+            if name == 'energy_now':
+                raise IOError(errors[0], os.strerror(errors[0]))
+            return read(reader, supply_path, name)
+
+        with mock.patch.object(linux.AttributeReader, 'read', autospec=True, side_effect=read_failing):
+            with mock.patch('os.listdir', wraps=os.listdir) as listdir:
+                with warnings.catch_warnings():
+                    warnings.simplefilter('ignore')
+                    pm.get_status()
+                    pm.get_status()
+                    self.assertEqual(listdir.call_count, 0)
+
+                    errors[0] = errno.ENODEV
+                    pm.get_status()
+                    pm.get_status()
+                    self.assertEqual(listdir.call_count, 1)
+
+    def test_ac_only_fast_path(self):
+        write_supply(self.root, 'AC', type='Mains', online=0)
+        write_supply(self.root, 'hid-mouse', type='Battery', scope='Device', present=1, status='Discharging', energy_full=100, energy_now=1, power_now=50)
+        pm = linux.PowerManagement()
+        pm.get_status()
+
+        with mock.patch.object(linux.AttributeReader, 'read', side_effect=AssertionError("no attributes must be read")):
+            self.assertEqual(pm.get_status(), power.common.AC_POWER_STATUS)
+
+    def test_device_scope_power_sources(self):
+        write_supply(self.root, 'AC', type='Mains', online=0)
+        write_supply(self.root, 'BAT0', type='Battery', present=1, status='Discharging', energy_full=100, energy_now=50, power_now=50)
+        write_supply(self.root, 'hid-mouse', type='Battery', scope='Device', present=1, status='Discharging', energy_full=100, energy_now=1, power_now=50)
+        status, power_sources = linux.PowerManagement().get_status_and_power_sources()
+        self.assertEqual(status, power.PowerStatus(power.POWER_TYPE_BATTERY, power.LOW_BATTERY_WARNING_NONE, 60.0))
+        self.assertEqual(sorted((source.name, source.scope) for source in power_sources),
+                         [('AC', 'System'), ('BAT0', 'System'), ('hid-mouse', 'Device')])
+
+    def test_root(self):
+        write_supply(os.path.join(self.root, 'class', 'power_supply'), 'BAT0', type='Battery', present=1, status='Discharging', energy_full=100, energy_now=50, power_now=50)
+        self.assertEqual(linux.PowerManagement(root=self.root).get_time_remaining_estimate(), 60.0)
+
+        with self.assertRaises(RuntimeError):
+            linux.PowerManagement(root=os.path.join(self.root, 'missing'))
+
+    def test_multi_root_monitor(self):
+        for name, energy_now in [('a', 50), ('b', 25), ('slow', 10)]:
+            write_supply(os.path.join(self.root, name, 'class', 'power_supply'), 'BAT0', type='Battery', present=1, status='Discharging', energy_full=100, energy_now=energy_now, power_now=50)
+        roots = [os.path.join(self.root, name) for name in ('a', 'b', 'missing', 'slow')]
+
+        with linux.MultiRootMonitor(roots, max_workers=2, timeout=0.5) as monitor:
+            unblock = threading.Event()
+            slow_power_management = monitor.get_power_management(roots[3])
+            slow_get_status = slow_power_management.get_status
+            slow_power_management.get_status = lambda: unblock.wait(5.0) and slow_get_status()
+            self.addCleanup(unblock.set)
+
+            snapshots = monitor.get_snapshots()
+            self.assertEqual(list(snapshots), roots)
+            self.assertEqual(snapshots[roots[0]].status.time_remaining_estimate, 60.0)
+            self.assertEqual(snapshots[roots[1]].status.time_remaining_estimate, 30.0)
+            self.assertIsInstance(snapshots[roots[2]].error, RuntimeError)
+            self.assertIsNone(snapshots[roots[3]].status)
+            self.assertIsNotNone(snapshots[roots[3]].error)
+
+            pending = monitor._pending[roots[3]]
+            monitor.get_snapshots()
+            self.assertIs(monitor._pending[roots[3]], pending)
+
+            unblock.set()
+            pending.result(5.0)
+            self.assertEqual(monitor.get_snapshots()[roots[3]].status.time_remaining_estimate, 12.0)
@@ -0,0 +1,89 @@
+# coding=utf-8
+from __future__ import print_function
+
+import io
+import json
+import subprocess
+import sys
+import threading
+import time
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+import power
+from power import common
+from power.__main__ import main
+from tests.helpers import PowerManagementCounting
+
+
+class Output(io.StringIO):
+    def write(self, s):
+        if not isinstance(s, type(u'')):
+            s = s.decode('utf-8')
+        return super(Output, self).write(s)
+
+    @property
+    def records(self):
+        return [json.loads(line) for line in self.getvalue().splitlines()]
+
+
+class TestMain(unittest.TestCase):
+    def test_one_shot(self):
+        pm = PowerManagementCounting(status=common.PowerStatus(power.POWER_TYPE_BATTERY, power.LOW_BATTERY_WARNING_EARLY, 42.0))
+        output = Output()
+        self.assertEqual(main([], power_management=pm, output=output), 0)
+        record, = output.records
+        self.assertEqual(list(record.keys())[1:], ['power_source_type', 'low_battery_warning_level', 'time_remaining_estimate'])
+        self.assertEqual(record['power_source_type'], 'battery')
+        self.assertEqual(record['low_battery_warning_level'], 'early')
+        self.assertEqual(record['time_remaining_estimate'], 42.0)
+
+    def test_fields(self):
+        pm = PowerManagementCounting()
+        output = Output()
+        main(['--fields', 'time_remaining_estimate,power_sources'], power_management=pm, output=output)
+        record, = output.records
+        self.assertEqual(list(record.keys()), ['time_remaining_estimate', 'power_sources'])
+        self.assertIsNone(record['time_remaining_estimate'])
+        self.assertEqual([(i['name'], i['type']) for i in record['power_sources']], [('AC', 'ac'), ('BAT0', 'battery')])
+
+    def test_unknown_field(self):
+        with self.assertRaises(SystemExit):
+            main(['--fields', 'voltage'], power_management=PowerManagementCounting(), output=Output())
+
+    def test_watch_options_require_watch(self):
+        for argv in (['--interval', '1'], ['--count', '2']):
+            with self.assertRaises(SystemExit):
+                main(argv, power_management=PowerManagementCounting(), output=Output())
+
+    def test_does_not_load_exporter(self):
+        code = "import sys, power.__main__; sys.exit('power.exporter' in sys.modules or 'socketserver' in sys.modules)"
+        self.assertEqual(subprocess.call([sys.executable, '-c', code]), 0)
+
+    def test_watch_interval(self):
+        pm = PowerManagementCounting()
+        output = Output()
+        main(['--watch', '--interval', '0.01', '--count', '3', '--fields', 'power_source_type'], power_management=pm, output=output)
+        self.assertEqual(output.records, [{'power_source_type': 'ac'}] * 3)
+        self.assertEqual(pm.calls, 3)
+
+    def test_watch_on_change(self):
+        poller = common.PowerManagementPoller(ac_interval=0.01, battery_interval=0.01)
+        pm = PowerManagementCounting(poller=poller)
+        output = Output()
+        thread = threading.Thread(target=main, args=(['--watch', '--count', '2', '--fields', 'power_source_type'], pm, output))
+        thread.daemon = True
+        thread.start()
+
+        deadline = time.time() + 5.0
+        while not output.getvalue() and time.time() < deadline:
+            time.sleep(0.01)
+        pm.status = common.PowerStatus(power.POWER_TYPE_BATTERY, power.LOW_BATTERY_WARNING_NONE, 60.0)
+        thread.join(5.0)
+
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(output.records, [{'power_source_type': 'ac'}, {'power_source_type': 'battery'}])
+        self.assertEqual(len(pm._weak_observers), 0)
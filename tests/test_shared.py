@@ -0,0 +1,138 @@
+# coding=utf-8
+from __future__ import print_function
+
+import os
+import shutil
+import struct
+import tempfile
+import time
+import warnings
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+try:
+    import unittest.mock as mock
+except ImportError:
+    import mock
+
+import power
+from power import common, shared
+from tests.helpers import PowerManagementCounting
+
+
+BATTERY_STATUS = common.PowerStatus(power.POWER_TYPE_BATTERY, power.LOW_BATTERY_WARNING_EARLY, 42.5)
+
+
+class TestShared(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'power.snapshot')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_publish(self):
+        backend = PowerManagementCounting(status=BATTERY_STATUS)
+        publisher = shared.Publisher(backend, path=self.path)
+        publisher.publish()
+
+        pm = shared.PowerManagement(self.path)
+        for _ in range(10):
+            self.assertEqual(pm.get_status(), BATTERY_STATUS)
+        self.assertEqual(pm.get_time_remaining_estimate(), 42.5)
+        self.assertEqual(backend.calls, 1)
+
+        backend.status = common.AC_POWER_STATUS
+        publisher.publish()
+        self.assertEqual(pm.get_providing_power_source_type(), power.POWER_TYPE_AC)
+
+    def test_missing(self):
+        pm = shared.PowerManagement(self.path)
+        self.assertRaises(RuntimeError, pm.get_status)
+
+        fallback = PowerManagementCounting(status=BATTERY_STATUS)
+        pm.fallback = fallback
+        self.assertEqual(pm.get_status(), BATTERY_STATUS)
+
+        shared.SnapshotSegment(self.path, writable=True).write(common.AC_POWER_STATUS)
+        self.assertEqual(pm.get_status(), common.AC_POWER_STATUS)
+        self.assertEqual(fallback.calls, 1)
+
+    def test_unpublished(self):
+        shared.SnapshotSegment(self.path, writable=True)
+        self.assertIsNone(shared.PowerManagement(self.path).get_snapshot())
+
+    def test_stale(self):
+        segment = shared.SnapshotSegment(self.path, writable=True)
+        segment.write(BATTERY_STATUS, timestamp=time.time() - 60.0)
+        self.assertIsNotNone(shared.PowerManagement(self.path).get_snapshot())
+        self.assertIsNone(shared.PowerManagement(self.path, max_age=10.0).get_snapshot())
+
+    def test_writer_in_progress(self):
+        segment = shared.SnapshotSegment(self.path, writable=True)
+        segment.write(BATTERY_STATUS)
+        with open(self.path, 'r+b') as f:
+            f.seek(shared.SEQUENCE_OFFSET)
+            f.write(struct.pack('<Q', 3))
+        self.assertIsNone(shared.SnapshotSegment(self.path).read())
+        segment.close()
+
+        # Next writer skips the unfinished update
+        segment = shared.SnapshotSegment(self.path, writable=True)
+        segment.write(common.AC_POWER_STATUS)
+        self.assertEqual(shared.SnapshotSegment(self.path).read().status, common.AC_POWER_STATUS)
+
+    @unittest.skipIf(shared.fcntl is None, "flock is not available")
+    def test_single_writer(self):
+        segment = shared.SnapshotSegment(self.path, writable=True)
+        self.assertRaises(RuntimeError, shared.SnapshotSegment, self.path, writable=True)
+        self.assertRaises(RuntimeError, shared.Publisher, PowerManagementCounting(), path=self.path)
+        self.assertIsNone(shared.SnapshotSegment(self.path).read())
+        segment.close()
+        shared.SnapshotSegment(self.path, writable=True).write(BATTERY_STATUS)
+
+    def test_not_a_segment(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'\0' * shared.SEGMENT_SIZE)
+        self.assertRaises(ValueError, shared.SnapshotSegment, self.path)
+
+    @unittest.skipIf(not hasattr(os, 'symlink') or not hasattr(os, 'getuid'), "POSIX is required")
+    def test_untrusted_file(self):
+        target = os.path.join(self.directory, 'target')
+        shared.SnapshotSegment(target, writable=True).write(BATTERY_STATUS)
+        os.symlink(target, self.path)
+        self.assertRaises(EnvironmentError, shared.SnapshotSegment, self.path, writable=True)
+        self.assertRaises(EnvironmentError, shared.SnapshotSegment, self.path)
+        self.assertRaises(RuntimeError, shared.PowerManagement(self.path).get_status)
+
+        self.assertRaises(ValueError, shared.SnapshotSegment, target, owner=os.getuid() + 1)
+        self.assertIsNotNone(shared.SnapshotSegment(target, owner=os.getuid()).read())
+        os.chmod(target, 0o666)
+        self.assertRaises(ValueError, shared.SnapshotSegment, target)
+        self.assertRaises(ValueError, shared.SnapshotSegment, target, writable=True)
+
+    def test_publish_failure(self):
+        with mock.patch('power.get_platform_power_management_class', return_value=PowerManagementCounting):
+            power_management_class = power.get_power_management_class()
+        with mock.patch('power._power_management_class', power_management_class):
+            publisher = shared.Publisher(path=self.path)
+        backend = publisher.power_management
+        backend.status = BATTERY_STATUS
+        backend.error = OSError("EIO")
+        pm = shared.PowerManagement(self.path)
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter('always')
+            publisher.publish()
+            self.assertRaises(RuntimeError, pm.get_status)
+
+            backend.error = None
+            publisher.publish()
+            snapshot = pm.get_snapshot()
+            backend.error = OSError("EIO")
+            publisher.publish()
+        self.assertEqual(len(w), 1)
+        self.assertEqual(pm.get_snapshot(), snapshot)
+        self.assertEqual(snapshot.status, BATTERY_STATUS)